@@ -13,11 +13,10 @@ class Builder(object):
         self.appname = None
         self.build_log_file = None
 
-    def init(self, idename, app_target, output_path, workspace, appname):
-        cfg = CfgParser()
+    def init(self, idename, app_target, output_path, workspace, appname, compiler=None):
         self.idename = idename
         self.target = app_target
-        self.compiler = cfg.get_toolchain(self.idename)
+        self.compiler = compiler or CfgParser().get_toolchain(self.idename)
         self.workspace = workspace
         self.appname = appname
         self.output_path = pathlib.Path(output_path).joinpath(f"{self.appname}_{self.target}").as_posix()
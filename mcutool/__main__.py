@@ -17,7 +17,8 @@ class ComplexCLI(click.MultiCommand):
         'config',
         'cmake',
         'elfcov',
-        "merge_mf"
+        "merge_mf",
+        "catalog",
         # 'gdbserver',
         # 'flash'
     ]
@@ -0,0 +1,165 @@
+#
+
+#
+import os
+import re
+import zlib
+import shutil
+import fnmatch
+import logging
+import zipfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from mcutool.sdk_manifest import SDKManifest
+from mcutool.impact import ImpactAnalyzer
+
+LOGGER = logging.getLogger(__name__)
+
+MANIFEST_PATTERN = re.compile(r".*_manifest.*\.xml$")
+
+
+def _crc32(path):
+    crc = 0
+    with open(path, "rb") as fobj:
+        for chunk in iter(lambda: fobj.read(1024 * 1024), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def is_up_to_date(info, path):
+    """Check the file on disk has the same size and CRC with zip member."""
+    try:
+        if os.path.getsize(path) != info.file_size:
+            return False
+    except OSError:
+        return False
+    return _crc32(path) == info.CRC
+
+
+def extract_members(zip_path, dest, members=None, jobs=None):
+    """Extract members from zip file, files are streamed to disk in parallel.
+
+    The files whose size and CRC already match on disk are skipped.
+
+    Arguments:
+        zip_path {str} -- zip file path
+        dest {str} -- destination directory
+        members {list|callable} -- member names, or a function to select member
+            name. Default None, extract all.
+        jobs {int} -- number of worker threads, default None uses executor default.
+
+    Returns:
+        tuple -- (extracted, skipped), number of files
+    """
+    with zipfile.ZipFile(zip_path) as zfile:
+        infos = [info for info in zfile.infolist() if not info.is_dir()]
+
+    if callable(members):
+        infos = [info for info in infos if members(info.filename)]
+    elif members is not None:
+        names = set(members)
+        infos = [info for info in infos if info.filename in names]
+
+    dest = os.path.abspath(dest)
+    local = threading.local()
+    handles = list()
+    lock = threading.Lock()
+
+    def _extract(info):
+        # path is sanitized in the same way of ZipFile.extract
+        target = os.path.join(dest, *[part for part in info.filename.split("/") if part not in ("", ".", "..")])
+        if is_up_to_date(info, target):
+            return False
+
+        # ZipFile object is not shared between threads
+        zfile = getattr(local, "zfile", None)
+        if zfile is None:
+            zfile = local.zfile = zipfile.ZipFile(zip_path)
+            with lock:
+                handles.append(zfile)
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with zfile.open(info) as source, open(target, "wb") as fobj:
+            shutil.copyfileobj(source, fobj, 1024 * 1024)
+        return True
+
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_extract, infos))
+    finally:
+        for zfile in handles:
+            zfile.close()
+
+    extracted = sum(1 for ret in results if ret)
+    skipped = len(results) - extracted
+    LOGGER.info("extracted %s files, skipped %s up-to-date files from %s", extracted, skipped, zip_path)
+    return extracted, skipped
+
+
+def _select_examples(manifest, boards=None, names=None):
+    """Select examples and their linked projects."""
+    selected = set()
+    for example in manifest.examples:
+        if boards and example.board not in boards:
+            continue
+        if names and example.attrib.get("name") not in names and example.id not in names:
+            continue
+        selected.update(info["id"] for info in manifest.find_linked_projects(example.id))
+    return [example for example in manifest.examples if example.id in selected]
+
+
+def extract_sdk(zip_path, dest, boards=None, names=None, jobs=None):
+    """Extract SDK package, only the files required by the selected examples.
+
+    1. root files and manifests are extracted,
+    2. example xml of selected examples are extracted,
+    3. the sources of the examples and the components they depend on, and the
+       files in the example directories are extracted.
+
+    If no board and name is given, or no manifest is found, all files are extracted.
+
+    Arguments:
+        zip_path {str} -- SDK package path
+        dest {str} -- destination directory
+        boards {list} -- board ids of the examples
+        names {list} -- names or ids of the examples
+        jobs {int} -- number of worker threads
+
+    Returns:
+        tuple -- (extracted, skipped), number of files
+    """
+    if not boards and not names:
+        return extract_members(zip_path, dest, jobs=jobs)
+
+    def is_head(name):
+        return "/" not in name or (name.count("/") <= 2 and MANIFEST_PATTERN.match(name))
+
+    extracted, skipped = extract_members(zip_path, dest, is_head, jobs)
+    SDKManifest.clear_cache()
+    manifest = SDKManifest.find_max_version(dest)
+    if not manifest:
+        LOGGER.warning("no manifest found in %s, extract all files", zip_path)
+        return extract_members(zip_path, dest, jobs=jobs)
+
+    examples = _select_examples(manifest, boards, names)
+    xml_files = set("%s/%s" % (example.attrib.get("path"), example.example_xml)
+                    for example in examples if example.example_xml)
+    count = extract_members(zip_path, dest, xml_files, jobs)
+
+    files, masks, dirs = ImpactAnalyzer(dest, manifest).required_files(example.id for example in examples)
+    dir_masks = dict()
+    for directory, mask in masks:
+        dir_masks.setdefault(directory, list()).append(mask)
+    prefixes = tuple(directory + "/" for directory in dirs)
+
+    def is_required(name):
+        if is_head(name) or name in xml_files:
+            return False
+        if name in files or name.startswith(prefixes):
+            return True
+        directory, filename = name.rpartition("/")[::2]
+        return any(fnmatch.fnmatch(filename, mask) for mask in dir_masks.get(directory, ()))
+
+    result = extract_members(zip_path, dest, is_required, jobs)
+    return (extracted + count[0] + result[0], skipped + count[1] + result[1])
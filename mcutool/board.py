@@ -8,7 +8,10 @@ import logging
 
 from mcutool.debugger import getdebugger
 from mcutool.debugger.general import DebuggerBase
+from mcutool.debugger.smartflash import FlashRecord, image_hash, load_image_segments, segment_crcs
 from mcutool.pserial import Serial
+from mcutool.lease import HOST_LEASES
+from mcutool.inventory import INVENTORY
 
 LOGGER = logging.getLogger(__name__)
 
@@ -27,6 +30,8 @@ class Board(object):
 
         Keyword Arguments:
             debugger_type {string} -- debugger type, choices are defined in
+            persistent_gdbserver {bool} -- keep gdbserver running between programming
+            smart_flash {bool} -- skip programming if the board holds the same image
         """
         self.main_spawn = None
         self._debugger = None
@@ -39,6 +44,8 @@ class Board(object):
         self.gdbport = kwargs.get("gdbport", 3333)
         self.usbid = kwargs.get("usbid")
         self.start_address = kwargs.get("start_address", "0")
+        self.persistent_gdbserver = kwargs.get("persistent_gdbserver", False)
+        self.smart_flash = kwargs.get("smart_flash", False)
 
         self.sp = None
         self.pc = None
@@ -143,15 +150,34 @@ class Board(object):
         assert self.debugger, 'require vaild debugger'
         return self.debugger.start_gdbserver(**kwargs)
 
+    @property
+    def lease_names(self):
+        """Names of host resources used by this board: probe and serial ports."""
+        names = list()
+        if self.usbid:
+            names.append(f"probe:{self.usbid}")
+        names.extend(f"serial:{sp.port}" for sp in self._serial_ports if sp.port)
+        return names
+
+    def lease(self, timeout=None):
+        """Lease the probe and serial ports of this board on the host. A busy
+        board is waited until other job releases it.
+
+        Example:
+            >>> with board.lease():
+            ...     board.programming("hello_world.elf")
+        """
+        return HOST_LEASES.lease(self.lease_names, timeout)
+
+    def stop_gdbserver(self):
+        """Stop the persistent gdbserver of this board."""
+        if self.debugger:
+            self.debugger.stop_gdbserver()
+
     def get_mount_point(self):
         """Return mount point by matching usbid.
         """
-        import mbed_lstools
-        mbeds = mbed_lstools.create()
-        mbeds_devices = mbeds.list_mbeds(filter_function=lambda m: m["target_id"] in self.usbid)
-        if not mbeds_devices:
-            return
-        return mbeds_devices[0]['mount_point']
+        return INVENTORY.mount_point(self.usbid)
 
     def set_serial(self, port, baudrate, **kwargs):
         """Set or add serial port to board object, this interface will pass all
@@ -319,15 +345,55 @@ class Board(object):
         For general situation, it is avaliable for most boards.
         It will choose gdb or general method by filename extension.
 
+        In smart mode, programming is skipped when the last programmed image
+        of this board is the same and the flash CRC matches the image, the board
+        is still reset as after programming. Otherwise only the changed sectors
+        are programmed if the debugger supports.
+
+        Delta (changed sectors only) programming is limited to .bin and .img
+        images flashed by jlink or pyocd. ELF and hex images are loaded by gdb,
+        they are always programmed in full, only the whole-image skip applies.
+
         params:
             filename: path to image file.
+            smart: enable smart mode, default is board.smart_flash.
+            no_reset: do not reset board when programming is skipped.
         """
+        smart = kwargs.pop("smart", None)
+        if smart is None:
+            smart = self.smart_flash
+
+        if not smart:
+            return self._programming(filename, **kwargs)
+
+        record = FlashRecord(self)
+        digest = image_hash(filename, self.start_address)
+        crcs = segment_crcs(load_image_segments(filename, self.start_address))
+        if record.matches(digest) and self.debugger.verify_flash(crcs):
+            LOGGER.info("flash content matches %s, programming is skipped", filename)
+            # the image starts running as it is programmed
+            if not kwargs.get("no_reset"):
+                self.reset()
+            return 0, "programming skipped, flash content matches image"
+
+        # record is invalid until programming is done
+        record.clear()
+        kwargs.setdefault("delta", True)
+        ret = self._programming(filename, **kwargs)
+        retcode = ret[0] if isinstance(ret, tuple) else ret
+        if retcode == 0:
+            record.save(digest, filename, crcs)
+        return ret
+
+    def _programming(self, filename, **kwargs):
         LOGGER.info("programming %s", filename)
         ext = os.path.splitext(filename)[-1]
         if self.debugger_type in ("jlink", "pyocd"):
             if ext in (".bin", ".img"):
-                return self.debugger.flash(filename, addr=self.start_address)
+                return self.debugger.flash(filename, addr=self.start_address, delta=kwargs.get("delta"))
             else:
+                # gdb load always programs the whole image
+                kwargs.pop("delta", None)
                 return self.debugger.gdb_program(filename, **kwargs)
         else:
             return self.debugger.flash(filename, **kwargs)
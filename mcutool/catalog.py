@@ -0,0 +1,283 @@
+#
+
+#
+import os
+import json
+import time
+import sqlite3
+import logging
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+from mcutool.compilers import compilerfactory
+from mcutool.projects_scanner import find_projects
+from mcutool.sdk_manifest import SDKManifest, find_sub_manifests
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CATALOG = os.path.expanduser('~') + '/.mcutool/catalog.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sdks (
+    id INTEGER PRIMARY KEY,
+    root TEXT UNIQUE NOT NULL,
+    manifest TEXT,
+    sources TEXT,
+    name TEXT,
+    version TEXT,
+    scanned REAL
+);
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    sdk_id INTEGER NOT NULL REFERENCES sdks(id) ON DELETE CASCADE,
+    toolchain TEXT NOT NULL,
+    board TEXT,
+    app TEXT,
+    example_id TEXT,
+    category TEXT,
+    core TEXT,
+    prjpath TEXT NOT NULL,
+    targets TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sdks_version ON sdks(version);
+CREATE INDEX IF NOT EXISTS idx_projects_sdk ON projects(sdk_id);
+CREATE INDEX IF NOT EXISTS idx_projects_board ON projects(board);
+CREATE INDEX IF NOT EXISTS idx_projects_app ON projects(app);
+CREATE INDEX IF NOT EXISTS idx_projects_category ON projects(category);
+CREATE INDEX IF NOT EXISTS idx_projects_toolchain ON projects(toolchain);
+CREATE INDEX IF NOT EXISTS idx_projects_core ON projects(core);
+"""
+
+# query keyword -> column
+QUERY_COLUMNS = {
+    'sdk_root': 'sdks.root',
+    'sdk_version': 'sdks.version',
+    'board': 'projects.board',
+    'app': 'projects.app',
+    'example_id': 'projects.example_id',
+    'category': 'projects.category',
+    'toolchain': 'projects.toolchain',
+    'core': 'projects.core',
+}
+
+
+# directories searched for manifests by find_projects
+MANIFEST_DIRS = ('', 'manifests', 'core/manifests', 'examples/manifests')
+
+
+def _norm_root(path):
+    return os.path.abspath(path).replace('\\', '/')
+
+
+def _probe_manifests(root):
+    dirs = [os.path.join(root, subdir) for subdir in MANIFEST_DIRS]
+    return [os.path.abspath(filepath) for filepath, _ in SDKManifest.probe([d for d in dirs if os.path.isdir(d)])]
+
+
+def _collect_sources(root, projects):
+    """Return {path: mtime} of the files the imported records come from:
+    manifests, the sub-manifests they include, and the project files.
+    """
+    files = list()
+    for filepath in _probe_manifests(root):
+        try:
+            files.extend(find_sub_manifests(filepath, root))
+        except (IOError, ET.ParseError) as err:
+            LOGGER.debug('unable to resolve sub-manifests of %s: %s', filepath, err)
+            files.append(filepath)
+
+    for prjs in projects.values():
+        files.extend(os.path.abspath(prj.prjpath) for prj in prjs)
+
+    sources = dict()
+    for filepath in files:
+        try:
+            sources[filepath] = os.path.getmtime(filepath)
+        except OSError:
+            pass
+    return sources
+
+
+class ProjectCatalog(object):
+    """SQLite catalog of SDK projects.
+
+    Projects found by find_projects and the example information in SDK
+    manifest are imported into a local database, then the projects can be
+    selected with indexed queries instead of scanning the SDK again.
+
+    Example:
+        >>> with ProjectCatalog() as catalog:
+        ...     catalog.import_sdk("C:/SDK_2.13.0_EVK-MIMXRT1060")
+        ...     rows = catalog.query(board="evkmimxrt1060", category="usb_examples", toolchain="mcux")
+    """
+
+    def __init__(self, dbpath=None):
+        self.dbpath = dbpath or DEFAULT_CATALOG
+        if self.dbpath != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.dbpath)), exist_ok=True)
+        self._conn = sqlite3.connect(self.dbpath)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA foreign_keys = ON')
+        self._conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+    def _sdk_row(self, root):
+        return self._conn.execute('SELECT * FROM sdks WHERE root = ?', (root, )).fetchone()
+
+    def is_outdated(self, sdk_root):
+        """Check the SDK is not imported or its sources were changed after importing.
+
+        The sources are the manifests, their sub-manifests and the project files
+        recorded by import_sdk. A new manifest in the SDK also outdates the catalog.
+        """
+        root = _norm_root(sdk_root)
+        row = self._sdk_row(root)
+        if row is None or not row['manifest'] or not row['sources']:
+            return True
+
+        sources = json.loads(row['sources'])
+        if any(filepath not in sources for filepath in _probe_manifests(root)):
+            return True
+
+        for filepath, mtime in sources.items():
+            try:
+                if os.path.getmtime(filepath) != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def import_sdk(self, sdk_root, force=False, jobs=None):
+        """Scan and import projects of a SDK, the previous records of the SDK are replaced.
+
+        Arguments:
+            sdk_root {str} -- SDK root directory
+            force {bool} -- import even if the catalog is up to date with SDK manifest
+            jobs {int} -- number of worker processes to parse projects
+
+        Returns:
+            int -- number of imported projects, None if it is skipped.
+        """
+        root = _norm_root(sdk_root)
+        if not force and not self.is_outdated(root):
+            LOGGER.debug('catalog is up to date: %s', root)
+            return None
+
+        projects, _ = find_projects(root, jobs=jobs)
+        manifest = SDKManifest.find_max_version(root)
+
+        rows = list()
+        for toolname, prjs in projects.items():
+            for prj in prjs:
+                rows.append(self._project_row(toolname, prj, manifest))
+
+        with self._conn:
+            self._conn.execute('DELETE FROM sdks WHERE root = ?', (root, ))
+            cursor = self._conn.execute(
+                'INSERT INTO sdks (root, manifest, sources, name, version, scanned) VALUES (?, ?, ?, ?, ?, ?)',
+                (root,
+                 manifest.filepath if manifest else None,
+                 json.dumps(_collect_sources(root, projects)),
+                 manifest.sdk_name if manifest else None,
+                 manifest.sdk_version if manifest else None,
+                 time.time()))
+            sdk_id = cursor.lastrowid
+            self._conn.executemany(
+                'INSERT INTO projects (sdk_id, toolchain, board, app, example_id, category, core, prjpath, targets)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(sdk_id, ) + row for row in rows])
+
+        return len(rows)
+
+    @staticmethod
+    def _project_row(toolname, prj, manifest):
+        example = dict()
+        example_id = getattr(prj, 'example_id', None)
+        if manifest and example_id:
+            example = manifest.find_example(example_id) or dict()
+
+        return (
+            toolname,
+            getattr(prj, 'boardname', None),
+            prj.name,
+            example_id,
+            example.get('category'),
+            example.get('device_core'),
+            prj.prjpath.replace('\\', '/'),
+            json.dumps(list(prj.targets)),
+        )
+
+    def query(self, **filters):
+        """Query projects, each filter accepts a value or a list of values.
+
+        Keyword Arguments:
+            sdk_root, sdk_version, board, app, example_id, category, toolchain, core
+
+        Returns:
+            list -- list of dict, keys: sdk_root, sdk_version, toolchain, board,
+                app, example_id, category, core, prjpath, targets
+        """
+        conditions = list()
+        params = list()
+        for key, value in filters.items():
+            if value is None:
+                continue
+            if key not in QUERY_COLUMNS:
+                raise ValueError(f'unknown query field: {key}')
+            if key == 'sdk_root':
+                value = [_norm_root(v) for v in value] if isinstance(value, (list, tuple, set)) \
+                    else _norm_root(value)
+
+            if isinstance(value, (list, tuple, set)):
+                value = list(value)
+                conditions.append('%s IN (%s)' % (QUERY_COLUMNS[key], ', '.join('?' * len(value))))
+                params.extend(value)
+            else:
+                conditions.append('%s = ?' % QUERY_COLUMNS[key])
+                params.append(value)
+
+        sql = ('SELECT sdks.root AS sdk_root, sdks.version AS sdk_version, sdks.manifest AS manifest,'
+               ' projects.toolchain, projects.board, projects.app, projects.example_id, projects.category,'
+               ' projects.core, projects.prjpath, projects.targets'
+               ' FROM projects JOIN sdks ON projects.sdk_id = sdks.id')
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY projects.id'
+
+        results = list()
+        for row in self._conn.execute(sql, params):
+            item = dict(row)
+            item['targets'] = json.loads(item['targets']) if item['targets'] else []
+            results.append(item)
+        return results
+
+    def get_projects(self, **filters):
+        """Query and load the project objects.
+
+        Returns:
+            {dict} -- key: toolchain name, value: a list of Project objects.
+        """
+        projects = dict()
+        for row in self.query(**filters):
+            prj_cls = compilerfactory(row['toolchain']).Project
+            if row['manifest']:
+                prj_cls.SDK_MANIFEST = SDKManifest.load(row['manifest'])
+            try:
+                prj = prj_cls._get_instance(Path(row['prjpath']))
+            except Exception as err:
+                LOGGER.warning('unable to load project %s: %s', row['prjpath'], err)
+                continue
+            if prj:
+                projects.setdefault(row['toolchain'], list()).append(prj)
+
+        return projects
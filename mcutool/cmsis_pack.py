@@ -1,46 +1,173 @@
 
 
+import os
+import copy
+import json
+import hashlib
 import zipfile
 import logging
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 from xml.etree import cElementTree as ET
 from mcutool.exceptions import CmsisPackIssue
+from mcutool.archive import extract_members
 
 
 LOGGER = logging.getLogger(__name__)
 
+DEFAULT_CACHE_DIR = os.path.expanduser('~') + '/.mcutool/packs'
+
+# bump it when the cached data format is changed
+CACHE_VERSION = 1
+
 
 class CMSISPack:
     """CMSIS Pack.
 
     Support to parse basic information from CMSIS Packs.
+
+    The parsed data(devices, memory, algorithm, linker, members) is indexed by
+    the sha1 of pack file, it is shared in process and saved to `cache_dir`, the
+    same pack is never parsed twice.
     """
-    def __init__(self, filepath):
+
+    # process-wide caches
+    # {sha1: parsed data}
+    _INDEX = dict()
+    # {(abspath, size, mtime_ns): sha1}
+    _HASHES = dict()
+
+    @classmethod
+    def file_hash(cls, filepath):
+        """Return sha1 of file content, it is memorized by path, size and mtime."""
+        stat = os.stat(filepath)
+        key = (os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns)
+        digest = cls._HASHES.get(key)
+        if digest is None:
+            sha1 = hashlib.sha1()
+            with open(filepath, "rb") as fobj:
+                for chunk in iter(lambda: fobj.read(1024 * 1024), b""):
+                    sha1.update(chunk)
+            digest = sha1.hexdigest()
+            cls._HASHES[key] = digest
+        return digest
+
+    def __init__(self, filepath, cache_dir=DEFAULT_CACHE_DIR):
         self._name = None
         self._version = None
         self._vendor = None
         self._devices = None
         self._boardname = ""
+        self._requirements = list()
+        self._members = set()
+        self._xmltree = None
+        self._pack_file = None
+        self._part_index = None
+        self._name_index = None
+        self._name_lengths = None
+        self._device_list = None
         self.path = filepath
         self._pack_type = None
-        self.pack_file = zipfile.ZipFile(self.path, mode='r')
-        self.parse_pdsc(self.pack_file)
+        self.cache_dir = cache_dir
+        self.sha1 = self.file_hash(filepath)
 
-    def parse_pdsc(self, packfile):
-        files = packfile.namelist()
-        pdsc = None
+        data = self._load_cache()
+        if data is None:
+            self.parse_pdsc(self.pack_file)
+            self._save_cache()
+        else:
+            self._set_data(data)
+
+    @property
+    def pack_file(self):
+        """Opened zip file of the pack."""
+        if self._pack_file is None:
+            self._pack_file = zipfile.ZipFile(self.path, mode='r')
+        return self._pack_file
+
+    @property
+    def xmltree(self):
+        """Root element of .pdsc, it is loaded from pack on first access."""
+        if self._xmltree is None:
+            self._xmltree = ET.fromstring(self.pack_file.read(self._find_pdsc(self.pack_file.namelist())))
+        return self._xmltree
+
+    def _cache_file(self):
+        return os.path.join(self.cache_dir, f"{self.sha1}.json")
+
+    def _get_data(self):
+        return {
+            "cache_version": CACHE_VERSION,
+            "name": self._name,
+            "vendor": self._vendor,
+            "version": self._version,
+            "pack_type": self._pack_type,
+            "boardname": self._boardname,
+            "devices": self._devices,
+            "requirements": self._requirements,
+            "members": sorted(self._members),
+        }
+
+    def _set_data(self, data):
+        # the data is shared by instances of the same pack, keep a private copy
+        data = copy.deepcopy(data)
+        self._name = data["name"]
+        self._vendor = data["vendor"]
+        self._version = data["version"]
+        self._pack_type = data["pack_type"]
+        self._boardname = data["boardname"]
+        self._devices = data["devices"]
+        self._requirements = data["requirements"]
+        self._members = set(data["members"])
+
+    def _load_cache(self):
+        data = CMSISPack._INDEX.get(self.sha1)
+        if data is None and self.cache_dir:
+            try:
+                with open(self._cache_file()) as fobj:
+                    data = json.load(fobj)
+            except (IOError, ValueError):
+                return None
+
+            if data.get("cache_version") != CACHE_VERSION:
+                return None
+            CMSISPack._INDEX[self.sha1] = data
+        return data
+
+    def _save_cache(self):
+        data = copy.deepcopy(self._get_data())
+        CMSISPack._INDEX[self.sha1] = data
+        if not self.cache_dir:
+            return
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmpfile = self._cache_file() + f".{os.getpid()}.tmp"
+            with open(tmpfile, "w") as fobj:
+                json.dump(data, fobj)
+            os.replace(tmpfile, self._cache_file())
+        except OSError as err:
+            LOGGER.debug("unable to save pack cache: %s", err)
+
+    @staticmethod
+    def _find_pdsc(files):
         for item in files:
             if item.endswith(".pdsc"):
-                pdsc = item
-                break
+                return item
 
-        if pdsc is None:
-            raise CmsisPackIssue("fatal error: could not found .pdsc file in pack!")
+        raise CmsisPackIssue("fatal error: could not found .pdsc file in pack!")
 
-        self.xmltree = ET.fromstring(packfile.read(pdsc))
+    def parse_pdsc(self, packfile):
+        files = packfile.namelist()
+        self._members = set(files)
+        pdsc = self._find_pdsc(files)
+
+        self._xmltree = ET.fromstring(packfile.read(pdsc))
         self._name = self.xmltree.find("name").text
         self._vendor = self.xmltree.find("vendor").text
         self._version = self.xmltree.find("releases/release").attrib["version"]
         self._pack_type = "DFP" if "DFP" in self._name.upper() else "BSP"
+        self._requirements = [dict(node.attrib) for node in self.xmltree.findall("requirements/packages/package")]
         if self._pack_type == 'DFP':
             self._dfp()
         else:
@@ -53,6 +180,7 @@ class CMSISPack:
         # Device Definition Reference:
         # https://www.keil.com/pack/doc/CMSIS/Pack/html/pdsc_family_pg.html#element_memory
 
+        linkers = [dict(linker_node.attrib) for linker_node in self.xmltree.findall(linker_xpath)]
         devices = dict()
         for device_node in self.xmltree.findall(device_xpath):
             device_name = device_node.attrib["Dname"]
@@ -65,10 +193,10 @@ class CMSISPack:
             }
 
             for mem_node in device_node.findall("memory"):
-                device["memory"].append(mem_node.attrib)
+                device["memory"].append(dict(mem_node.attrib))
 
             for algo_node in device_node.findall("algorithm"):
-                algoinfo = algo_node.attrib
+                algoinfo = dict(algo_node.attrib)
                 device["algorithm"].append(algoinfo)
 
                 # RAMstart & RAMsize: If not specified,
@@ -84,8 +212,7 @@ class CMSISPack:
             for var_node in device_node.findall("variant"):
                 device["partnumbers"].append(var_node.attrib["Dvariant"])
 
-            for linker_node in self.xmltree.findall(linker_xpath):
-                device["linker"].append(linker_node.attrib)
+            device["linker"].extend(dict(linker) for linker in linkers)
 
             devices[device_name] = device
 
@@ -121,6 +248,29 @@ class CMSISPack:
     def boardname(self):
         return self._boardname
 
+    @property
+    def members(self):
+        """Set of file names in the pack."""
+        return self._members
+
+    def _build_part_index(self):
+        """Build indexes once per pack:
+
+            - part number -> device order,
+            - device name -> device order,
+            - lengths of device names, to find device names inside a name.
+
+        A smaller order wins, it is the same as iterating the devices.
+        """
+        self._part_index = dict()
+        self._name_index = dict()
+        for order, deviceinfo in enumerate(self._devices.values()):
+            for part in deviceinfo["partnumbers"]:
+                self._part_index.setdefault(part, order)
+            self._name_index.setdefault(deviceinfo["name"], order)
+        self._name_lengths = sorted(set(len(name) for name in self._name_index))
+        self._device_list = list(self._devices.values())
+
     @property
     def partnumbers(self):
         parts = list()
@@ -130,26 +280,39 @@ class CMSISPack:
 
     @property
     def requirements(self):
-        reqs = list()
-        for node in self.xmltree.findall("requirements/packages/package"):
-            reqs.append(node.attrib)
-        return reqs
+        return [dict(req) for req in self._requirements]
 
     def has_partnumbers(self, name):
-        for _, deviceinfo in self._devices.items():
-            if name in deviceinfo["partnumbers"]:
-                return True
-        return False
+        if self._part_index is None:
+            self._build_part_index()
+        return name in self._part_index
 
     def get_device_info_by_name(self, name):
+        """Find device by part number or device name, device name can be a part
+        of the name, like: MIMXRT1062xxxxA in MIMXRT1062xxxxA_cm7.
+        """
         if not self.is_dfp:
             return None
 
-        for _, deviceinfo in self._devices.items():
-            if name in deviceinfo["partnumbers"] or deviceinfo["name"] == name \
-                or deviceinfo["name"] in name:
-                return deviceinfo
-        return None
+        if self._part_index is None:
+            self._build_part_index()
+
+        orders = list()
+        if name in self._part_index:
+            orders.append(self._part_index[name])
+
+        # device names contained in name, exact name is included
+        for length in self._name_lengths:
+            if length > len(name):
+                break
+            for start in range(len(name) - length + 1):
+                order = self._name_index.get(name[start:start + length])
+                if order is not None:
+                    orders.append(order)
+
+        if not orders:
+            return None
+        return self._device_list[min(orders)]
 
     def validate_algorithm(self):
         if "DFP" not in self.name:
@@ -160,7 +323,7 @@ class CMSISPack:
 
             for info in deviceinfo["algorithm"]:
                 name = info.get("name")
-                if name not in self.pack_file.namelist():
+                if name not in self._members:
                     raise CmsisPackIssue(f"Critical: Missing flash algorithm \"{name}\" in pack!")
 
     def validate_linker(self):
@@ -173,16 +336,70 @@ class CMSISPack:
 
             for info in deviceinfo["linker"]:
                 name = info.get("name")
-                if name not in self.pack_file.namelist():
+                if name not in self._members:
                     raise CmsisPackIssue(f"Critical: Missing linker script \"{name}\" in pack!")
 
-    def extract(self, location):
+    def extract(self, location, devices=None, jobs=None):
         """Extract packs to specific location.
 
+        Files are streamed in parallel, and the files already extracted with
+        the same size and CRC are skipped.
+
         Args:
-            location (_type_): _description_
+            location (str): destination directory
+            devices (list): only extract .pdsc, flash algorithms and linker
+                scripts of these devices. Default None, extract all.
+            jobs (int): number of worker threads
+
+        Returns:
+            tuple: (extracted, skipped), number of files
         """
-        self.pack_file.extractall(location)
+        members = None
+        if devices:
+            members = set(name for name in self._members if name.endswith(".pdsc"))
+            for device_name in devices:
+                deviceinfo = self.get_device_info_by_name(device_name)
+                if deviceinfo is None:
+                    raise CmsisPackIssue(f"device {device_name} is not found in pack {self.path}")
+                members.update(info.get("name") for info in deviceinfo["algorithm"] + deviceinfo["linker"])
+            members &= self._members
+
+        return extract_members(self.path, location, members, jobs)
 
     def close(self):
-        self.pack_file.close()
+        if self._pack_file is not None:
+            self._pack_file.close()
+            self._pack_file = None
+
+
+def _validate_pack(filepath, cache_dir):
+    try:
+        pack = CMSISPack(filepath, cache_dir=cache_dir)
+        try:
+            pack.validate_algorithm()
+            pack.validate_linker()
+        finally:
+            pack.close()
+    except (CmsisPackIssue, zipfile.BadZipFile, ET.ParseError, IOError) as err:
+        return str(err)
+    return None
+
+
+def validate_packs(filepaths, jobs=None, cache_dir=DEFAULT_CACHE_DIR):
+    """Validate flash algorithms and linker scripts of packs in parallel.
+
+    Arguments:
+        filepaths: {list} pack file paths.
+        jobs: {int} number of worker processes, default None uses the number of CPUs.
+        cache_dir: {str} pack cache directory.
+
+    Returns:
+        {dict} -- key: pack path, value: error message, None if it is valid.
+    """
+    filepaths = list(filepaths)
+    if jobs == 1 or len(filepaths) < 2:
+        return {path: _validate_pack(path, cache_dir) for path in filepaths}
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(partial(_validate_pack, cache_dir=cache_dir), filepaths)
+        return dict(zip(filepaths, results))
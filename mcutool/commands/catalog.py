@@ -0,0 +1,51 @@
+#
+
+#
+import json
+import click
+
+from mcutool.catalog import ProjectCatalog, DEFAULT_CATALOG
+
+
+@click.command('catalog', short_help='SDK projects catalog')
+@click.argument('sdk_roots', nargs=-1, type=click.Path(exists=True, file_okay=False))
+@click.option('--db', default=DEFAULT_CATALOG, show_default=True, help='catalog database path.')
+@click.option('--refresh', is_flag=True, help='import SDK again even if the catalog is up to date.')
+@click.option('-j', '--jobs', type=int, default=None, help='number of processes to parse projects, 0 means CPUs.')
+@click.option('-b', '--board', multiple=True, help='filter by board name.')
+@click.option('-a', '--app', multiple=True, help='filter by application name.')
+@click.option('-c', '--category', multiple=True, help='filter by example category.')
+@click.option('-t', '--toolchain', multiple=True, help='filter by toolchain name.')
+@click.option('--core', multiple=True, help='filter by device core.')
+@click.option('--sdk-version', multiple=True, help='filter by SDK version.')
+@click.option('--json', 'as_json', is_flag=True, help='dump results as json.')
+def cli(sdk_roots, db, refresh, jobs, board, app, category, toolchain, core, sdk_version, as_json):
+    """Import SDK projects into catalog and query them.
+
+    \b
+    Example:
+        $ mcutool catalog C:/SDK_2.13.0_EVK-MIMXRT1060 -b evkmimxrt1060 -c usb_examples -t mcux
+    """
+    with ProjectCatalog(db) as catalog:
+        for sdk_root in sdk_roots:
+            count = catalog.import_sdk(sdk_root, force=refresh, jobs=jobs)
+            if count is not None:
+                click.echo(f'Imported {count} projects from {sdk_root}')
+
+        rows = catalog.query(
+            sdk_root=list(sdk_roots) or None,
+            board=list(board) or None,
+            app=list(app) or None,
+            category=list(category) or None,
+            toolchain=list(toolchain) or None,
+            core=list(core) or None,
+            sdk_version=list(sdk_version) or None)
+
+    if as_json:
+        click.echo(json.dumps(rows, indent=2))
+        return
+
+    for row in rows:
+        click.echo("{toolchain:<8} {board:<20} {app:<30} {prjpath}".format(
+            toolchain=row['toolchain'], board=str(row['board']), app=str(row['app']), prjpath=row['prjpath']))
+    click.echo(f'Total {len(rows)} projects')
@@ -0,0 +1,29 @@
+#
+
+#
+import click
+
+from mcutool.sdk_manifest import merge_manifests, merge_split_manifest
+
+
+@click.command('merge_mf', short_help='merge split SDK manifest')
+@click.argument('manifest', type=click.Path(exists=True, dir_okay=False))
+@click.argument('sdk_root', type=click.Path(exists=True, file_okay=False))
+@click.option('-o', '--output', type=click.Path(dir_okay=False), help='merged manifest path.')
+@click.option('--ide', 'ide_exe', type=click.Path(exists=True, dir_okay=False),
+    help='merge by MCUXpressoIDE executable instead of the built-in merger.')
+def cli(manifest, sdk_root, output, ide_exe):
+    """Merge split manifest and its sub-manifests into one manifest file.
+
+    \b
+    Example:
+        $ mcutool merge_mf core/manifests/EVK-MIMXRT1060_manifest_v3_10.xml C:/mcux-sdk
+    """
+    if ide_exe:
+        if output:
+            raise click.UsageError('--output is not supported by MCUXpressoIDE merging.')
+        merged = merge_manifests(ide_exe, manifest, sdk_root)
+    else:
+        merged = merge_split_manifest(manifest, sdk_root, output)
+
+    click.echo(f'Merged manifest: {merged}')
@@ -94,9 +94,29 @@ class Project(ProjectBase):
         self._name = None
         self._targets = dict()
         self._conf = dict()
-        self.cproject = None
+        self._cproject = None
+        self._cproject_pending = False
         if self.prjpath.endswith('.project') or self.prjpath.endswith('.cproject'):
-            self.parse(self.prjpath)
+            # .cproject is parsed on first access of targets
+            self._name = self.parse_project(os.path.join(self.prjdir, '.project'))
+            self._cproject_pending = True
+
+    def _ensure_cproject(self):
+        """Parse .cproject if it is deferred."""
+        if self._cproject_pending:
+            self._cproject_pending = False
+            self._conf = self.parse_cproject(os.path.join(self.prjdir, '.cproject'))
+            self._targets = self._conf.keys()
+
+    @property
+    def cproject(self):
+        """Root element of .cproject"""
+        self._ensure_cproject()
+        return self._cproject
+
+    @cproject.setter
+    def cproject(self, value):
+        self._cproject = value
 
     def parse_project(self, path):
         """ Parse .project """
@@ -134,9 +154,25 @@ class Project(ProjectBase):
 
         cpath = os.path.join(self.prjdir, '.cproject')
         self._name = self.parse_project(path)
+        self._cproject_pending = False
         self._conf = self.parse_cproject(cpath)
         self._targets = self._conf.keys()
 
+    def _get_state(self):
+        state = super(Project, self)._get_state()
+        # xml elements are not transferred, parse again when it is required
+        if self._cproject is not None:
+            state['_cproject'] = None
+            state['_cproject_pending'] = True
+        state['_targets'] = list(self._targets)
+        return state
+
+    @property
+    def targets(self):
+        """Get targets"""
+        self._ensure_cproject()
+        return list(self._targets)
+
     @property
     def name(self):
         """Return the application name
@@ -156,4 +192,5 @@ class Project(ProjectBase):
             "Release": "release_output_dir/output_name",
         }
         """
+        self._ensure_cproject()
         return self._conf
@@ -12,8 +12,42 @@ from mcutool.sdk_manifest import SDKManifest
 from mcutool.exceptions import ProjectNotFound, ProjectParserError
 
 
+def read_example_attrib(path):
+    """Read attributes of the <example> node in example xml.
+
+    The parsing is stopped once the node is found, so the rest of
+    the file is not loaded.
+
+    Returns:
+        dict or None
+    """
+    depth = 0
+    parser = ET.XMLPullParser(events=("start", "end"))
+    with open(path, "rb") as fobj:
+        while True:
+            chunk = fobj.read(2048)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            for event, elem in parser.read_events():
+                if event == "end":
+                    depth -= 1
+                    continue
+
+                depth += 1
+                if depth == 2 and elem.tag == "example":
+                    return dict(elem.attrib)
+
+    return None
+
+
 class Project(eclipse.Project):
-    """MCUXpresso SDK and projects parser tool."""
+    """MCUXpresso SDK and projects parser tool.
+
+    The project object is lazy: only the identity of the example is read when
+    it is created, example xml, .cproject and build properties are parsed on
+    first access.
+    """
 
     PRJ_GLOB_PATTERN = ('*.xml', ".cproject")
 
@@ -35,8 +69,8 @@ class Project(eclipse.Project):
         self._sdkmanifest = Project.SDK_MANIFEST
         self._example_id = None
         self._example_xml = None
-        self._nature = 'org.eclipse.cdt.core.cnature'
-        self.build_properties = None
+        self._nature = None
+        self._build_properties = None
 
         super(Project, self).__init__(prjpath, **kwargs)
         # eclipse project
@@ -44,9 +78,6 @@ class Project(eclipse.Project):
 
         if self._is_package:
             self._load_from_sdk_package(prjpath)
-            self._properties_init()
-            ET.register_namespace("ksdk", "http://nxp.com/ksdk/2.0/ksdk_manifest_v3.0.xsd")
-            self._example_xml = ET.parse(prjpath)
         else:
             prj_root = Path(prjpath).parent
             with open(prj_root / ".project" ) as fobj:
@@ -57,6 +88,15 @@ class Project(eclipse.Project):
         if self.sdkmanifest and not self.is_enabled:
             raise ProjectNotFound("Not enabled in SDK Manifest: %s" % self.sdkmanifest)
 
+    @classmethod
+    def manifest_files(cls, manifest, example):
+        """Example xml of the example if it is enabled for mcux."""
+        if manifest.manifest_version != "3.1" and "mcux" not in example.attrib.get("toolchain", ""):
+            return []
+
+        xml_name = example.example_xml or "%s.xml" % example.attrib.get("name")
+        return ["%s/%s" % (example.attrib["path"], xml_name)]
+
     @property
     def is_enabled(self):
         """Identify the example if is enabled(SDK package only).
@@ -74,6 +114,11 @@ class Project(eclipse.Project):
 
         return "mcux" in example_info.get("toolchain", "")
 
+    @property
+    def example_id(self):
+        """Example id in SDK manifest(SDK package only)."""
+        return self._example_id
+
     @property
     def sdkmanifest(self):
         """Getter for SDKMainfest object"""
@@ -91,6 +136,57 @@ class Project(eclipse.Project):
         self._sdkmanifest = value
 
 
+    @property
+    def board(self):
+        """Board id saved in .cproject"""
+        self._ensure_cproject()
+        return self._board
+
+    @board.setter
+    def board(self, value):
+        self._board = value
+
+    @property
+    def build_properties(self):
+        """Build properties, it is initialized on first access."""
+        if self._build_properties is None and self._is_package:
+            self._properties_init()
+        return self._build_properties
+
+    @build_properties.setter
+    def build_properties(self, value):
+        self._build_properties = value
+
+    @property
+    def example_xml(self):
+        """ElementTree of the example xml, it is loaded on first access."""
+        if self._example_xml is None and self._is_package:
+            ET.register_namespace("ksdk", "http://nxp.com/ksdk/2.0/ksdk_manifest_v3.0.xsd")
+            self._example_xml = ET.parse(self.prjpath)
+        return self._example_xml
+
+    def clear_cache(self):
+        """Drop parsed example xml and build properties, and reload SDK manifest if it is changed."""
+        self._example_xml = None
+        self._build_properties = None
+        self._nature = None
+        if self._sdkmanifest and os.path.isfile(self._sdkmanifest.filepath):
+            self._sdkmanifest = SDKManifest.load(self._sdkmanifest.filepath)
+
+    def _get_state(self):
+        state = super(Project, self)._get_state()
+        state['_example_xml'] = None
+        if self._sdkmanifest:
+            state['_sdkmanifest'] = self._sdkmanifest.filepath
+        return state
+
+    def _set_state(self, state):
+        manifest = state.get('_sdkmanifest')
+        if isinstance(manifest, str):
+            state = dict(state)
+            state['_sdkmanifest'] = SDKManifest.load(manifest)
+        super(Project, self)._set_state(state)
+
     @property
     def is_package(self):
         """Package project or standard eclipse project"""
@@ -122,31 +218,25 @@ class Project(eclipse.Project):
 
         self._targets = self._conf.keys()
         try:
-            xmlroot = ET.parse(path).getroot()
-            example_node = xmlroot.find('./example')
+            example_attrib = read_example_attrib(path)
 
-            if example_node is None:
+            if example_attrib is None:
                 raise ProjectNotFound(f'Unable to find <example> node. {path}')
 
         except (IOError, ValueError) as err:
             raise ProjectNotFound(f'parse xml error: {err} ,path: {path}')
 
-        self._example_id = example_node.attrib.get('id')
+        self._example_id = example_attrib.get('id')
         # in some situation, the name attribute is not too simple
         # that is not full project name for mcux, we have to use a workaround
         # to get project name from path.
-        example_name = example_node.attrib.get('name')
+        example_name = example_attrib.get('name')
         xml_name = os.path.basename(path).replace('.xml', '')
         if example_name in xml_name:
             self._name = example_name
         else:
             self._name = xml_name
 
-        try:
-            self._nature = example_node.find('projects/project[@nature]').attrib.get('nature')
-        except:
-            pass
-
         if not self._example_id:
             raise ProjectParserError(f'None id in exmaple node! {self.prjpath}')
 
@@ -303,7 +393,7 @@ class Project(eclipse.Project):
         """
         # Get the element including all macro defines
         # Format: <option id="gnu.c.compiler.option.preprocessor.def.symbols"><value>CPU_LPC845M301JBD48</value></option>
-        cc_defines = self._example_xml.getroot()\
+        cc_defines = self.example_xml.getroot()\
             .find(".//option[@id='gnu.c.compiler.option.preprocessor.def.symbols']")
         assert isinstance(cc_defines, ET.Element)
         return cc_defines
@@ -336,7 +426,7 @@ class Project(eclipse.Project):
             logging.debug("++macro '%s' in mcux", new)
 
         if changed_flag:
-            self._example_xml.write(self.prjpath, xml_declaration=True,
+            self.example_xml.write(self.prjpath, xml_declaration=True,
                                     method='xml', encoding='UTF-8')
 
     def del_defines(self, old, target=None):
@@ -354,12 +444,20 @@ class Project(eclipse.Project):
                 logging.debug("--macro '%s' in mcux", old)
 
         if changed_flag:
-            self._example_xml.write(self.prjpath, xml_declaration=True,
+            self.example_xml.write(self.prjpath, xml_declaration=True,
                                     method='xml', encoding='UTF-8')
 
     @property
     def nature(self):
         """Retrun used nature"""
+        if self._nature is None:
+            self._nature = 'org.eclipse.cdt.core.cnature'
+            if self._is_package:
+                try:
+                    self._nature = self.example_xml.getroot()\
+                        .find('./example/projects/project[@nature]').attrib.get('nature')
+                except:
+                    pass
         return self._nature
 
     @property
@@ -369,6 +467,7 @@ class Project(eclipse.Project):
         Returns:
             list -- a list of targets
         """
+        self._ensure_cproject()
         if self._targets:
             return list(self._targets)
 
@@ -5,7 +5,10 @@
 import abc
 import os
 import re
+import importlib
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from mcutool.sdk_manifest import SDKManifest
 from mcutool.exceptions import ProjectNotFound
 from mcutool.exceptions import InvalidTarget
 
@@ -21,6 +24,77 @@ def find_files(dir, patterns):
 
     return files
 
+
+def _parse_project(task):
+    """Worker of the process pool to parse a project file.
+
+    Returns:
+        ProjectDescriptor or None
+    """
+    module, classname, filepath, manifest_path = task
+    cls = getattr(importlib.import_module(module), classname)
+    if manifest_path:
+        cls.SDK_MANIFEST = SDKManifest.load(manifest_path)
+
+    try:
+        ins = cls._get_instance(Path(filepath))
+    except Exception:
+        return None
+
+    if ins:
+        return ins.to_descriptor()
+    return None
+
+
+def parse_projects(tasks, jobs=None):
+    """Parse a list of candidate project files.
+
+    Arguments:
+        tasks: {list} list of tuple (project class, filepath).
+        jobs: {int} number of worker processes, 0 means the number of CPUs.
+            Default None parse files in current process.
+
+    Returns:
+        [Project or None]: parsed projects, in the same order of tasks.
+    """
+    if jobs is None or jobs == 1 or len(tasks) < 2:
+        results = list()
+        for cls, filepath in tasks:
+            try:
+                results.append(cls._get_instance(Path(filepath)))
+            except:
+                results.append(None)
+        return results
+
+    workers = jobs or os.cpu_count()
+    payload = list()
+    for cls, filepath in tasks:
+        manifest_path = cls.SDK_MANIFEST.filepath if cls.SDK_MANIFEST else None
+        payload.append((cls.__module__, cls.__name__, str(filepath), manifest_path))
+
+    chunksize = max(1, len(payload) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        descriptors = list(executor.map(_parse_project, payload, chunksize=chunksize))
+
+    return [ProjectBase.from_descriptor(desc) if desc else None for desc in descriptors]
+
+
+class ProjectDescriptor(object):
+    """A lightweight and picklable description of a parsed project.
+
+    It is used to pass the projects between processes,
+    use ProjectBase.from_descriptor() to turn it back to project object.
+    """
+
+    __slots__ = ("module", "classname", "prjpath", "state")
+
+    def __init__(self, module, classname, prjpath, state):
+        self.module = module
+        self.classname = classname
+        self.prjpath = prjpath
+        self.state = state
+
+
 class ProjectBase(object):
     """
     Abstract class representing a basic project.
@@ -50,6 +124,20 @@ class ProjectBase(object):
 
         return patterns
 
+    @classmethod
+    def manifest_files(cls, manifest, example):
+        """Return project files of an example in SDK manifest, relative to SDK root.
+
+        Arguments:
+            manifest: {SDKManifest} manifest object.
+            example: {ExampleRecord} example record in the manifest.
+
+        Returns:
+            list or None: None means this toolchain cannot be resolved from
+            manifest, and its projects have to be searched in directories.
+        """
+        return None
+
     @classmethod
     def _get_instance(cls, filepath):
         """From file path."""
@@ -60,11 +148,13 @@ class ProjectBase(object):
         return
 
     @classmethod
-    def fromdir(cls, path):
+    def fromdir(cls, path, jobs=None):
         """Find projects from directory or file.
 
         Arguments:
             path: {str} directory.
+            jobs: {int} number of worker processes to parse projects, 0 means
+                the number of CPUs. Default None parse in current process.
 
         Returns:
             [Project]: a list of projects.
@@ -81,16 +171,35 @@ class ProjectBase(object):
                 pass
 
         else:
-            for filepath in find_files(search_path, cls.get_ptrs()):
-                try:
-                    ins = cls._get_instance(filepath)
-                    if ins:
-                        prjs.append(ins)
-                except:
-                    pass
+            tasks = [(cls, filepath) for filepath in find_files(search_path, cls.get_ptrs())]
+            prjs = [ins for ins in parse_projects(tasks, jobs) if ins]
 
         return prjs
 
+    @staticmethod
+    def from_descriptor(descriptor):
+        """Create project object from a ProjectDescriptor."""
+
+        module = importlib.import_module(descriptor.module)
+        cls = getattr(module, descriptor.classname)
+        prj = cls.__new__(cls)
+        prj._set_state(descriptor.state)
+        return prj
+
+    def to_descriptor(self):
+        """Return a ProjectDescriptor of this project."""
+
+        return ProjectDescriptor(self.__class__.__module__,
+            self.__class__.__name__, self.prjpath, self._get_state())
+
+    def _get_state(self):
+        """Return a picklable dict of project attributes."""
+        return dict(self.__dict__)
+
+    def _set_state(self, state):
+        """Restore project attributes from _get_state()."""
+        self.__dict__.update(state)
+
     @classmethod
     def frompath(cls, path):
         """Find one project instance from a given file path or directory.
@@ -167,6 +276,11 @@ class ProjectBase(object):
             .format(input_target, self.prjpath, str(self.targets))
         raise InvalidTarget(msg)
 
+    def clear_cache(self):
+        """Drop the data parsed lazily from project files, it is parsed again
+        on next access. Nothing is cached by default.
+        """
+
     @property
     def idename(self):
         """Name of toolchain/ide"""
@@ -0,0 +1,120 @@
+#
+
+#
+
+import socket
+import logging
+import threading
+
+from mcutool.exceptions import GDBServerStartupError
+
+LOGGER = logging.getLogger(__name__)
+
+
+def can_connect(port, host="127.0.0.1", timeout=1.0):
+    """Test a TCP connection to the port."""
+    try:
+        with socket.create_connection((host, int(port)), timeout=timeout):
+            return True
+    except (OSError, socket.error):
+        return False
+
+
+class GDBServerSupervisor(object):
+    """Supervise a long-lived gdbserver of a board.
+
+    The gdbserver is started once in persistent mode (pyocd --persist, J-Link
+    without -singlerun), gdb clients attach to it one by one. Before each
+    attach, the server is checked by `ensure()`, it is restarted if the process
+    exited or the port does not accept connection.
+
+    Example:
+        >>> supervisor = GDBServerSupervisor(board.debugger)
+        >>> proc = supervisor.ensure()
+        >>> ... attach gdb to localhost:{board.gdbport}
+        >>> supervisor.stop()
+    """
+
+    def __init__(self, debugger, max_restarts=2, **kwargs):
+        """
+        Arguments:
+            debugger {DebuggerBase} -- debugger to start gdbserver
+            max_restarts {int} -- max restart attempts in one `ensure()`
+
+        Keyword Arguments:
+            kwargs are passed to debugger.start_gdbserver().
+        """
+        self.debugger = debugger
+        self.max_restarts = max_restarts
+        self.kwargs = kwargs
+        self.proc = None
+        self.port = None
+        self.restarts = 0
+        self._lock = threading.RLock()
+
+    @property
+    def is_alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def is_healthy(self):
+        """The process is running and the port accepts connection."""
+        return self.is_alive and can_connect(self.port)
+
+    def start(self, **kwargs):
+        """Start gdbserver and wait for it is ready."""
+        options = dict(self.kwargs)
+        options.update(kwargs)
+        options["persist"] = True
+
+        with self._lock:
+            self.proc = self.debugger.start_gdbserver(**options)
+            self.port = self.debugger.gdbserver_port
+            if not self.debugger.wait_gdbserver_ready(self.proc, self.port):
+                output = self.proc.get_output()
+                self.stop()
+                raise GDBServerStartupError(f"gdbserver start failure, console output:\n{output}")
+
+            LOGGER.info("persistent gdbserver is ready, pid: %s, port: %s", self.proc.pid, self.port)
+            return self.proc
+
+    def ensure(self, **kwargs):
+        """Return a healthy gdbserver process, restart it if it is not healthy.
+
+        Raises:
+            GDBServerStartupError -- gdbserver cannot be started
+        """
+        with self._lock:
+            if self.is_healthy():
+                # gdb client will connect to the same port
+                if self.debugger._board:
+                    self.debugger._board.gdbport = self.port
+                return self.proc
+
+            error = None
+            for attempt in range(self.max_restarts + 1):
+                if self.proc is not None:
+                    LOGGER.warning("gdbserver is not healthy, restarting (attempt %s)", attempt + 1)
+                    self.restarts += 1
+                    self.stop()
+                try:
+                    return self.start(**kwargs)
+                except GDBServerStartupError as err:
+                    error = err
+
+            raise error
+
+    def stop(self):
+        """Terminate gdbserver."""
+        with self._lock:
+            proc, self.proc = self.proc, None
+            if proc is None:
+                return
+
+            if proc.poll() is None:
+                proc.terminate()
+                try:
+                    proc.wait(timeout=5)
+                except Exception:
+                    proc.kill()
+                    proc.wait()
+            LOGGER.debug("gdbserver stopped, exit code: %s", proc.returncode)
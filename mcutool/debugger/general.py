@@ -3,14 +3,15 @@
 #
 
 import os
+import re
 import time
 import logging
 import shutil
 import subprocess
 import threading
 import socket
-import errno
 import shlex
+import tempfile
 from types import MethodType
 from contextlib import closing
 
@@ -23,7 +24,11 @@ from pexpect.popen_spawn import PopenSpawn
 from mcutool.compilers import compilerfactory
 from mcutool.compilerbase import CompilerBase
 from mcutool.gdb_session import GDBSession
+from mcutool.gdb_mi import GDBMISession, GDBMITimeout
 from mcutool.exceptions import GDBServerStartupError
+from mcutool.lease import HOST_LEASES
+from mcutool.util import run_command
+from mcutool.debugger.gdbserver import GDBServerSupervisor, can_connect
 
 
 
@@ -55,6 +60,23 @@ class DebuggerBase(CompilerBase):
 
     STAGES = ['before_load']
 
+    # gdb output means flashing is failed
+    GDB_ERROR_MESSAGES = (
+        "No connection could be made",
+        "Target disconnected",
+        "Connection timed out",
+        '"monitor" command not supported by this target',
+        "Error finishing flash operation",
+        "Load failed",
+    )
+
+    # gdbserver console line which means it is listening
+    GDBSERVER_READY_PATTERNS = (
+        r"[Ll]istening",
+        r"Waiting for GDB connection",
+        r"started on port",
+    )
+
     @classmethod
     def guess_image_format(cls, filepath) -> str:
         """Guess image format by it's extension.
@@ -74,8 +96,16 @@ class DebuggerBase(CompilerBase):
         self.gdbpath = kwargs.get("gdbpath", "")
         self.version = kwargs.get("version", "unknown")
         self._gdbserver = None
+        self._gdbserver_port = None
+        self._supervisor = None
         self._board = None
         self._callback_map = {"before_load": None}
+        # keep gdbserver running and reuse it for programming
+        self.persistent_gdbserver = kwargs.get("persistent_gdbserver", False)
+        # drive gdb by GDB/MI, commands are pipelined
+        self.gdb_mi = kwargs.get("gdb_mi", False)
+        # flash by `gdb -batch -x script`
+        self.gdb_batch = kwargs.get("gdb_batch", True)
 
     def __str__(self):
         return f"<Debugger: name={self.name}, version={self.version}>"
@@ -129,6 +159,64 @@ class DebuggerBase(CompilerBase):
         """
         raise NotImplementedError(f"{self.name}: not support")
 
+    @property
+    def gdbserver_port(self):
+        """Listen port of the latest started gdbserver."""
+        return self._gdbserver_port
+
+    @property
+    def gdbserver_supervisor(self):
+        """Supervisor of the persistent gdbserver, it is created on first access."""
+        if self._supervisor is None:
+            self._supervisor = GDBServerSupervisor(self)
+        return self._supervisor
+
+    def _lease_gdbserver_port(self):
+        """Lease a free gdbserver port, the previous port of this debugger is released."""
+        if self._gdbserver_port:
+            HOST_LEASES.release_port(self._gdbserver_port)
+        return HOST_LEASES.lease_port()
+
+    def stop_gdbserver(self):
+        """Stop the persistent gdbserver if it is running."""
+        if self._supervisor is not None:
+            self._supervisor.stop()
+
+    def wait_gdbserver_ready(self, gdbserver_proc, port, timeout=30):
+        """Wait for gdbserver is ready to accept gdb connection.
+
+        Arguments:
+            gdbserver_proc {Popen} -- process returned by start_gdbserver
+            port {int} -- gdbserver listen port
+            timeout {int} -- max seconds to wait
+        """
+        return wait_for_gdbserver(gdbserver_proc, port, timeout)
+
+    def flash_crc(self, ranges):
+        """Return crc32 of flash content.
+
+        Arguments:
+            ranges {list} -- [(address, size)]
+
+        Returns:
+            list -- crc32 of each range
+        """
+        raise NotImplementedError(f"{self.name}: not support")
+
+    def verify_flash(self, crcs):
+        """Verify flash content with (address, size, crc32) of image segments.
+
+        Return False if it does not match or the debugger cannot read flash.
+        """
+        try:
+            actual = self.flash_crc([(addr, size) for addr, size, _ in crcs])
+        except NotImplementedError:
+            return False
+        except Exception:
+            logging.exception("unable to read flash crc")
+            return False
+        return actual == [crc for _, _, crc in crcs]
+
     def read32(self, addr):
         """read a 32-bit word"""
         raise NotImplementedError(f"{self.name}: not support")
@@ -137,6 +225,51 @@ class DebuggerBase(CompilerBase):
         """write a 32-bit word"""
         raise NotImplementedError(f"{self.name}: not support")
 
+    def read_memory(self, addr, size):
+        """Read a block of memory in one connection.
+
+        Returns:
+            bytes -- memory content
+        """
+        raise NotImplementedError(f"{self.name}: not support")
+
+    def write_memory(self, addr, data):
+        """Write bytes to memory in one connection."""
+        raise NotImplementedError(f"{self.name}: not support")
+
+    def read_words(self, addrs):
+        """Read 32-bit words at scattered addresses.
+
+        Debuggers should override it to read all words in one round-trip,
+        the default implementation calls read32 for each address.
+
+        Returns:
+            list -- word values in the order of addrs
+        """
+        return [self.read32(addr) for addr in addrs]
+
+    def write_words(self, items):
+        """Write 32-bit words at scattered addresses.
+
+        Arguments:
+            items {list|dict} -- [(addr, value)] or {addr: value}
+        """
+        if isinstance(items, dict):
+            items = items.items()
+        for addr, value in items:
+            self.write32(addr, value)
+
+    def read_registers(self, names=None):
+        """Read a snapshot of core registers, the core should be halted.
+
+        Arguments:
+            names {list} -- register names, default all general registers
+
+        Returns:
+            dict -- {name: value}
+        """
+        raise NotImplementedError(f"{self.name}: not support")
+
     def start_gdbserver(self, background=True, gdbserver_cmdline=None, **kwargs):
         """Start a gdbserver in background.
 
@@ -158,13 +291,14 @@ class DebuggerBase(CompilerBase):
 
         # On Linux, port cannot be released even if current process
         # is terminted, to avoid exception "Address already in use";
-        # Find and use free port from socket.
+        # Lease a free port, it is not used by other processes on the host.
         if not port or os.name != "nt":
-            port = find_free_port()
+            port = self._lease_gdbserver_port()
 
         if self._board:
             self._board.gdbport = port
 
+        self._gdbserver_port = port
         kwargs["port"] = port
         gdbserver_cmd = gdbserver_cmdline or self.get_gdbserver(**kwargs)
         logging.info("gdbserver: %s", gdbserver_cmd)
@@ -190,23 +324,27 @@ class DebuggerBase(CompilerBase):
 
         setattr(self._gdbserver, "console", console)
         setattr(self._gdbserver, "get_output", MethodType(get_output, self._gdbserver))
+        # it is set when the ready line is printed or stdout is closed
+        setattr(self._gdbserver, "ready_event", threading.Event())
+        setattr(self._gdbserver, "exit_event", threading.Event())
+
+        ready_pattern = re.compile("|".join(self.GDBSERVER_READY_PATTERNS))
 
         def stdout_reader(process):
-            for line in iter(process.stdout.readline, b''):
-                if process.poll() is not None:
-                    break
-                if line:
-                    self._gdbserver.console.append(line)
+            try:
+                for line in iter(process.stdout.readline, ''):
+                    process.console.append(line)
+                    if not process.ready_event.is_set() and ready_pattern.search(line):
+                        process.ready_event.set()
+            finally:
+                process.exit_event.set()
+                process.ready_event.set()
 
-        time.sleep(0.3)
         # To resolve large output from subprocess PIPE,
         # use a background thread to continues read data from stdout.
-        reader_thread = threading.Thread(target=stdout_reader, args=(self._gdbserver, ))
+        reader_thread = threading.Thread(target=stdout_reader, args=(self._gdbserver, ), daemon=True)
         reader_thread.start()
 
-        if self._gdbserver.poll() is not None:
-            logging.error('gdb server start failed:\n %s', self._gdbserver.returncode)
-
         return self._gdbserver
 
     def list_connected_devices(self):
@@ -228,10 +366,27 @@ class DebuggerBase(CompilerBase):
             gdb_commands - {str}: gdb init commands to control gdb behaviour.
             timeout - {int}: set timeout for gdb & gdb server process. default 200 seconds.
 
+        When persistent gdbserver is enabled, the supervised gdbserver is reused
+        and it keeps running after gdb client disconnects.
+
+        By default gdb runs the commands in batch mode, unless `batch` is False,
+        MI is enabled or before_load callback is registered, which needs an
+        interactive session.
+
         Returns:
             tuple --- (returncode, console-output)
         """
+        batch = kwargs.pop("batch", None)
+        if batch is None:
+            batch = self.gdb_batch and not kwargs.get("mi", self.gdb_mi) \
+                and not self._callback_map.get("before_load")
+        if batch:
+            kwargs.pop("mi", None)
+            return self.gdb_batch_program(filename, gdbserver_cmdline, gdb_commands,
+                                          board, timeout, **kwargs)
+
         timer = None
+        persistent = self._use_persistent_gdbserver(gdbserver_cmdline, kwargs)
         try:
             session, timer, server_output = self._start_debug_session(filename,
                 gdbserver_cmdline, gdb_commands, board, timeout, **kwargs)
@@ -239,13 +394,16 @@ class DebuggerBase(CompilerBase):
             if not session:
                 return 1, server_output
 
+            session.close()
+            if persistent:
+                return 0, server_output + session.console_output
+
             # gdb client disconnect the connection,
             # and gdbsever will automaticlly close
-            session.close()
             session.gdb_server_proc.wait()
 
-        except GDBServerStartupError:
-            return 1, ""
+        except GDBServerStartupError as err:
+            return 1, str(err)
 
         finally:
             # Stop timeout timer when communicate call returns.
@@ -260,12 +418,115 @@ class DebuggerBase(CompilerBase):
         retcode = session.gdb_server_proc.returncode
         return retcode, output
 
+    def gdb_batch_program(self, filename, gdbserver_cmdline=None, gdb_commands=None,
+            board=None, timeout=200, **kwargs):
+        """Flash image with one `gdb -batch -x <script>` process.
+
+        The rendered gdb commands are written to a script, gdb stops at the
+        first failed command. Output is parsed once when gdb exits, and the
+        timeout is applied to the gdb process.
+
+        Returns:
+            tuple --- (returncode, console-output)
+        """
+        persistent = self._use_persistent_gdbserver(gdbserver_cmdline, kwargs)
+        kwargs.pop("persistent")
+        if board is None:
+            board = self._board
+
+        if not self.gdbexe:
+            raise ValueError("Invalid gdb executable")
+
+        if board is None:
+            raise ValueError('no board is associated with debugger!')
+
+        start = time.time()
+        try:
+            gdbserver_proc, output_offset = self._prepare_gdbserver(board, gdbserver_cmdline, persistent, **kwargs)
+        except GDBServerStartupError as err:
+            return 1, str(err)
+
+        gdb_cmds_template = gdb_commands or board.gdb_commands or self.default_gdb_commands
+        script = tempfile.NamedTemporaryFile(mode="w", suffix=".gdbinit", delete=False)
+        script.write(render_gdbinit(gdb_cmds_template, board))
+        script.close()
+
+        gdb_cmd_line = GDBSession.get_gdb_commands(self.gdbexe, filename)
+        if os.name == "nt":
+            gdb_cmd_line = gdb_cmd_line.replace("\\", "\\\\")
+        # script path is passed as one argument, it may contain spaces
+        gdb_cmd_line = shlex.split(gdb_cmd_line) + ["-batch", "-x", script.name]
+        try:
+            logging.info(" ".join(gdb_cmd_line))
+            retcode, gdb_output = run_command(gdb_cmd_line, stdout="capture", timeout=timeout)
+        finally:
+            os.remove(script.name)
+
+        gdb_output = gdb_output or ""
+        errors = [msg for msg in self.GDB_ERROR_MESSAGES if msg in gdb_output]
+        if retcode != 0 or errors:
+            logging.error("gdb batch failed, exit code: %s\n%s", retcode, gdb_output)
+            retcode = 1
+            if not persistent and gdbserver_proc.poll() is None:
+                gdbserver_proc.terminate()
+
+        if not persistent:
+            # gdb client disconnect the connection,
+            # and gdbsever will automaticlly close
+            try:
+                gdbserver_proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                gdbserver_proc.kill()
+                gdbserver_proc.wait()
+            if retcode == 0:
+                retcode = gdbserver_proc.returncode
+            logging.debug("gdbserver exit code: %s", gdbserver_proc.returncode)
+
+        logging.debug("gdb batch time used: %.2f", time.time() - start)
+        server_output = "".join(gdbserver_proc.console[output_offset:])
+        return retcode, server_output + gdb_output
+
+    def _prepare_gdbserver(self, board, gdbserver_cmdline, persistent, **kwargs):
+        """Start gdbserver, or attach to the persistent gdbserver.
+
+        Returns:
+            tuple -- (gdbserver process, offset of its console output of this session)
+        """
+        if persistent:
+            gdbserver_proc = self.gdbserver_supervisor.ensure(**kwargs)
+            logging.debug(f"attach to persistent gdbserver, pid: {gdbserver_proc.pid}, port: {board.gdbport}.")
+            return gdbserver_proc, len(gdbserver_proc.console)
+
+        gdbserver_proc = self.start_gdbserver(gdbserver_cmdline=gdbserver_cmdline, **kwargs)
+        if not self.wait_gdbserver_ready(gdbserver_proc, board.gdbport):
+            if gdbserver_proc.poll() is None:
+                gdbserver_proc.kill()
+
+            gdbserver_proc.wait()
+            output = gdbserver_proc.get_output()
+            logging.error(f"gdbserver cannot start, console output: \n {output}")
+            raise GDBServerStartupError(f"gdbserver start failure, console output:\n{output}")
+
+        logging.debug(f"gdbserver is ready, pid: {gdbserver_proc.pid}, port: {board.gdbport}.")
+        return gdbserver_proc, 0
+
+    def _use_persistent_gdbserver(self, gdbserver_cmdline, kwargs):
+        """Custom gdbserver command line is always started for one session."""
+        persistent = kwargs.pop("persistent", None)
+        if persistent is None:
+            persistent = self.persistent_gdbserver or getattr(self._board, "persistent_gdbserver", False)
+        kwargs["persistent"] = bool(persistent and not gdbserver_cmdline)
+        return kwargs["persistent"]
+
     def _start_debug_session(self, filename=None, gdbserver_cmdline=None, gdb_commands=None,
             board=None, timeout=None, **kwargs):
         """
         Start a gdb session.
         Return a attached gdb session object.
         """
+        persistent = self._use_persistent_gdbserver(gdbserver_cmdline, kwargs)
+        kwargs.pop("persistent")
+        use_mi = kwargs.pop("mi", self.gdb_mi)
 
         if board is None:
             board = self._board
@@ -281,17 +542,7 @@ class DebuggerBase(CompilerBase):
 
         start = time.time()
 
-        gdbserver_proc = self.start_gdbserver(gdbserver_cmdline=gdbserver_cmdline, **kwargs)
-
-        if os.name == "nt" and not validate_port_is_ready(gdbserver_proc, board.gdbport):
-            if gdbserver_proc.poll() is None:
-                gdbserver_proc.kill()
-
-            gdbserver_proc.wait()
-            logging.error(f"gdbserver cannot start, console output: \n {gdbserver_proc.get_output()}")
-            raise GDBServerStartupError("gdbserver start failure")
-
-        logging.debug(f"gdbserver is ready, pid: {gdbserver_proc.pid}, port: {board.gdbport}.")
+        gdbserver_proc, output_offset = self._prepare_gdbserver(board, gdbserver_cmdline, persistent, **kwargs)
 
         gdb_cmds_template = gdb_commands or board.gdb_commands or self.default_gdb_commands
         gdbcommands = render_gdbinit(gdb_cmds_template, board)
@@ -299,7 +550,7 @@ class DebuggerBase(CompilerBase):
         # start gdb client
         gdb_cmd_line = GDBSession.get_gdb_commands(self.gdbexe, filename)
         logging.debug("start gdb client to connect to server.")
-        session = GDBSession.start(gdb_cmd_line)
+        session = (GDBMISession if use_mi else GDBSession).start(gdb_cmd_line)
         session.gdb_server_proc = gdbserver_proc
 
         # Use a timer to stop the subprocess if the timeout is exceeded.
@@ -312,15 +563,17 @@ class DebuggerBase(CompilerBase):
         # convert string commands to a list
         _gdb_actions = [line.strip() for line in gdbcommands.split("\n") if line.strip()]
 
+        if use_mi:
+            gdb_errorcode = self._run_mi_actions(session, _gdb_actions)
+            _gdb_actions = []
+
         for act in _gdb_actions:
             # call registerd callback function before_load command
             if act.startswith("load"):
                 self._call_registered_callback("before_load")
             try:
                 c = session.run_cmd(act)
-                if "No connection could be made" in c or "Target disconnected" in c\
-                    or "Connection timed out" in c or '"monitor" command not supported by this target' in c \
-                    or "Error finishing flash operation" in c or "Load failed" in c:
+                if any(msg in c for msg in self.GDB_ERROR_MESSAGES):
                     gdb_errorcode = 1
                     logging.error(c)
                     break
@@ -331,13 +584,39 @@ class DebuggerBase(CompilerBase):
         if gdb_errorcode == 1:
             session.close()
             session = None
-            try:
-                gdbserver_proc.terminate()
-            except:
-                pass
+            # persistent gdbserver is checked and restarted by supervisor
+            if not persistent:
+                try:
+                    gdbserver_proc.terminate()
+                except:
+                    pass
 
         print("time used: %.2f" % (time.time() - start))
-        return session, timer, gdbserver_proc.get_output()
+        return session, timer, "".join(gdbserver_proc.console[output_offset:])
+
+    def _run_mi_actions(self, session, actions):
+        """Pipeline gdb commands in MI session, the commands before load are
+        waited to call before_load callback.
+
+        Returns:
+            int -- 1 if any command reports error
+        """
+        load_index = next((index for index, act in enumerate(actions) if act.startswith("load")), len(actions))
+        groups = [actions[:load_index], actions[load_index:]]
+        for index, group in enumerate(groups):
+            if index == 1 and group:
+                self._call_registered_callback("before_load")
+            try:
+                results = session.run_batch(group)
+            except GDBMITimeout:
+                logging.exception("gdb command timeout")
+                return 1
+
+            for act, record in results:
+                if record["class"] == "error":
+                    logging.error("gdb cmd error, CMD: %s, %s", act, record["results"].get("msg"))
+                    return 1
+        return 0
 
     def start_gdb_debug_session(self, filename=None, gdbserver_cmdline=None,
         gdb_commands=None, board=None, **kwargs):
@@ -421,35 +700,42 @@ def render_gdbinit(template, board):
     return template.format(**dicta)
 
 
-def _check_port_in_use(addr, port):
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-        try:
-            sock.bind((addr, port))
-        except (OSError, socket.error) as err:
-            if isinstance(err, OSError) or err.errno == errno.EADDRINUSE:
-                return True
-
-    return False
-
+def wait_for_gdbserver(server_process, port, timeout=30):
+    """Wait for gdbserver is listening on localhost.
 
-def validate_port_is_ready(server_process, port, timeout=30):
-    """Validate the port is open on localhost"""
+    The server console is watched by the reader thread of start_gdbserver, the
+    wait is woken up as soon as the ready line is printed or the server exits.
+    Then the port is confirmed by a TCP connection with backoff.
 
+    Returns:
+        bool -- False if the server exited or timeout.
+    """
     port = int(port)
-    start_time = time.time()
+    deadline = time.time() + timeout
+    event = getattr(server_process, "ready_event", None)
+    delay = 0.02
+
+    while True:
+        if server_process.poll() is not None or \
+                getattr(server_process, "exit_event", threading.Event()).is_set():
+            logging.debug("gdbserver exited, exit code: %s", server_process.poll())
+            return False
 
-    while time.time() - start_time <= timeout:
-        print(" Wait for gdb server ready.")
+        if (event is None or event.is_set()) and can_connect(port, timeout=1):
+            return True
 
-        if server_process.poll() != None:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            logging.error("gdbserver is not ready in %s seconds", timeout)
             return False
 
-        time.sleep(0.4)
-
-        if _check_port_in_use("127.0.0.1", port) or _check_port_in_use("", port):
-            return True
+        if event is not None and not event.is_set():
+            event.wait(remaining)
+        else:
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.5)
 
-    if server_process.poll() is None:
-        return True
 
-    return False
+def validate_port_is_ready(server_process, port, timeout=30):
+    """Validate the port is open on localhost"""
+    return wait_for_gdbserver(server_process, port, timeout)
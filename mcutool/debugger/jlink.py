@@ -6,19 +6,104 @@ import os
 import re
 import glob
 import platform
+import time
+import zlib
+import atexit
+import shutil
 import logging
 import tempfile
+import threading
 
+import pexpect
+from pexpect.popen_spawn import PopenSpawn
 from mcutool.debugger.general import DebuggerBase
+from mcutool.inventory import INVENTORY
 from mcutool.util import to_hex, get_max_version, run_command
 
 
 
+class JLinkSession(object):
+    """Interactive JLinkExe process, commands are sent through pexpect and
+    the connection to emulator and target is kept between command batches.
+
+    Example:
+        >>> session = JLinkSession(["JLinkExe", "-Device", "MIMXRT1062xxx6A", "-autoconnect", "1"])
+        >>> output = session.run(["mem32 0x400FC000, 1"])
+        >>> session.close()
+    """
+
+    PROMPT = "J-Link>"
+
+    # they make JLinkExe exit
+    QUIT_COMMANDS = ("q", "qc", "exit")
+
+    ERROR_PATTERN = re.compile(r"^\*+\s*Error|^ERROR:|Cannot connect to target|Could not connect", re.M | re.I)
+
+    def __init__(self, cmdline, timeout=30):
+        """
+        Arguments:
+            cmdline {list} -- JLinkExe command line
+            timeout {int} -- seconds to wait for the first prompt
+        """
+        self.cmdline = cmdline
+        self._spawn = PopenSpawn(cmdline, encoding="utf8", codec_errors="ignore", timeout=timeout)
+        try:
+            self._spawn.expect_exact(self.PROMPT, timeout=timeout)
+        except (pexpect.TIMEOUT, pexpect.EOF):
+            output = self._spawn.before
+            self.close()
+            raise RuntimeError(f"JLinkExe session start failed:\n{output}")
+
+        self.startup_output = self._spawn.before
+
+    @property
+    def is_alive(self):
+        return self._spawn.proc.poll() is None
+
+    def run(self, commands, timeout=60):
+        """Run commands in session, quit commands are ignored.
+
+        Returns:
+            tuple -- (returncode, output), returncode is 1 if error is reported.
+        """
+        deadline = time.time() + timeout
+        output = list()
+        for command in commands:
+            command = command.strip()
+            if not command or command.lower() in self.QUIT_COMMANDS:
+                continue
+
+            self._spawn.sendline(command)
+            self._spawn.expect_exact(self.PROMPT, timeout=max(deadline - time.time(), 1))
+            output.append(f"{self.PROMPT}{command}\n{self._spawn.before}")
+
+        output = "".join(output)
+        return (1 if self.ERROR_PATTERN.search(output) else 0), output
+
+    def close(self):
+        """Quit JLinkExe and make sure the process has exited."""
+        if self.is_alive:
+            try:
+                self._spawn.sendline("qc")
+                self._spawn.proc.wait(timeout=5)
+            except Exception:
+                self._spawn.proc.kill()
+                self._spawn.proc.wait()
+
+
 class JLINK(DebuggerBase):
     """
     A wrapper for SEGGER-JLink.
+
+    Commands are run in a pooled JLinkExe session per emulator by default, set
+    `persistent_session=False` to start JLinkExe for each call.
     """
 
+    # process-wide pool of JLinkExe sessions
+    # {connection key: (session, cmdline)}
+    _SESSIONS = dict()
+    _SESSIONS_LOCK = threading.RLock()
+
     @classmethod
     def get_latest(cls):
         """Get latest installed instance from the system.
@@ -40,6 +125,7 @@ class JLINK(DebuggerBase):
             self._jlink_gdbserver_exe = os.path.join(self.path, "JLinkGDBServerCLExe")
 
         self._connect_opt = None
+        self.persistent_session = kwargs.get("persistent_session", True)
 
     def auto_find(self):
         """Auto find available instance
@@ -119,13 +205,23 @@ class JLINK(DebuggerBase):
         Returns:
             tuple -- (jlink_exit_code, console_output)
         """
-        device = kwargs.get("device")
-        interface = kwargs.get("interface")
-        jlink_exe_cmd = [ self._jlink_exe ]
+        jlink_exe_cmd = self._get_jlink_exe_cmd(auto_connect, **kwargs)
+        jlink_exe_cmd.extend(["-CommandFile", filename])
+        return self._run_jlink_exe(jlink_exe_cmd, timeout)
 
+    def _get_target(self, device=None, interface=None):
+        """Return (device, interface), default from board."""
         if self._board:
             device = device or self._board.devicename
             interface = interface or self._board.interface
+        return device, interface
+
+    def _get_jlink_exe_cmd(self, auto_connect=True, **kwargs):
+        """Return JLinkExe command line list without command file."""
+        device, interface = self._get_target(kwargs.get("device"), kwargs.get("interface"))
+        jlink_exe_cmd = [ self._jlink_exe ]
+
+        if self._board:
             if self._connect_opt:
                 jlink_exe_cmd.extend(self._connect_opt)
         else:
@@ -146,12 +242,92 @@ class JLINK(DebuggerBase):
             jlink_exe_cmd.extend(["-speed", str(kwargs.get("speed"))])
 
         jlink_exe_cmd.extend(["-autoconnect", "1" if auto_connect else "0"])
-        jlink_exe_cmd.extend(["-CommandFile", filename])
 
         if kwargs.get("jlinkscript"):
             jlink_exe_cmd.extend(["-jlinkscriptfile", kwargs.get("jlinkscript")])
 
-        return self._run_jlink_exe(jlink_exe_cmd, timeout)
+        return jlink_exe_cmd
+
+    def _emulator_key(self):
+        """Identify the emulator: JLinkExe path and connection options."""
+        return (self._jlink_exe, tuple(self._connect_opt or ()))
+
+    def _session_key(self, device=None, interface=None, **kwargs):
+        return self._emulator_key() + self._get_target(device, interface)
+
+    def get_session(self, auto_connect=True, **kwargs):
+        """Return the pooled JLinkExe session, it is started or restarted
+        if it is not alive or the connection options are changed.
+
+        Sessions are started with auto connect. When auto_connect is False,
+        the target may not be connectable, so a new session is never started:
+        an alive session with the same options is returned, otherwise None.
+        """
+        cmdline = self._get_jlink_exe_cmd(True, **kwargs)
+        key = self._session_key(**kwargs)
+        with self._SESSIONS_LOCK:
+            session, session_cmdline = self._SESSIONS.get(key, (None, None))
+            if session is not None and session.is_alive and session_cmdline == cmdline:
+                return session
+
+            if not auto_connect:
+                return None
+
+            # only one session connects to the emulator
+            self.close_session()
+            logging.debug("start JLinkExe session: %s", cmdline)
+            session = JLinkSession(cmdline)
+            self._SESSIONS[key] = (session, cmdline)
+            return session
+
+    def close_session(self):
+        """Close the pooled JLinkExe sessions of this emulator."""
+        emulator = self._emulator_key()
+        with self._SESSIONS_LOCK:
+            for key in [key for key in self._SESSIONS if key[:2] == emulator]:
+                session, _ = self._SESSIONS.pop(key)
+                session.close()
+
+    @classmethod
+    def close_all_sessions(cls):
+        """Close all pooled JLinkExe sessions."""
+        with cls._SESSIONS_LOCK:
+            while cls._SESSIONS:
+                _, (session, _) = cls._SESSIONS.popitem()
+                session.close()
+
+    def start_gdbserver(self, background=True, gdbserver_cmdline=None, **kwargs):
+        # release emulator before gdbserver connects to it
+        self.close_session()
+        return super().start_gdbserver(background, gdbserver_cmdline, **kwargs)
+
+    def _run_in_session(self, commands, timeout, auto_connect=True, **kwargs):
+        """Run commands in pooled session.
+
+        Returns:
+            tuple -- (returncode, output), None if no session is available, the
+                commands should be run by command file, session is tried again next time.
+        """
+        with self._SESSIONS_LOCK:
+            try:
+                session = self.get_session(auto_connect, **kwargs)
+            except (RuntimeError, OSError) as err:
+                logging.warning("JLinkExe session is not available, fallback to command file: %s", err)
+                return None
+
+            if session is None:
+                return None
+
+            try:
+                rc, output = session.run(commands, timeout)
+            except (pexpect.TIMEOUT, pexpect.EOF):
+                output = session._spawn.before if isinstance(session._spawn.before, str) else ""
+                self.close_session()
+                rc = 1
+
+        level = logging.DEBUG if rc == 0 else logging.ERROR
+        logging.log(level, "JLink.exe output:\n%s", output)
+        return rc, output
 
     def run_commands(self, commands, auto_connect=True, timeout=60,
             speed="auto", jlinkscript=None, device=None, interface=None, **kwargs):
@@ -169,6 +345,13 @@ class JLINK(DebuggerBase):
         Returns:
             Tuple(int, str) -- returncode and console output
         """
+        options = dict(speed=speed, jlinkscript=jlinkscript, device=device, interface=interface)
+        if self.persistent_session and kwargs.get("session", True) and self._board:
+            logging.debug(f'Running JLink commands in session: {commands}')
+            ret = self._run_in_session(commands, timeout, auto_connect, **options)
+            if ret is not None:
+                return ret
+
         script_file = tempfile.NamedTemporaryFile(mode='w', delete=False)
         commands = '\n'.join(commands)
         script_file.write(commands)
@@ -176,8 +359,10 @@ class JLINK(DebuggerBase):
         logging.debug(f'Using script file name: {script_file.name}')
         logging.debug(f'Running JLink commands: {commands}')
 
-        return self.run_script(script_file.name, auto_connect, timeout,
-            speed=speed, jlinkscript=jlinkscript, device=device, interface=interface)
+        try:
+            return self.run_script(script_file.name, auto_connect, timeout, **options)
+        finally:
+            os.remove(script_file.name)
 
     def test_conn(self):
         """Test debugger connection."""
@@ -195,6 +380,10 @@ class JLINK(DebuggerBase):
         ]
         # Run commands.
         _, output = self.run_commands(commands, timeout=30)
+        session, _ = self._SESSIONS.get(self._session_key(), (None, None))
+        if session is not None:
+            # connection log is printed when session starts
+            output = session.startup_output + output
 
         if p1.search(output) is not None:
             return "NotConnected"
@@ -240,7 +429,9 @@ class JLINK(DebuggerBase):
             'unlock Kinetis',
             'q'
         ]
-        return self.run_commands(commands)
+        # locked device cannot be connected, do not use session
+        self.close_session()
+        return self.run_commands(commands, session=False)
 
     def reset(self):
         """Hardware reset."""
@@ -321,9 +512,108 @@ class JLINK(DebuggerBase):
 
         return self.run_commands(commands, timeout=30)
 
+    def read_ranges(self, ranges, halt=True):
+        """Read memory ranges by savebin in one run.
+
+        Arguments:
+            ranges {list} -- [(address, size)]
+            halt {bool} -- halt core before reading
+
+        Returns:
+            list -- bytes of each range
+        """
+        tmpdir = tempfile.mkdtemp(prefix="jlink_")
+        try:
+            commands = ["h"] if halt else []
+            files = list()
+            for index, (addr, size) in enumerate(ranges):
+                filename = os.path.join(tmpdir, f"{index}.bin")
+                files.append(filename)
+                commands.append(f"savebin {filename}, {to_hex(addr)}, {to_hex(size)}")
+            commands.append("qc")
+
+            returncode, output = self.run_commands(commands, timeout=60)
+            if returncode:
+                raise Exception(f"JLink savebin failed:\n{output}")
+
+            blocks = list()
+            for filename in files:
+                with open(filename, "rb") as fobj:
+                    blocks.append(fobj.read())
+            return blocks
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def flash_crc(self, ranges):
+        """Return crc32 of memory ranges, they are saved by savebin in one run."""
+        return [zlib.crc32(data) for data in self.read_ranges(ranges)]
+
+    def read_memory(self, addr, size):
+        return self.read_ranges([(addr, size)], halt=False)[0]
+
+    def write_memory(self, addr, data):
+        script_file = tempfile.NamedTemporaryFile(mode="wb", suffix=".bin", delete=False)
+        try:
+            script_file.write(bytes(data))
+            script_file.close()
+            returncode, output = self.run_commands([f"loadbin {script_file.name}, {to_hex(addr)}", "qc"], timeout=60)
+            if returncode:
+                raise Exception(f"JLink loadbin failed:\n{output}")
+        finally:
+            os.remove(script_file.name)
+
+    def read_words(self, addrs):
+        """Read words by mem32 commands in one run."""
+        addrs = list(addrs)
+        commands = ["mem32 {0}, 1".format(to_hex(addr)) for addr in addrs]
+        commands.append("qc")
+        returncode, output = self.run_commands(commands, timeout=30)
+        if returncode:
+            raise Exception(f"JLink mem32 failed:\n{output}")
+
+        values = dict()
+        for match in re.finditer(r"^(?:J-Link>)?([0-9A-F]{8}) = ([0-9A-F]{8})", output, re.I | re.M):
+            values[int(match.group(1), 16)] = int(match.group(2), 16)
+
+        missing = [to_hex(addr) for addr in addrs if addr not in values]
+        if missing:
+            raise Exception(f"Cannot read words: {', '.join(missing)}")
+        return [values[addr] for addr in addrs]
+
+    def write_words(self, items):
+        if isinstance(items, dict):
+            items = items.items()
+        commands = ["w4 {0}, {1}".format(to_hex(addr), to_hex(value)) for addr, value in items]
+        commands.append("qc")
+        returncode, output = self.run_commands(commands, timeout=30)
+        if returncode:
+            raise Exception(f"JLink w4 failed:\n{output}")
+
+    def read_registers(self, names=None):
+        """Read core registers by regs command.
+
+        Register aliases printed by J-Link are normalized: SP(R13) -> sp, R14(LR) -> lr.
+        """
+        returncode, output = self.run_commands(["regs", "qc"], timeout=30)
+        if returncode:
+            raise Exception(f"JLink regs failed:\n{output}")
+
+        registers = dict()
+        for match in re.finditer(r"([A-Za-z][\w()]*)\s*=\s*([0-9A-F]{8})\b", output, re.I):
+            aliases = [item.lower() for item in re.split(r"[()]", match.group(1)) if item]
+            name = next((item for item in aliases if not re.match(r"r\d+$", item)), aliases[0])
+            registers[name] = int(match.group(2), 16)
+
+        if names:
+            return {name: registers[name.lower()] for name in names}
+        return registers
+
     def flash(self, filepath, addr=None, **kwargs):
         """Program binary to flash.
         The file could be ".bin" or ".hex". addr is the start address.
+
+        When delta is True, J-Link compares sectors by CRC and only programs
+        the sectors that differ.
         """
         timeout = kwargs.get("timeout", self.DEFAULT_FLASH_TIMEOUT)
         address = 0
@@ -335,6 +625,12 @@ class JLINK(DebuggerBase):
         # Build list of commands to program hex files.
         commands = ['r', 'waithalt', 'sleep 10']   # Reset and wait for CPU to halt
 
+        if kwargs.get("delta"):
+            commands.extend([
+                'exec SetCompareMode = 1',          # compare sectors by CRC
+                'exec SetSkipProgOnCRCMatch = 1',   # skip sectors with same CRC
+            ])
+
         # Program each hex file.
         if filepath.endswith(".hex"):
             commands.append(f'loadfile "{filepath}"')
@@ -352,13 +648,20 @@ class JLINK(DebuggerBase):
         # call registerd callback function
         self._call_registered_callback("before_load")
         # Run commands.
+        if kwargs.get("delta"):
+            # compare settings are kept by JLinkExe, run them in a private process
+            # and release the emulator from the pooled session first
+            self.close_session()
+            return self.run_commands(commands, timeout=timeout, session=False)
         return self.run_commands(commands, timeout=timeout)
 
     def list_connected_devices(self):
-        """Return a list of connected id list."""
+        """Return a list of connected id list, it is cached in host inventory."""
+        return INVENTORY.get(f"probes.jlink:{self._jlink_exe}", self._scan_connected_devices)
 
+    def _scan_connected_devices(self):
         devices = list()
-        ret, raw_data = self.run_commands(["ShowEmuList", "qc"], 10)
+        ret, raw_data = self.run_commands(["ShowEmuList", "qc"], timeout=10, session=False)
         if ret != 0:
             return devices
 
@@ -406,7 +709,10 @@ class JLINK(DebuggerBase):
         if not usbid:
             logging.warning('jlink: serial number is not set.')
 
-        options = f"-if {interface} -singlerun -strict -noir"
+        options = f"-if {interface} -strict -noir"
+        # single run gdbserver exits when gdb client disconnects
+        if not kwargs.get("persist"):
+            options += " -singlerun"
         if devicename:
             options += f" -device {devicename}"
 
@@ -483,3 +789,6 @@ def _scan_installed_instance():
             version = path.split("JLink")[-1].replace('_', '')
             return JLINK(path, version=version)
         return None
+
+
+atexit.register(JLINK.close_all_sessions)
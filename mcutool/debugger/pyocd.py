@@ -4,10 +4,14 @@
 from __future__ import absolute_import
 import os
 import sys
+import zlib
+import atexit
 import logging
+import threading
 import subprocess
 from packaging import version
 from mcutool.debugger.general import DebuggerBase
+from mcutool.inventory import INVENTORY
 from mcutool.util import run_command
 
 
@@ -29,6 +33,11 @@ class PYOCD(DebuggerBase):
     _PYOCD_BUILTIN_TARGETS = None
     _PYOCD_CONNECT_HELPER = None
 
+    # process-wide pool of opened sessions
+    # {usbid: (session, options)}
+    _SESSIONS = dict()
+    _SESSIONS_LOCK = threading.RLock()
+
     @classmethod
     def lazy_import(cls):
         # lazy import in here, because pyocd is too large
@@ -78,6 +87,61 @@ class PYOCD(DebuggerBase):
             **kwargs
         )
 
+    def open_session(self, options=None):
+        """Return an opened session of the board from pool, the probe and target
+        are opened once and reused by flash, erase, reset and memory access.
+
+        The session is reopened if it is closed or the options are changed.
+        Persistent gdbserver is stopped because the probe cannot be shared.
+
+        Arguments:
+            options {dict} -- pyocd session options, default uses `_get_default_session_options()`
+        """
+        if options is None:
+            options = self._get_default_session_options()
+
+        usbid = self._board.usbid
+        with self._SESSIONS_LOCK:
+            session, session_options = self._SESSIONS.get(usbid, (None, None))
+            if session is not None and session.is_open and session_options == options:
+                return session
+
+            self.close_session()
+            self.stop_gdbserver()
+            session = self.get_session(options=dict(options))
+            if session is None:
+                raise ValueError(f"No device available, probe id: {usbid}")
+
+            session.open()
+            self._SESSIONS[usbid] = (session, dict(options))
+            logging.debug("pyocd session opened, probe id: %s", usbid)
+            return session
+
+    def close_session(self):
+        """Close the pooled session of the board."""
+        with self._SESSIONS_LOCK:
+            session, _ = self._SESSIONS.pop(self._board.usbid, (None, None))
+            if session is not None and session.is_open:
+                session.close()
+
+    @classmethod
+    def close_all_sessions(cls):
+        """Close all pooled sessions."""
+        with cls._SESSIONS_LOCK:
+            while cls._SESSIONS:
+                _, (session, _) = cls._SESSIONS.popitem()
+                try:
+                    if session.is_open:
+                        session.close()
+                except Exception:
+                    logging.exception("failed to close pyocd session")
+
+    def start_gdbserver(self, background=True, gdbserver_cmdline=None, **kwargs):
+        # gdbserver needs the probe, release it from pool
+        if self._board:
+            self.close_session()
+        return super().start_gdbserver(background, gdbserver_cmdline, **kwargs)
+
     def _check_overried_target(self, devicename):
         """Overried target if device name is include in pyOCD.target.TARGET.
         This is very useful if you want to use other device target for debugging.
@@ -126,8 +190,10 @@ class PYOCD(DebuggerBase):
         return " ".join(args)
 
     def list_connected_devices(self):
-        """List connected CMSIS-DAP devices."""
+        """List connected CMSIS-DAP devices, it is cached in host inventory."""
+        return INVENTORY.get("probes.pyocd", self._scan_connected_devices)
 
+    def _scan_connected_devices(self):
         probes = self._PYOCD_CONNECT_HELPER.get_all_connected_probes(blocking=False)
         devices = list()
         for probe in probes:
@@ -146,6 +212,10 @@ class PYOCD(DebuggerBase):
             raise ValueError("board is not set")
 
         msg = "NoError"
+        session, _ = self._SESSIONS.get(self._board.usbid, (None, None))
+        if session is not None and session.is_open:
+            return msg
+
         try:
             with self.get_session():
                 pass
@@ -154,23 +224,100 @@ class PYOCD(DebuggerBase):
 
         return msg
 
+    def _get_memory_session(self):
+        # reuse the pooled session, or attach to target without halt
+        session, _ = self._SESSIONS.get(self._board.usbid, (None, None))
+        if session is not None and session.is_open:
+            return session
+        return self.open_session(options={'connect_mode': 'attach'})
+
+    # general registers of Cortex-M
+    CORE_REGISTERS = ["r0", "r1", "r2", "r3", "r4", "r5", "r6", "r7", "r8", "r9", "r10",
+                      "r11", "r12", "sp", "lr", "pc", "xpsr", "msp", "psp", "primask",
+                      "control"]
+
     def read32(self, addr):
-        with self.get_session(options={'connect_mode': 'attach'}) as session:
-            return session.board.target.read_memory(addr)
+        with self._SESSIONS_LOCK:
+            return self._get_memory_session().board.target.read_memory(addr)
 
     def write32(self, addr, value):
-        with self.get_session(options={'connect_mode': 'attach'}) as session:
-            session.board.target.write_memory(addr, value)
+        with self._SESSIONS_LOCK:
+            self._get_memory_session().board.target.write_memory(addr, value)
+
+    def read_memory(self, addr, size):
+        with self._SESSIONS_LOCK:
+            return bytes(self._get_memory_session().board.target.read_memory_block8(addr, size))
+
+    def write_memory(self, addr, data):
+        with self._SESSIONS_LOCK:
+            target = self._get_memory_session().board.target
+            target.write_memory_block8(addr, list(bytes(data)))
+            target.flush()
+
+    def read_words(self, addrs):
+        """Read words with deferred transfers, they are sent to probe in one batch."""
+        with self._SESSIONS_LOCK:
+            target = self._get_memory_session().board.target
+            results = [target.read_memory(addr, 32, now=False) for addr in addrs]
+            return [result() for result in results]
+
+    def write_words(self, items):
+        if isinstance(items, dict):
+            items = items.items()
+        with self._SESSIONS_LOCK:
+            target = self._get_memory_session().board.target
+            for addr, value in items:
+                target.write_memory(addr, value)
+            target.flush()
+
+    def read_registers(self, names=None):
+        names = list(names or self.CORE_REGISTERS)
+        with self._SESSIONS_LOCK:
+            target = self._get_memory_session().board.target
+            return dict(zip(names, target.read_core_registers_raw(names)))
+
+    def flash_crc(self, ranges):
+        """Return crc32 of memory ranges read by the pooled session."""
+        with self._SESSIONS_LOCK:
+            target = self._get_memory_session().board.target
+            return [zlib.crc32(bytes(target.read_memory_block8(addr, size))) for addr, size in ranges]
+
+    # session options of mass erase, same as `pyocd erase` command line
+    ERASE_OPTIONS = {
+        "resume_on_disconnect": False,
+        "allow_no_cores": True
+    }
 
     def erase(self, **kwargs):
         """Mass erase flash."""
+        from pyocd.core.exceptions import Error, ProbeError
+        from pyocd.flash.eraser import FlashEraser
+
+        options = self._get_default_session_options()
+        options.update(self.ERASE_OPTIONS)
+
+        logging.info("mass erase by pyocd")
+        try:
+            with self._SESSIONS_LOCK:
+                session = self.open_session(options)
+                FlashEraser(session, FlashEraser.Mode.CHIP).erase()
+        except ProbeError as err:
+            # the probe connection is broken, the session will be reopened next time
+            logging.exception("erase failed")
+            self.close_session()
+            return 1, str(err)
+        except (Error, ValueError) as err:
+            logging.exception("erase failed")
+            return 1, str(err)
+
+        return 0, ''
+
+    def erase_with_cli(self, **kwargs):
+        """Mass erase flash by pyocd command line."""
 
         timeout = kwargs.get("timeout", 300)
 
-        opt_args = self._build_cmd_args(options={
-            "resume_on_disconnect": False,
-            "allow_no_cores": True
-        })
+        opt_args = self._build_cmd_args(options=self.ERASE_OPTIONS)
 
         command = f"\"{sys.executable}\" -m pyocd erase --mass -v -W {opt_args}"
         logging.info(f"erase commad: {command}")
@@ -180,6 +327,13 @@ class PYOCD(DebuggerBase):
         """Always perform a hardware reset"""
 
         logging.info("resetting board by pyocd")
+        with self._SESSIONS_LOCK:
+            session, _ = self._SESSIONS.get(self._board.usbid, (None, None))
+            if session is not None and session.is_open:
+                session.probe.reset()
+                logging.info("reset done.")
+                return True
+
         # do not auto open probe by session it self, because we do not need to
         # init target and flash. Just use probe to perform a hardware reset.
         # This can improve the stability even if board is in lower mode.
@@ -204,6 +358,7 @@ class PYOCD(DebuggerBase):
         """Unlock board."""
 
         logging.info("unlock board")
+        self.close_session()
         try:
             with self.get_session(options={'auto_unlock': True}):
                 pass
@@ -236,6 +391,10 @@ class PYOCD(DebuggerBase):
         if kwargs.get("core"):
             command += f" --core {kwargs['core']}"
 
+        # keep running after gdb client disconnects
+        if kwargs.get("persist"):
+            command += " --persist"
+
         options = self._get_default_session_options()
 
         # set console to disable telent server
@@ -246,6 +405,11 @@ class PYOCD(DebuggerBase):
         return command
 
     def flash_with_api(self, filepath, **kwargs):
+        """Flash image in process with the pooled session, the target is reset
+        after programming unless `no_reset` is True.
+
+        Path is passed to pyocd API directly, so `@` in path is supported.
+        """
         from pyocd.flash.file_programmer import FileProgrammer
         addr = kwargs.get('addr') or self._board.start_address
 
@@ -259,35 +423,51 @@ class PYOCD(DebuggerBase):
             addr = None
 
         filepath = filepath.replace("\\", "/")
-        options = self._get_default_session_options()
-        session = self.get_session(options=options)
-
-        if session is None:
-            raise ValueError("No device available to flash")
-
         file_format = self.guess_image_format(filepath)
 
-        with session:
-            # call registerd callback function
-            self._call_registered_callback("before_load")
-            programmer = FileProgrammer(session, trust_crc=True)
-            programmer.program(filepath, file_format, base_address=addr)
+        with self._SESSIONS_LOCK:
+            session = self.open_session()
+            try:
+                # call registerd callback function
+                self._call_registered_callback("before_load")
+                # smart flash only programs the sectors that differ
+                programmer = FileProgrammer(session, trust_crc=True,
+                                            smart_flash=kwargs.get("delta") is not False)
+                programmer.program(filepath, file_format, base_address=addr)
+                if not kwargs.get("no_reset"):
+                    session.target.reset()
+            except Exception:
+                # probe or target may be in bad state, open a new session next time
+                self.close_session()
+                raise
         return 0, ''
 
     def flash(self, filepath, **kwargs):
         """Flash chip with filepath. (bin, hex).
 
+        The image is programmed in process with a pooled session, set `cli`
+        to True to program by pyocd command line.
+
         Arguments:
             erase: erase chip yes or not.
             addr: {str} being the integer starting address for the bin file.
-            timeout: {int}
+            timeout: {int} only for command line
+            cli: {bool} use pyocd command line
         """
+        if not kwargs.get("cli"):
+            return self.flash_with_api(filepath, **kwargs)
+
+        return self.flash_with_cli(filepath, **kwargs)
+
+    def flash_with_cli(self, filepath, **kwargs):
+        """Flash chip by pyocd load command."""
 
         # pyocd < 0.34.1: bug, pyocd load: cannot recognize path contains character `@`
         # so we use API to flash
         if version.parse(self.version) < version.parse("0.34.1"):
             return self.flash_with_api(filepath, **kwargs)
 
+        self.close_session()
         timeout = kwargs.get("timeout")
         addr = kwargs.get('addr') or self._board.start_address
 
@@ -331,3 +511,6 @@ class PYOCD(DebuggerBase):
     def get_latest():
         """Return pyocd.Debugger instance."""
         return PYOCD()
+
+
+atexit.register(PYOCD.close_all_sessions)
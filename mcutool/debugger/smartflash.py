@@ -0,0 +1,166 @@
+#
+
+#
+
+import os
+import json
+import zlib
+import struct
+import hashlib
+import logging
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_RECORD_DIR = os.path.expanduser('~') + '/.mcutool/flash'
+
+PT_LOAD = 1
+
+
+def image_hash(filepath, addr=None):
+    """Return sha1 of image content and load address."""
+    sha1 = hashlib.sha1(str(addr).encode("utf-8"))
+    with open(filepath, "rb") as fobj:
+        for chunk in iter(lambda: fobj.read(1024 * 1024), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def _merge(chunks):
+    """Merge contiguous (addr, data) chunks."""
+    segments = list()
+    for addr, data in sorted(chunks, key=lambda item: item[0]):
+        if segments and segments[-1][0] + len(segments[-1][1]) == addr:
+            segments[-1][1].extend(data)
+        else:
+            segments.append((addr, bytearray(data)))
+    return [(addr, bytes(data)) for addr, data in segments]
+
+
+def _load_hex(filepath):
+    chunks = list()
+    base = 0
+    with open(filepath) as fobj:
+        for line in fobj:
+            line = line.strip()
+            if not line.startswith(":"):
+                continue
+            record = bytes.fromhex(line[1:])
+            count, offset, rtype = record[0], (record[1] << 8) | record[2], record[3]
+            data = record[4:4 + count]
+            if rtype == 0:
+                chunks.append((base + offset, data))
+            elif rtype == 1:
+                break
+            elif rtype == 2:
+                base = int.from_bytes(data, "big") << 4
+            elif rtype == 4:
+                base = int.from_bytes(data, "big") << 16
+    return _merge(chunks)
+
+
+def _load_elf(filepath):
+    """Load PT_LOAD segments at physical address (LMA)."""
+    with open(filepath, "rb") as fobj:
+        content = fobj.read()
+
+    if content[:4] != b"\x7fELF":
+        raise ValueError(f"not an ELF file: {filepath}")
+
+    is64 = content[4] == 2
+    endian = "<" if content[5] == 1 else ">"
+    if is64:
+        e_phoff, = struct.unpack_from(endian + "Q", content, 0x20)
+        e_phentsize, e_phnum = struct.unpack_from(endian + "HH", content, 0x36)
+        fmt = endian + "IIQQQQQQ"
+    else:
+        e_phoff, = struct.unpack_from(endian + "I", content, 0x1C)
+        e_phentsize, e_phnum = struct.unpack_from(endian + "HH", content, 0x2A)
+        fmt = endian + "IIIIIIII"
+
+    chunks = list()
+    for index in range(e_phnum):
+        fields = struct.unpack_from(fmt, content, e_phoff + index * e_phentsize)
+        if is64:
+            p_type, _, p_offset, _, p_paddr, p_filesz = fields[:6]
+        else:
+            p_type, p_offset, _, p_paddr, p_filesz = fields[:5]
+        if p_type == PT_LOAD and p_filesz:
+            chunks.append((p_paddr, content[p_offset:p_offset + p_filesz]))
+    return _merge(chunks)
+
+
+def load_image_segments(filepath, addr=None):
+    """Load memory segments of an image file.
+
+    Arguments:
+        filepath {str} -- image path, .bin, .hex or elf
+        addr {int|str} -- start address of .bin image
+
+    Returns:
+        list -- [(address, data)]
+    """
+    ext = os.path.splitext(filepath)[-1].lower()
+    if ext in (".bin", ".img"):
+        if isinstance(addr, str):
+            addr = int(addr, 0)
+        with open(filepath, "rb") as fobj:
+            return [(addr or 0, fobj.read())]
+
+    if ext == ".hex":
+        return _load_hex(filepath)
+
+    return _load_elf(filepath)
+
+
+def segment_crcs(segments):
+    """Return [(address, size, crc32)] of segments."""
+    return [(addr, len(data), zlib.crc32(data)) for addr, data in segments]
+
+
+class FlashRecord(object):
+    """Record of the last image programmed to a board.
+
+    The record is saved in `record_dir` per probe, so it is shared by processes
+    and test runs. A matched record only means the board may hold the image,
+    the flash content should be verified before programming is skipped.
+    """
+
+    def __init__(self, board, record_dir=DEFAULT_RECORD_DIR):
+        self.key = str(board.usbid or board.name).replace(":", "_").replace("/", "_")
+        self.record_dir = record_dir
+
+    @property
+    def path(self):
+        return os.path.join(self.record_dir, f"{self.key}.json")
+
+    def load(self):
+        try:
+            with open(self.path) as fobj:
+                return json.load(fobj)
+        except (IOError, ValueError):
+            return None
+
+    def matches(self, digest):
+        record = self.load()
+        return bool(record) and record.get("sha1") == digest
+
+    def save(self, digest, filepath, crcs):
+        data = {
+            "sha1": digest,
+            "image": os.path.abspath(filepath),
+            "segments": [list(item) for item in crcs],
+        }
+        try:
+            os.makedirs(self.record_dir, exist_ok=True)
+            tmpfile = self.path + f".{os.getpid()}.tmp"
+            with open(tmpfile, "w") as fobj:
+                json.dump(data, fobj)
+            os.replace(tmpfile, self.path)
+        except OSError as err:
+            LOGGER.debug("unable to save flash record: %s", err)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
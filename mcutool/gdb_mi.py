@@ -0,0 +1,346 @@
+#
+
+#
+import os
+import re
+import shlex
+import logging
+import threading
+import subprocess
+
+LOGGER = logging.getLogger(__name__)
+
+_RECORD_PATTERN = re.compile(r"^(\d*)([\^*+=~@&])(.*)$")
+
+STREAM_TYPES = {"~": "console", "@": "target", "&": "log"}
+ASYNC_TYPES = {"^": "result", "*": "exec", "+": "status", "=": "notify"}
+
+
+class GDBMIError(Exception):
+    """gdb reported ^error for a command."""
+
+    def __init__(self, command, record):
+        self.command = command
+        self.record = record
+        super().__init__(f"{command}: {record['results'].get('msg', '')}")
+
+
+class GDBMITimeout(Exception):
+    pass
+
+
+def _parse_cstring(text, pos):
+    """Parse a C string starting at text[pos] == '"', return (value, next_pos).
+
+    Octal escapes are bytes of UTF-8 encoded text, like \\302\\260 for the
+    degree sign, so the string is collected as bytes and decoded at the end.
+    """
+    buf = bytearray()
+    pos += 1
+    escapes = {"n": "\n", "t": "\t", "r": "\r", '"': '"', "\\": "\\"}
+    while pos < len(text):
+        char = text[pos]
+        if char == "\\" and pos + 1 < len(text):
+            nxt = text[pos + 1]
+            if nxt in escapes:
+                buf.extend(escapes[nxt].encode("utf-8"))
+                pos += 2
+                continue
+            # octal escape, like \302
+            match = re.match(r"[0-7]{1,3}", text[pos + 1:])
+            if match:
+                buf.append(int(match.group(0), 8) & 0xFF)
+                pos += 1 + len(match.group(0))
+                continue
+            buf.extend(nxt.encode("utf-8"))
+            pos += 2
+            continue
+        if char == '"':
+            return buf.decode("utf-8", errors="replace"), pos + 1
+        buf.extend(char.encode("utf-8"))
+        pos += 1
+    return buf.decode("utf-8", errors="replace"), pos
+
+
+def _parse_value(text, pos):
+    char = text[pos]
+    if char == '"':
+        return _parse_cstring(text, pos)
+
+    if char == "{":
+        value, pos = _parse_results(text, pos + 1, "}")
+        return value, pos + 1
+
+    if char == "[":
+        pos += 1
+        items = list()
+        while pos < len(text) and text[pos] != "]":
+            # list of values or list of results
+            if text[pos] in '"{[':
+                item, pos = _parse_value(text, pos)
+            else:
+                name, _, _ = text[pos:].partition("=")
+                item, pos = _parse_value(text, pos + len(name) + 1)
+                item = {name: item}
+            items.append(item)
+            if pos < len(text) and text[pos] == ",":
+                pos += 1
+        return items, pos + 1
+
+    raise ValueError(f"invalid MI value at {pos}: {text}")
+
+
+def _parse_results(text, pos, end=None):
+    results = dict()
+    while pos < len(text) and text[pos] != end:
+        # bare tuple, like: +download,{section=".text",total-size="9880"}
+        if text[pos] == "{":
+            value, pos = _parse_value(text, pos)
+            results.update(value)
+            if pos < len(text) and text[pos] == ",":
+                pos += 1
+            continue
+        eq = text.index("=", pos)
+        name = text[pos:eq]
+        value, pos = _parse_value(text, eq + 1)
+        results[name] = value
+        if pos < len(text) and text[pos] == ",":
+            pos += 1
+    return results, pos
+
+
+def parse_record(line):
+    """Parse a GDB/MI output line.
+
+    Returns:
+        dict -- {"token": int|None, "type": str, "class": str, "results": dict,
+                 "payload": str}, None for prompt or non MI line.
+
+    Example:
+        >>> parse_record('12^done,value="1"')
+        {'token': 12, 'type': 'result', 'class': 'done', 'results': {'value': '1'}, 'payload': None}
+    """
+    line = line.rstrip("\r\n")
+    match = _RECORD_PATTERN.match(line)
+    if not match:
+        return None
+
+    token, prefix, rest = match.groups()
+    record = {
+        "token": int(token) if token else None,
+        "type": None,
+        "class": None,
+        "results": dict(),
+        "payload": None,
+    }
+
+    if prefix in STREAM_TYPES:
+        record["type"] = STREAM_TYPES[prefix]
+        record["payload"] = _parse_cstring(rest, 0)[0] if rest.startswith('"') else rest
+        return record
+
+    record["type"] = ASYNC_TYPES[prefix]
+    record["class"], _, rest = rest.partition(",")
+    if rest:
+        record["results"] = _parse_results(rest, 0)[0]
+    return record
+
+
+def to_mi_command(command):
+    """Convert a gdb CLI command to MI command.
+
+    load and target remote are converted to MI commands to report progress
+    and errors in records, other commands are executed by the console interpreter.
+    """
+    command = command.strip()
+    if command.startswith("-"):
+        return command
+
+    words = command.split(None, 1)
+    if command == "load":
+        return "-target-download"
+    if words and words[0] in ("q", "quit"):
+        return "-gdb-exit"
+    if words and words[0] in ("target", "tar") and len(words) == 2:
+        return f"-target-select {words[1]}"
+
+    escaped = command.replace("\\", "\\\\").replace('"', '\\"')
+    return f'-interpreter-exec console "{escaped}"'
+
+
+class GDBMISession(object):
+    """GDB session driven by GDB/MI.
+
+    Commands are sent with tokens, so they can be pipelined: `send()` returns
+    at once and the result record is matched by the token later. Errors are
+    reported by ^error records, and load progress by +download records.
+
+    It provides the same methods with GDBSession used by debuggers: run_cmd,
+    close, is_alive and console_output.
+
+    Example:
+        >>> session = GDBMISession.start("arm-none-eabi-gdb app.elf")
+        >>> tokens = [session.send(cmd) for cmd in ("target remote :3333", "load")]
+        >>> records = [session.wait(token) for token in tokens]
+        >>> session.close()
+    """
+
+    @staticmethod
+    def start(cmdline, interpreter="mi3"):
+        session = GDBMISession(cmdline, interpreter)
+        session.init()
+        return session
+
+    def __init__(self, executable, interpreter="mi3"):
+        self.executable = executable
+        self.interpreter = interpreter
+        self.timeout = 60 * 5
+        self.gdb_server_proc = None
+        self.on_progress = None
+        self._proc = None
+        self._token = 0
+        self._lock = threading.Lock()
+        self._results = dict()
+        self._cond = threading.Condition()
+        self._console = list()
+        # set when the reader thread exits, no more result will come
+        self._reader_exited = False
+
+    def init(self):
+        """Start gdb process in backend."""
+        cmdline = self.executable
+        if isinstance(cmdline, str):
+            cmdline = shlex.split(cmdline, posix=(os.name != "nt"))
+        cmdline = list(cmdline) + [f"--interpreter={self.interpreter}"]
+        LOGGER.info(" ".join(cmdline))
+
+        self._proc = subprocess.Popen(cmdline, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                      stderr=subprocess.STDOUT, universal_newlines=True,
+                                      encoding="utf8", errors="ignore", bufsize=1)
+        self._reader_exited = False
+        reader = threading.Thread(target=self._reader, daemon=True)
+        reader.start()
+
+    def _reader(self):
+        try:
+            for line in iter(self._proc.stdout.readline, ""):
+                try:
+                    record = parse_record(line)
+                except (ValueError, KeyError, IndexError) as err:
+                    LOGGER.debug("invalid MI record: %r, %s", line, err)
+                    continue
+                if record is None:
+                    continue
+
+                if record["type"] in ("console", "target", "log"):
+                    self._console.append(record["payload"])
+                elif record["type"] == "status" and record["class"] == "download":
+                    LOGGER.debug("download: %s", record["results"])
+                    if self.on_progress:
+                        self.on_progress(record["results"])
+                elif record["type"] == "result":
+                    with self._cond:
+                        self._results[record["token"]] = record
+                        self._cond.notify_all()
+        finally:
+            with self._cond:
+                self._reader_exited = True
+                self._cond.notify_all()
+
+    def send(self, command):
+        """Send a command without waiting the result.
+
+        Returns:
+            int -- token of the command
+        """
+        if not self.is_alive:
+            raise RuntimeError("gdb session is inactive, cannot send command.")
+
+        with self._lock:
+            self._token += 1
+            token = self._token
+            LOGGER.info("gdb=> %s", command)
+            self._proc.stdin.write(f"{token}{to_mi_command(command)}\n")
+            self._proc.stdin.flush()
+        return token
+
+    def wait(self, token, timeout=-1, raise_error=True):
+        """Wait for the result record of a command.
+
+        Raises:
+            GDBMIError -- gdb reports ^error
+            GDBMITimeout -- no result in timeout
+        """
+        if timeout == -1:
+            timeout = self.timeout
+
+        with self._cond:
+            ready = self._cond.wait_for(
+                lambda: token in self._results or not self.is_alive or self._reader_exited, timeout)
+            record = self._results.pop(token, None)
+
+        if record is None:
+            if not ready:
+                raise GDBMITimeout(f"token: {token}, timeout={timeout}s!")
+            # gdb exited or output is not read any more, -gdb-exit may have no result
+            record = {"token": token, "type": "result", "class": "exit", "results": dict(), "payload": None}
+
+        if raise_error and record["class"] == "error":
+            raise GDBMIError(token, record)
+        return record
+
+    def run_batch(self, commands, timeout=-1):
+        """Pipeline commands and wait for all results.
+
+        Returns:
+            list -- (command, record) in order, failed commands have ^error records.
+        """
+        tokens = [(command, self.send(command)) for command in commands]
+        return [(command, self.wait(token, timeout, raise_error=False)) for command, token in tokens]
+
+    def run_cmd(self, cmd, wait=True, timeout=-1):
+        """Run a command and return the console output of it.
+
+        Raises:
+            GDBMIError -- gdb reports ^error
+        """
+        start = len(self._console)
+        token = self.send(cmd)
+        if wait:
+            self.wait(token, timeout)
+        return "".join(self._console[start:])
+
+    @property
+    def is_alive(self):
+        return self._proc is not None and self._proc.poll() is None
+
+    @property
+    def pid(self):
+        return self._proc.pid
+
+    def kill(self):
+        return self._proc.kill()
+
+    @property
+    def console_output(self):
+        return "".join(self._console)
+
+    def close(self):
+        """Exit gdb and make sure process has exited."""
+        if self.is_alive:
+            try:
+                self._proc.stdin.write("-gdb-exit\n")
+                self._proc.stdin.flush()
+                self._proc.wait(timeout=2)
+            except (IOError, subprocess.TimeoutExpired):
+                self.kill()
+                LOGGER.warning("force terminate GDB (PID=%s)", self.pid)
+                self._proc.wait()
+        LOGGER.info("Debug session is closed!")
+
+    def __enter__(self):
+        self.init()
+        return self
+
+    def __exit__(self, etype, evalue, tb):
+        self.close()
@@ -0,0 +1,245 @@
+#
+
+#
+import os
+import fnmatch
+import logging
+import subprocess
+from collections import defaultdict
+from xml.etree import ElementTree as ET
+
+from mcutool.sdk_manifest import SDKManifest
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _norm(path):
+    path = os.path.normpath(path).replace("\\", "/") if path else ""
+    return "" if path == "." else path
+
+
+def _join(directory, name):
+    return _norm(directory + "/" + name) if directory else _norm(name)
+
+
+def _iter_sources(elem, base_path=""):
+    """Yield (directory, mask) of <source><files mask=""/></source> under elem.
+
+    `relative_path` of source is relative to the package_base_path of the
+    owning component, `path` is relative to the sdk root.
+    """
+    for source in elem.iter("source"):
+        if source.get("relative_path") is not None:
+            directory = _join(base_path, source.get("relative_path"))
+        else:
+            directory = _norm(source.get("path") or "")
+        for files in source.iter("files"):
+            mask = files.get("mask")
+            if mask:
+                yield directory, mask
+
+
+def git_changed_files(sdk_root, rev_range):
+    """List changed files in a git diff range, relative to sdk_root.
+
+    Arguments:
+        sdk_root {str} -- SDK root directory in a git repository
+        rev_range {str} -- git revision range, like: "HEAD~1..HEAD", "origin/main...HEAD"
+
+    Returns:
+        list -- changed file paths relative to sdk_root
+    """
+    output = subprocess.check_output(
+        ["git", "diff", "--name-only", "--relative", rev_range], cwd=sdk_root)
+    return [line.strip() for line in output.decode("utf-8").splitlines() if line.strip()]
+
+
+class ImpactAnalyzer(object):
+    """Map changed SDK files to the examples which use them.
+
+    A reverse index is built from SDK manifest and example xml files:
+
+        - sources listed in example xml,
+        - sources of the components the example depends on, the component
+          dependencies are followed transitively,
+        - any file in the example directory.
+
+    A change of the manifest itself affects all examples.
+
+    Example:
+        >>> analyzer = ImpactAnalyzer("C:/mcu-sdk")
+        >>> analyzer.affected_examples(["devices/MIMXRT1062/drivers/fsl_lpuart.c"])
+        {'evkmimxrt1060_hello_world', ...}
+    """
+
+    def __init__(self, sdk_root, manifest=None):
+        self.sdk_root = os.path.abspath(sdk_root)
+        self.manifest = manifest or SDKManifest.find_max_version(self.sdk_root)
+        if not self.manifest:
+            raise ValueError(f"Unable to find SDK manifest in {sdk_root}")
+
+        # file path -> {owner}, owner is example id or component id
+        self._example_files = defaultdict(set)
+        self._component_files = defaultdict(set)
+        # directory -> [(mask, owner)]
+        self._example_masks = defaultdict(list)
+        self._component_masks = defaultdict(list)
+        # component id -> {example ids}
+        self._component_users = defaultdict(set)
+        # example directory -> {example ids}
+        self._example_dirs = defaultdict(set)
+        self._manifest_path = _norm(os.path.relpath(self.manifest.filepath, self.sdk_root))
+        self._build()
+
+    @staticmethod
+    def _add_source(files, masks, directory, mask, owner):
+        if any(char in mask for char in "*?["):
+            masks[_norm(directory)].append((mask, owner))
+        else:
+            files[_join(directory, mask)].add(owner)
+
+    def _parse_components(self):
+        """Parse component sources and dependencies from manifest.
+
+        Returns:
+            dict -- component id -> set of depended component ids
+        """
+        dependencies = dict()
+        components = None
+        for event, elem in ET.iterparse(self.manifest.filepath, events=("start", "end")):
+            if event == "start":
+                if elem.tag == "components":
+                    components = elem
+                continue
+
+            if elem.tag != "component" or components is None:
+                continue
+
+            component_id = elem.get("id")
+            if component_id:
+                for directory, mask in _iter_sources(elem, elem.get("package_base_path", "")):
+                    self._add_source(self._component_files, self._component_masks, directory, mask, component_id)
+
+                depends = set((elem.get("dependency") or "").split())
+                for node in elem.iter("dependencies"):
+                    depends.update(item.get("value") for item in node.iter() if item.get("value"))
+                dependencies[component_id] = depends
+
+            if elem in components:
+                components.remove(elem)
+
+        return dependencies
+
+    def _build(self):
+        dependencies = self._parse_components()
+
+        for example in self.manifest.examples:
+            example_id = example.id
+            path = _norm(example.attrib.get("path", ""))
+            self._example_dirs[path].add(example_id)
+
+            # sources in example xml
+            if example.example_xml:
+                xml_path = os.path.join(self.sdk_root, path, example.example_xml)
+                try:
+                    root = ET.parse(xml_path).getroot()
+                    for directory, mask in _iter_sources(root):
+                        self._add_source(self._example_files, self._example_masks, directory, mask, example_id)
+                except (IOError, ET.ParseError) as err:
+                    LOGGER.debug("unable to parse example xml %s: %s", xml_path, err)
+
+            # components, follow dependencies transitively
+            pending = list((example.attrib.get("dependency") or "").split())
+            visited = set()
+            while pending:
+                component_id = pending.pop()
+                if component_id in visited:
+                    continue
+                visited.add(component_id)
+                self._component_users[component_id].add(example_id)
+                pending.extend(dependencies.get(component_id, ()))
+
+    @staticmethod
+    def _lookup(path, files, masks):
+        owners = set(files.get(path, ()))
+        directory, name = os.path.split(path)
+        for mask, owner in masks.get(directory, ()):
+            if fnmatch.fnmatch(name, mask):
+                owners.add(owner)
+        return owners
+
+    def affected_examples(self, changed_files):
+        """Return ids of examples affected by changed files.
+
+        Arguments:
+            changed_files {list} -- file paths, absolute or relative to sdk root
+        """
+        affected = set()
+        for path in changed_files:
+            if os.path.isabs(path):
+                path = os.path.relpath(path, self.sdk_root)
+            path = _norm(path)
+
+            if path == self._manifest_path:
+                return set(example.id for example in self.manifest.examples)
+
+            affected |= self._lookup(path, self._example_files, self._example_masks)
+            for component_id in self._lookup(path, self._component_files, self._component_masks):
+                affected |= self._component_users.get(component_id, set())
+
+            directory = os.path.dirname(path)
+            while True:
+                affected |= self._example_dirs.get(directory, set())
+                if not directory:
+                    break
+                directory = os.path.dirname(directory)
+
+        return affected
+
+    def required_files(self, example_ids):
+        """Return the files the examples depend on, it is the inverse of affected_examples.
+
+        Returns:
+            tuple -- (files, masks, dirs): set of file paths, list of (directory, mask),
+                set of example directories. All paths are relative to sdk root.
+        """
+        example_ids = set(example_ids)
+        components = set(component_id for component_id, users in self._component_users.items()
+                         if users & example_ids)
+        files = {self._manifest_path}
+        masks = list()
+        for file_map, mask_map, owners in ((self._example_files, self._example_masks, example_ids),
+                                           (self._component_files, self._component_masks, components)):
+            files.update(path for path, users in file_map.items() if users & owners)
+            for directory, items in mask_map.items():
+                masks.extend((directory, mask) for mask, owner in items if owner in owners)
+
+        dirs = set(path for path, ids in self._example_dirs.items() if ids & example_ids)
+        return files, masks, dirs
+
+    def select(self, projects, changed_files, targets):
+        """Select (project, target) pairs to build for changed files.
+
+        Arguments:
+            projects {dict} -- key: toolchain name, value: a list of Project objects.
+            changed_files {list} -- changed file paths
+            targets {list} -- targets to build
+
+        Returns:
+            list -- list of (idename, project, target)
+        """
+        affected = self.affected_examples(changed_files)
+        example_dirs = set(os.path.normcase(os.path.join(self.sdk_root, path))
+                           for path, ids in self._example_dirs.items() if ids & affected)
+        pairs = list()
+        for idename, prjs in projects.items():
+            for prj in prjs:
+                example_id = getattr(prj, "example_id", None)
+                if example_id:
+                    selected = example_id in affected
+                else:
+                    selected = os.path.normcase(os.path.abspath(prj.prjdir)) in example_dirs
+                if selected:
+                    pairs.extend((idename, prj, target) for target in targets)
+
+        return pairs
@@ -0,0 +1,167 @@
+#
+
+#
+import time
+import logging
+import threading
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _scan_serial_ports():
+    from serial.tools.list_ports import comports
+    return [{
+        "device": info.device,
+        "serial_number": info.serial_number,
+        "vid": info.vid,
+        "pid": info.pid,
+        "description": info.description,
+    } for info in comports()]
+
+
+def _scan_mount_points():
+    import mbed_lstools
+    mbeds = mbed_lstools.create()
+    return {mbed["target_id"]: mbed["mount_point"] for mbed in mbeds.list_mbeds()}
+
+
+class Inventory(object):
+    """Cached inventory of probes, serial ports and mount points on the host.
+
+    Each kind of devices is enumerated once and cached, the cached data
+    expires after `ttl` seconds. On Linux, long running processes can call
+    `start_monitor()` to invalidate the cache by udev hotplug events as well,
+    if pyudev is installed. The ttl is kept as a backstop for missed events.
+
+    Example:
+        >>> INVENTORY.serial_ports()
+        [{'device': '/dev/ttyACM0', 'serial_number': '0229000005...', ...}]
+        >>> INVENTORY.lookup("0229000005")
+        {'usbid': '0229000005', 'probes': [...], 'serial_ports': ['/dev/ttyACM0'], 'mount_point': '/media/DAPLINK'}
+    """
+
+    # udev subsystem -> cache kinds to invalidate
+    SUBSYSTEMS = {
+        "tty": ("serial",),
+        "block": ("mounts",),
+        "usb": ("serial", "mounts", "probes."),
+    }
+
+    def __init__(self, ttl=10):
+        self.ttl = ttl
+        self._cache = dict()
+        self._lock = threading.RLock()
+        self._observer = None
+
+    @property
+    def is_monitoring(self):
+        return self._observer is not None
+
+    def start_monitor(self):
+        """Start udev hotplug monitor, return False if pyudev is not available."""
+        with self._lock:
+            if self._observer is not None:
+                return True
+            try:
+                import pyudev
+                context = pyudev.Context()
+                monitor = pyudev.Monitor.from_netlink(context)
+                for subsystem in self.SUBSYSTEMS:
+                    monitor.filter_by(subsystem)
+                observer = pyudev.MonitorObserver(monitor, callback=self._on_device_event,
+                                                  name="inventory-monitor")
+                observer.daemon = True
+                observer.start()
+            except Exception as err:
+                LOGGER.debug("hotplug monitor is not available: %s", err)
+                return False
+
+            self._observer = observer
+            LOGGER.debug("hotplug monitor started")
+            return True
+
+    def stop_monitor(self):
+        with self._lock:
+            if self._observer is not None:
+                self._observer.send_stop()
+                self._observer = None
+
+    def _on_device_event(self, device):
+        kinds = self.SUBSYSTEMS.get(device.subsystem, ())
+        LOGGER.debug("hotplug: %s %s", device.action, device.sys_name)
+        with self._lock:
+            for key in list(self._cache):
+                if key.startswith(kinds):
+                    del self._cache[key]
+
+    def invalidate(self, kind=None):
+        """Drop cached data, default all. "probes.jlink" also drops "probes.jlink:<exe>"."""
+        with self._lock:
+            if kind is None:
+                self._cache.clear()
+            else:
+                for key in list(self._cache):
+                    if key == kind or key.startswith(kind + ":"):
+                        del self._cache[key]
+
+    def get(self, kind, loader):
+        """Return cached data of kind, it is loaded by loader() if not cached.
+
+        Probe kinds should be named as "probes.<type>" or "probes.<type>:<tool>",
+        they are invalidated by usb events.
+        """
+        with self._lock:
+            item = self._cache.get(kind)
+            if item is not None:
+                data, loaded_at = item
+                if self.ttl is None or time.time() - loaded_at < self.ttl:
+                    return data
+
+            data = loader()
+            self._cache[kind] = (data, time.time())
+            return data
+
+    def serial_ports(self):
+        return self.get("serial", _scan_serial_ports)
+
+    def has_serial(self, port):
+        return any(port in info["device"] for info in self.serial_ports())
+
+    def mount_points(self):
+        """Return {target_id: mount_point} of mbed enabled devices."""
+        return self.get("mounts", _scan_mount_points)
+
+    def mount_point(self, usbid):
+        for target_id, mount_point in self.mount_points().items():
+            if target_id in usbid:
+                return mount_point
+        return None
+
+    def probes(self):
+        """Return all cached probes, a probe listed by multiple tools is returned once."""
+        with self._lock:
+            probes = list()
+            for kind, (data, _) in self._cache.items():
+                if kind.startswith("probes."):
+                    probes.extend(probe for probe in data if probe not in probes)
+            return probes
+
+    def lookup(self, usbid):
+        """Map usbid to probes, serial ports and mount point of the board."""
+        return {
+            "usbid": usbid,
+            "probes": [probe for probe in self.probes() if probe.get("usbid") == usbid],
+            "serial_ports": [info["device"] for info in self.serial_ports()
+                             if info["serial_number"] and usbid in info["serial_number"]],
+            "mount_point": self._safe_mount_point(usbid),
+        }
+
+    def _safe_mount_point(self, usbid):
+        try:
+            return self.mount_point(usbid)
+        except ImportError:
+            return None
+
+
+# inventory of current process
+INVENTORY = Inventory()
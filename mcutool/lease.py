@@ -0,0 +1,211 @@
+#
+
+#
+import os
+import re
+import time
+import socket
+import logging
+from contextlib import closing, contextmanager
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_LEASE_DIR = os.path.expanduser('~') + '/.mcutool/leases'
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock_file(fobj):
+        fobj.seek(0)
+        msvcrt.locking(fobj.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def _unlock_file(fobj):
+        fobj.seek(0)
+        msvcrt.locking(fobj.fileno(), msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _lock_file(fobj):
+        fcntl.flock(fobj.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock_file(fobj):
+        fcntl.flock(fobj.fileno(), fcntl.LOCK_UN)
+
+
+class LeaseTimeout(Exception):
+    pass
+
+
+class FileLock(object):
+    """An inter-process exclusive lock backed by a lock file.
+
+    The lock is released by OS when the process exits, so a crashed job never
+    leaves a stale lease.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fobj = None
+
+    @property
+    def locked(self):
+        return self._fobj is not None
+
+    def acquire(self, blocking=True, timeout=None, interval=0.1):
+        """Acquire the lock.
+
+        Arguments:
+            blocking {bool} -- wait until the lock is free
+            timeout {float} -- max seconds to wait, None to wait forever
+
+        Returns:
+            bool -- True if the lock is acquired
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        deadline = None if timeout is None else time.time() + timeout
+        fobj = open(self.path, "a+")
+        while True:
+            try:
+                _lock_file(fobj)
+                break
+            except OSError:
+                if not blocking or (deadline is not None and time.time() >= deadline):
+                    fobj.close()
+                    return False
+                time.sleep(interval)
+
+        # record the owner for diagnosis
+        try:
+            fobj.seek(0)
+            fobj.truncate()
+            fobj.write(f"{os.getpid()}\n")
+            fobj.flush()
+        except OSError:
+            pass
+        self._fobj = fobj
+        return True
+
+    def release(self):
+        if self._fobj is None:
+            return
+        try:
+            _unlock_file(self._fobj)
+        finally:
+            self._fobj.close()
+            self._fobj = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+
+def _port_is_free(port):
+    with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as sock:
+        try:
+            sock.bind(("", port))
+            return True
+        except OSError:
+            return False
+
+
+class LeaseManager(object):
+    """Host level leases of probes, serial ports and gdb ports.
+
+    Leases are file locks in `lease_dir`, so they are shared by all processes
+    on the host, like concurrent xpc.py jobs. A job asking for a busy resource
+    waits until it is released.
+
+    Example:
+        >>> manager = LeaseManager()
+        >>> with manager.lease(["probe:62100000", "serial:/dev/ttyACM0"]):
+        ...     port = manager.lease_port()
+        ...     ... flash and test
+    """
+
+    PORT_RANGE = (3333, 4333)
+
+    def __init__(self, lease_dir=DEFAULT_LEASE_DIR):
+        self.lease_dir = lease_dir
+        self._locks = dict()
+
+    def _lock(self, name):
+        filename = re.sub(r"[^\w.-]", "_", name) + ".lock"
+        return FileLock(os.path.join(self.lease_dir, filename))
+
+    def acquire(self, names, timeout=None):
+        """Acquire leases of resources, it waits until all of them are free.
+
+        Resources are locked in sorted order, so jobs sharing resources never deadlock.
+
+        Raises:
+            LeaseTimeout -- resources are still busy after timeout
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        acquired = list()
+        for name in sorted(set(names)):
+            if name in self._locks:
+                continue
+            lock = self._lock(name)
+            remaining = None if deadline is None else max(deadline - time.time(), 0)
+            LOGGER.debug("waiting for lease: %s", name)
+            if not lock.acquire(timeout=remaining):
+                for item in acquired:
+                    self.release([item])
+                raise LeaseTimeout(f"resource is busy: {name}")
+            self._locks[name] = lock
+            acquired.append(name)
+        return acquired
+
+    def release(self, names=None):
+        """Release leases, default all."""
+        for name in list(self._locks if names is None else names):
+            lock = self._locks.pop(name, None)
+            if lock:
+                lock.release()
+
+    @contextmanager
+    def lease(self, names, timeout=None):
+        acquired = self.acquire(names, timeout)
+        try:
+            yield acquired
+        finally:
+            self.release(acquired)
+
+    def lease_port(self, preferred=None):
+        """Lease a free TCP port for gdbserver.
+
+        The port lock is held until it is released, other processes skip it even
+        if gdbserver has not bound it yet.
+
+        Returns:
+            int -- port number
+        """
+        start, end = self.PORT_RANGE
+        candidates = list(range(start, end))
+        if preferred:
+            candidates.insert(0, int(preferred))
+
+        for port in candidates:
+            name = f"port:{port}"
+            if name in self._locks:
+                continue
+            lock = self._lock(name)
+            if not lock.acquire(blocking=False):
+                continue
+            if _port_is_free(port):
+                self._locks[name] = lock
+                return port
+            lock.release()
+
+        raise LeaseTimeout(f"no free port in range {start}-{end}")
+
+    def release_port(self, port):
+        self.release([f"port:{port}"])
+
+
+# leases of current process
+HOST_LEASES = LeaseManager()
@@ -1,15 +1,18 @@
 
 
 import os
+import re
+import fnmatch
 import logging
 import time
+from pathlib import Path
 from collections import defaultdict
 from xml.etree import cElementTree as ET
 
 import click
 from globster import Globster
 
-from mcutool.compilers.projectbase import ProjectBase
+from mcutool.compilers.projectbase import ProjectBase, parse_projects
 from mcutool.compilers import compilerfactory, SUPPORTED_TOOLCHAINS
 from mcutool.sdk_manifest import SDKManifest
 from mcutool.exceptions import ProjectNotFound, ProjectParserError
@@ -26,7 +29,7 @@ EXCLUDE_DIR_NAME = [
     '.debug/',
     '.release/',
     'RTE/',
-    'settings/'
+    'settings/',
     '.git/',
     '__pycache__/',
     'flexspi_nor_debug/',
@@ -80,42 +83,184 @@ def identify_project(path, toolname=None, manifest_check=True):
     return prj
 
 
-def _find_projects(projects, dir):
+def _compile_patterns():
+    """Return a list of (project class, [compiled patterns]) for all toolchains."""
+    matchers = list()
     for cls in IDE_INS:
-        prjs = cls.Project.fromdir(dir)
-        if prjs:
-            for prj in prjs:
-                projects[prj.idename].append(prj)
-            break
+        ptrs = [re.compile(fnmatch.translate(os.path.normcase(ptr))) for ptr in cls.Project.get_ptrs()]
+        matchers.append((cls.Project, ptrs))
+    return matchers
+
+
+def _scan_dir(dir, matchers):
+    """Scan a directory with one os.scandir call.
+
+    Returns:
+        tuple: (candidates, subdirs), candidates is a list of (project class, [files])
+        for all toolchains, subdirs is a list of (path, is_symlink) not excluded.
+    """
+    files = list()
+    subdirs = list()
+    try:
+        with os.scandir(dir) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    if not Exclude_Matcher.match(entry.name):
+                        subdirs.append((entry.path, entry.is_symlink()))
+                elif entry.is_file():
+                    files.append((os.path.normcase(entry.name), entry.path))
+    except OSError as err:
+        LOGGER.debug("cannot scan %s: %s", dir, err)
+
+    candidates = list()
+    for prj_cls, ptrs in matchers:
+        matched = list()
+        for ptr in ptrs:
+            matched.extend(Path(path) for name, path in files if ptr.match(name))
+        candidates.append((prj_cls, matched))
+
+    return candidates, subdirs
+
+
+def _walk_subdirs(subdirs, matchers):
+    """Walk sub directories, siblings are yielded before their children,
+    this is the same order as the scanning with os.walk.
+    """
+    scanned = list()
+    for path, is_symlink in subdirs:
+        candidates, children = _scan_dir(path, matchers)
+        scanned.append((children, is_symlink))
+        yield candidates
+
+    for children, is_symlink in scanned:
+        # do not follow symlinks, same as os.walk
+        if not is_symlink:
+            yield from _walk_subdirs(children, matchers)
+
+
+def walk_candidates(dirs, recursive=False):
+    """Single pass walker to collect candidate project files of all toolchains.
+
+    Each directory is scanned by os.scandir only once, the excluded
+    directories are pruned.
 
-def find_projects_from_dir(dirs, recursive=False):
+    Yields:
+        list: (project class, [files]) for all toolchains in a directory.
+    """
+    matchers = _compile_patterns()
+    for dir in dirs:
+        if os.path.isfile(dir):
+            yield [(prj_cls, [Path(dir)]) for prj_cls, _ in matchers]
+            continue
+
+        candidates, subdirs = _scan_dir(dir, matchers)
+        yield candidates
+
+        if recursive:
+            yield from _walk_subdirs(subdirs, matchers)
+
+
+def _parse_candidates(projects, scan_candidates, jobs=None):
+    """Parse candidate files for each directory. In a directory, the projects of
+    the first toolchain in IDE_INS which has projects are taken.
+
+    Toolchains are parsed in rounds by the order of IDE_INS, a directory is not
+    parsed any more once its projects are found, the files of each round are
+    parsed in parallel.
+    """
+    pending = [candidates for candidates in scan_candidates if candidates]
+    rank = 0
+    while pending:
+        tasks = list()
+        groups = list()
+        for candidates in pending:
+            prj_cls, files = candidates[rank]
+            groups.append((len(tasks), len(files)))
+            tasks.extend((prj_cls, filepath) for filepath in files)
+
+        results = parse_projects(tasks, jobs) if tasks else list()
+        rank += 1
+        remaining = list()
+        for candidates, (offset, count) in zip(pending, groups):
+            prjs = [prj for prj in results[offset:offset + count] if prj]
+            if prjs:
+                for prj in prjs:
+                    projects[prj.idename].append(prj)
+            elif rank < len(candidates):
+                remaining.append(candidates)
+        pending = remaining
+
+
+def find_projects_from_dir(dirs, recursive=False, jobs=None):
     """Find projects from a list of directories.
 
     Args:
         dirs ([list]): list of directories to search
         recursive (bool, optional): Recursive to search. Defaults to False.
+        jobs (int, optional): number of worker processes to parse projects,
+            0 means the number of CPUs. Defaults to None, parse in current process.
 
     Returns:
         [type]: [description]
     """
     projects = defaultdict(list)
-    for dir in dirs:
-        _find_projects(projects, dir)
+    _parse_candidates(projects, walk_candidates(dirs, recursive), jobs)
+    return projects
 
-        if recursive:
-            for root, folders, _ in os.walk(dir, topdown=True):
-                for folder in folders:
-                    if Exclude_Matcher.match(folder):
-                        continue
 
-                    path = os.path.join(root, folder)
-                    _find_projects(projects, path)
+def resolve_candidates(manifest, sdk_root, root_dir=None, boards=None):
+    """Resolve candidate project files from examples in SDK manifest.
 
-    return projects
+    The project files are computed from the example path and example xml
+    in manifest, no directory is walked.
+
+    Arguments:
+        manifest {SDKManifest} -- manifest object
+        sdk_root {str} -- SDK root directory
+        root_dir {str} -- only examples under this directory are resolved
+        boards {list} -- only resolve examples of these boards
+
+    Returns:
+        list: candidates of each example, (project class, [files]) for all toolchains.
+        None if a toolchain does not support to resolve from manifest.
+    """
+    sdk_root = os.path.abspath(sdk_root)
+    prefix = None
+    if root_dir:
+        prefix = os.path.relpath(os.path.abspath(root_dir), sdk_root).replace("\\", "/")
+        prefix = None if prefix == "." else prefix + "/"
+
+    scan_candidates = list()
+    for example in manifest.examples:
+        path = example.attrib.get("path", "")
+        if prefix and not (path + "/").startswith(prefix):
+            continue
+
+        if boards and example.board not in boards:
+            # board directory in the path, boards/<board>/...
+            parts = path.split("/")
+            if len(parts) < 2 or parts[1] not in boards:
+                continue
+
+        candidates = list()
+        for cls in IDE_INS:
+            files = cls.Project.manifest_files(manifest, example)
+            if files is None:
+                return None
+            candidates.append((cls.Project, [Path(sdk_root, file) for file in files
+                if os.path.isfile(os.path.join(sdk_root, file))]))
+        scan_candidates.append(candidates)
+
+    return scan_candidates
 
 
-def find_projects_from_manifests(sdk_dir, manifests=None):
-    """Find projects by searching in SDK manifest."""
+def find_projects_from_manifests(sdk_dir, manifests=None, jobs=None, root_dir=None, boards=None):
+    """Find projects by resolving examples in SDK manifest.
+
+    Returns:
+        {dict} -- key: toolchain name, value: a list of Project objects.
+        None if the projects cannot be resolved from manifest.
+    """
     if not manifests:
         if not sdk_dir:
             raise ValueError('invalid sdk_dir')
@@ -126,34 +271,33 @@ def find_projects_from_manifests(sdk_dir, manifests=None):
 
     projects = defaultdict(list)
     for manifest in manifests:
-        examples = manifest.dump_examples()
-        search_folders = list()
-
-        # get all examples root dir
-        for example in examples:
-            example_root = "/".join(example["path"].split("/")[:2])
-            if example_root not in search_folders:
-                search_folders.append(example_root)
+        scan_candidates = resolve_candidates(manifest, sdk_dir, root_dir, boards)
+        if scan_candidates is None:
+            return None
 
-        # get abs search dir
-        search_folders = [sdk_dir + "/" + path for path in search_folders]
         ProjectBase.SDK_MANIFEST = manifest
-        manifest_prjs = find_projects_from_dir(search_folders, recursive=True)
-        if manifest_prjs:
-            for key, value in manifest_prjs.items():
-                projects[key].extend(value)
+        _parse_candidates(projects, scan_candidates, jobs)
 
     return projects
 
 
-def find_projects(root_dir, recursive=True, include_tools=None, exclude_tools=None, manifests_dir=None):
+def find_projects(root_dir, recursive=True, include_tools=None, exclude_tools=None, manifests_dir=None,
+        jobs=None, boards=None, names=None, from_manifest=True):
     """Find SDK projects/examples in specific directory.
 
+    When SDK manifest is found, the projects are resolved from the examples
+    in manifest directly, otherwise the directory is searched.
+
     Arguments:
         root_dir {string} -- root directory
         recursive {bool} -- recursive mode
         include_tools {list} -- only include specifices tools
         exclude_tools {list} -- exlucde specifices tools
+        jobs {int} -- number of worker processes to parse projects, 0 means the
+            number of CPUs, default None parse in current process.
+        boards {list} -- only find projects of these boards (manifest only)
+        names {list} -- only find projects with these names (Project.name)
+        from_manifest {bool} -- resolve projects from manifest, default True.
     Returns:
         {dict} -- key: toolchain name, value: a list of Project objects.
 
@@ -178,6 +322,10 @@ def find_projects(root_dir, recursive=True, include_tools=None, exclude_tools=No
     else:
         sdk_root = root_dir
 
+    # manifest instances are shared by path and mtime, only the directory
+    # resolution is reset for each scanning.
+    SDKManifest.clear_cache()
+
     # try to find manifest in current directory
     sdk_manifest = SDKManifest.find_max_version(sdk_root)
     if sdk_manifest:
@@ -194,14 +342,24 @@ def find_projects(root_dir, recursive=True, include_tools=None, exclude_tools=No
             ]
         manifest_list = SDKManifest.find(search_dirs)
 
+    projects = None
+    if sdk_manifest and from_manifest and recursive and os.path.isdir(root_dir):
+        projects = find_projects_from_manifests(sdk_root, manifests=[sdk_manifest], jobs=jobs,
+            root_dir=root_dir, boards=boards)
+
     # multiple manifests, use manifest to search projects
-    if manifest_list:
+    elif manifest_list:
         print('Multiple manifest files were found in %s' % manifests_dir)
-        projects = find_projects_from_manifests(sdk_root, manifests=manifest_list)
-    else:
-        projects = find_projects_from_dir([root_dir], recursive=recursive)
+        projects = find_projects_from_manifests(sdk_root, manifests=manifest_list, jobs=jobs,
+            boards=boards)
+
+    if projects is None:
+        projects = find_projects_from_dir([root_dir], recursive=recursive, jobs=jobs)
 
     if projects:
+        if names:
+            projects = {k: [prj for prj in v if prj.name in names] for k, v in projects.items()}
+
         if include_tools:
             projects = {k: v for k, v in projects.items() if k in include_tools}
 
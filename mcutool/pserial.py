@@ -9,9 +9,9 @@ from functools import partial
 
 from serial import PortNotOpenError
 from serial import Serial as PY_SERIAL
-from serial.tools.list_ports import comports
 from serial.threaded import Protocol, ReaderThread
 from app_test.serialspawn import SerialSpawn
+from mcutool.inventory import INVENTORY
 
 
 LOGGER = logging.getLogger(__name__)
@@ -136,11 +136,10 @@ class Serial(PY_SERIAL):
     @property
     def is_installed(self):
         """ Return a boolean value to check if this serial device is installed """
-        ports_list = comports()
-        for port_info in ports_list:
-            if self.port in port_info.device:
-                return True
-        return False
+        # cached ports may be stale for ttl seconds without hotplug monitor
+        if not INVENTORY.is_monitoring:
+            INVENTORY.invalidate("serial")
+        return INVENTORY.has_serial(self.port)
 
 
 class VirtualSerial(Serial):
@@ -6,9 +6,150 @@ import tempfile
 import subprocess
 from pathlib import Path
 from xml.etree import ElementTree as ET
+from xml.sax.saxutils import escape, quoteattr
 from packaging import version
 
 
+class BoardRecord(object):
+    """Compact record of a <board> node in manifest."""
+
+    __slots__ = ("id", "name")
+
+    def __init__(self, attrib):
+        self.id = attrib.get("id")
+        self.name = attrib.get("name")
+
+
+class ToolchainRecord(object):
+    """Compact record of a <toolchain> node in manifest."""
+
+    __slots__ = ("id", "name")
+
+    def __init__(self, attrib):
+        self.id = attrib.get("id")
+        self.name = attrib.get("name")
+
+
+class CoreRecord(object):
+    """Compact record of a <device>/<core> node in manifest."""
+
+    __slots__ = ("name", "id", "slave_roles")
+
+    def __init__(self, attrib):
+        self.name = attrib.get("name")
+        self.id = attrib.get("id")
+        self.slave_roles = attrib.get("slave_roles")
+
+
+class ExampleRecord(object):
+    """Compact record of a <board>/<examples>/<example> node in manifest.
+
+    Only the attributes and the example xml filename are kept, the
+    children of the node are discarded.
+    """
+
+    __slots__ = ("attrib", "example_xml", "ordinal", "board")
+
+    def __init__(self, attrib, ordinal, board=None):
+        self.attrib = dict(attrib)
+        self.ordinal = ordinal
+        self.board = board
+        self.example_xml = None
+
+    @property
+    def id(self):
+        return self.attrib.get("id")
+
+    def to_dict(self):
+        """Convert record to the example info dict."""
+        example_info = dict(self.attrib)
+        example_info['example.xml'] = self.example_xml
+        return example_info
+
+
+class _ManifestHandler(object):
+    """Parser target to collect compact records from manifest events.
+
+    Elements are never built unless a `builder` is given, in that case
+    all events are forwarded to it to create the full tree.
+    """
+
+    def __init__(self, manifest, builder=None):
+        self.manifest = manifest
+        self.builder = builder
+        self.path = list()
+        self.root_found = False
+        self.board = None
+        self.example = None
+        self.in_xml_external = False
+        self.ordinal = 0
+
+    def start(self, tag, attrib):
+        if self.builder is not None:
+            self.builder.start(tag, attrib)
+
+        if not self.root_found:
+            self.root_found = True
+            self.manifest._root_info = dict(attrib)
+            return
+
+        path = self.path
+        path.append(tag)
+        depth = len(path)
+        section = path[0]
+
+        if depth == 1:
+            if tag == "ksdk":
+                self.manifest._sdk_version = attrib['version']
+        elif depth == 2:
+            if section == "boards" and tag == "board":
+                self.board = BoardRecord(attrib)
+                self.manifest._boards.append(self.board)
+            elif section == "toolchains" and tag == "toolchain":
+                self.manifest._toolchains.append(ToolchainRecord(attrib))
+            elif section == "core_slave_roles_definitions" and tag == "slave_role":
+                self.manifest._slave_roles.append(dict(attrib))
+        elif depth == 3:
+            if section == "boards" and tag == "examples":
+                self.ordinal = 0
+            elif section == "devices" and tag == "core" and path[1] == "device":
+                self.manifest._cores.append(CoreRecord(attrib))
+        elif self.example is None:
+            if depth == 4 and section == "boards" and tag == "example" and path[2] == "examples":
+                self.example = ExampleRecord(attrib, self.ordinal, self.board.id)
+                self.manifest._examples.append(self.example)
+                self.ordinal += 1
+        elif self.example.example_xml is None:
+            # first <external type="xml"><files mask=""/></external>
+            if depth == 5 and tag == "external" and attrib.get("type") == "xml":
+                self.in_xml_external = True
+            elif depth == 6 and self.in_xml_external and tag == "files":
+                self.example.example_xml = attrib.get("mask")
+
+    def end(self, tag):
+        if self.builder is not None:
+            self.builder.end(tag)
+
+        if not self.path:
+            return
+
+        depth = len(self.path)
+        if depth == 4:
+            self.example = None
+        elif depth == 5:
+            self.in_xml_external = False
+        self.path.pop()
+
+    def data(self, data):
+        if self.builder is not None:
+            self.builder.data(data)
+
+    def close(self):
+        if self.builder is not None:
+            return self.builder.close()
+        return None
+
+
 class SDKManifest(object):
     """NXP MCUXpresso SDK Manifest Parser.
 
@@ -18,63 +159,198 @@ class SDKManifest(object):
         >>> mf = SDKManifest("./board_EVK-MIMX8ULP_manifest_v3_8.xml")
         >>> mf.sdk_version
         >>> mf.dump_examples()
+
+    By default the manifest is parsed in streaming mode: the parser events are
+    consumed on the fly and only compact records of boards, toolchains, examples
+    and cores are kept, no XML element is kept alive.
+    Set `streaming=False` to keep the full XML tree in `_xmlroot`.
     """
 
+    # process-wide caches
+    # {abspath: (mtime, SDKManifest)}
+    _INSTANCES = dict()
+    # {directory: SDKManifest or None}, max version manifest in directory
+    _DIR_CACHE = dict()
+    # {directory: SDKManifest or None}, resolved manifest from parents
+    _PARENTS_CACHE = dict()
+
+    @staticmethod
+    def read_header(filepath):
+        """Read attributes of the manifest root element only.
+
+        The parsing is stopped at the first start event, so the cost does not
+        depend on the size of manifest. None is returned if the file is not
+        a valid manifest.
+        """
+        try:
+            with open(filepath, "rb") as fobj:
+                for _, elem in ET.iterparse(fobj, events=("start",)):
+                    if not elem.tag.endswith("manifest"):
+                        break
+                    return dict(elem.attrib)
+        except (IOError, ET.ParseError) as err:
+            logging.debug("Bad manifest: %s, Reason: %s", filepath, err)
+
+        return None
+
     @classmethod
-    def find(cls, dirs):
-        """Find manifest from given directories."""
+    def probe(cls, dirs):
+        """Probe manifest files from given directories.
 
+        Returns:
+            List: list of tuple (filepath, root attributes)
+        """
         if not isinstance(dirs, list):
             dirs = [dirs]
 
-        manifests = list()
+        headers = list()
         for dir in dirs:
             for per_file in Path(dir).glob(f"*_manifest*.xml"):
-                manifest_obj = cls(str(per_file))
-                if manifest_obj is not None:
-                    manifests.append(manifest_obj)
+                header = cls.read_header(str(per_file))
+                if header is not None:
+                    headers.append((str(per_file), header))
+
+        return headers
+
+    @classmethod
+    def find(cls, dirs):
+        """Find manifest from given directories."""
+
+        manifests = list()
+        for filepath, _ in cls.probe(dirs):
+            manifests.append(cls.load(filepath))
 
         return manifests
 
     @classmethod
     def find_from_parents(cls, dir):
         """Find manifest from the give path of parent.
+
+        Results are cached for every directory walked through, including
+        negative results, so sibling projects will not walk the tree again.
+        Call `SDKManifest.clear_cache()` to reset.
         """
         abs_path = os.path.abspath(dir.replace('\\', '/'))
-        def _search_dir():
-            current_dir = abs_path
-            while True:
-                parent_dir = os.path.dirname(current_dir)
-                # system root
-                if parent_dir == current_dir:
-                    break
-                manifest = cls.find_max_version(parent_dir)
-                if manifest:
-                    return manifest
-                current_dir = parent_dir
+        visited = list()
+        current_dir = abs_path
+        manifest = None
+        while True:
+            if current_dir in cls._PARENTS_CACHE:
+                manifest = cls._PARENTS_CACHE[current_dir]
+                break
+
+            visited.append(current_dir)
+            parent_dir = os.path.dirname(current_dir)
+            # system root
+            if parent_dir == current_dir:
+                break
+
+            if parent_dir not in cls._DIR_CACHE:
+                cls._DIR_CACHE[parent_dir] = cls.find_max_version(parent_dir)
+
+            manifest = cls._DIR_CACHE[parent_dir]
+            if manifest:
+                break
+            current_dir = parent_dir
+
+        for path in visited:
+            cls._PARENTS_CACHE[path] = manifest
+
+        return manifest
+
+    @classmethod
+    def load(cls, filepath):
+        """Return a shared manifest instance by file path.
+
+        The instance is cached by file path and modification time, the
+        manifest is parsed again only when it is changed.
+        """
+        key = os.path.abspath(filepath)
+        mtime = os.path.getmtime(key)
+        cached = cls._INSTANCES.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
 
-        manifest = _search_dir()
-        if manifest:
-            return manifest
+        manifest = cls(filepath)
+        cls._INSTANCES[key] = (mtime, manifest)
+        return manifest
+
+    @classmethod
+    def clear_cache(cls, instances=False):
+        """Clear the cached directories resolution.
+
+        Args:
+            instances (bool, optional): also drop shared manifest instances. Default False.
+        """
+        cls._DIR_CACHE.clear()
+        cls._PARENTS_CACHE.clear()
+        if instances:
+            cls._INSTANCES.clear()
 
     @classmethod
     def find_max_version(cls, dirs):
-        """Find and return the maximum version of manifest from given paths."""
+        """Find and return the maximum version of manifest from given paths.
+
+        Only the root element of each manifest is read to compare the
+        format_version, the winner is fully parsed.
+        """
         if isinstance(dirs, str):
             dirs = [dirs]
 
-        manifests = SDKManifest.find(dirs)
-        if not manifests:
+        headers = cls.probe(dirs)
+        if not headers:
             return
 
-        return sorted(manifests, key=lambda m: version.parse(m.manifest_version))[-1]
+        filepath, _ = sorted(headers, key=lambda h: version.parse(h[1].get("format_version", "0")))[-1]
+        return cls.load(filepath)
 
-    def __init__(self, filepath):
+    def __init__(self, filepath, streaming=True):
         self._filepath = filepath
-        self._xmlroot = ET.parse(filepath).getroot()
+        self._xmlroot = None
         self._sdk_root = os.path.dirname(filepath)
-        self._root_info = self._xmlroot.attrib
-        self._sdk_version = self._xmlroot.find('./ksdk').attrib['version']
+        self._root_info = dict()
+        self._sdk_version = None
+        self._boards = list()
+        self._toolchains = list()
+        self._examples = list()
+        self._cores = list()
+        self._slave_roles = list()
+        self._example_index = dict()
+        self._linked = dict()
+        self._parse(filepath, streaming)
+        self._build_index()
+
+    def _parse(self, filepath, streaming=True):
+        """Parse manifest as a stream of events and collect compact records.
+
+        In streaming mode, no XML element is created, so the peak memory does
+        not depend on the size of the manifest.
+        """
+        builder = None if streaming else ET.TreeBuilder()
+        parser = ET.XMLParser(target=_ManifestHandler(self, builder))
+        with open(filepath, "rb") as fobj:
+            while True:
+                chunk = fobj.read(64 * 1024)
+                if not chunk:
+                    break
+                parser.feed(chunk)
+        self._xmlroot = parser.close()
+
+    def _build_index(self):
+        """Index example records by id, name and path, and build the adjacency
+        map of linked projects. The first record wins for duplicated keys.
+        """
+        self._example_index = {key: dict() for key in ("id", "name", "path")}
+        self._linked = dict()
+        for example in self._examples:
+            for key, index in self._example_index.items():
+                value = example.attrib.get(key)
+                if value is not None:
+                    index.setdefault(value, example)
+
+            linked_id = example.attrib.get("linked_projects")
+            if linked_id and example.id not in self._linked:
+                self._linked[example.id] = linked_id
 
     def __eq__(self, other):
         if isinstance(other, self.__class__):
@@ -120,33 +396,32 @@ class SDKManifest(object):
 
     @property
     def boards(self):
-        xpath = './boards/board'
-        nodes = self._xmlroot.findall(xpath)
-        return [n.attrib['id'] for n in nodes]
+        return [board.id for board in self._boards]
 
     @property
     def toolchains(self):
         """Return list of toolchains."""
-        xpath = './toolchains/toolchain'
-        nodes = self._xmlroot.findall(xpath)
-        return [n.attrib['id'] for n in nodes]
+        return [toolchain.id for toolchain in self._toolchains]
+
+    @property
+    def examples(self):
+        """Return list of example records."""
+        return list(self._examples)
 
     @property
     def core_slave_roles_definitions(self):
-        nodes = self._xmlroot.findall('./core_slave_roles_definitions/slave_role')
-        return [n.attrib for n in nodes]
+        return [dict(role) for role in self._slave_roles]
 
     @property
     def slave_core(self):
         """Get slave core name."""
-        nodes = self._xmlroot.findall('./devices/device/core')
-        for node in nodes:
-            if node.attrib.get("slave_roles"):
-                return node.get("name")
+        for core in self._cores:
+            if core.slave_roles:
+                return core.name
         return
 
     def _find_example_node(self, key, value):
-        """Find example node by attributes:
+        """Find example record by attributes:
 
             - id
             - name
@@ -155,25 +430,19 @@ class SDKManifest(object):
         """
         assert key in ("id", "name", "path")
 
-        xpath = f'./boards/board/examples/example[@{key}="{value}"]'
-        node = self._xmlroot.find(xpath)
-        if node is None:
-            logging.debug("Cannot found example in manifest, xpath: %s", xpath)
-            return
+        example = self._example_index[key].get(value)
+        if example is not None:
+            return example
 
-        return node
+        logging.debug("Cannot found example in manifest, %s: %s", key, value)
+        return
 
     def _get_example_info(self, node):
-        """Convert XML node to dict.
+        """Convert example record to dict.
         """
         if node is None:
             return
-        example_info = dict()
-        example_info.update(node.attrib)
-        xml_node = node.find('./external[@type="xml"]')
-        xml_filename = xml_node.find('./files').attrib['mask']
-        example_info['example.xml'] = xml_filename
-        return example_info
+        return node.to_dict()
 
     def find_example(self, example_id):
         """
@@ -190,32 +459,20 @@ class SDKManifest(object):
         node = self._find_example_node("path", path)
         return self._get_example_info(node)
 
-    def _get_linked_projects(self, example_id, results=None):
-        if results is None:
-            results = list()
-
-        node = self._find_example_node("id", example_id)
-
-        if node is None:
-            return results
-
-        if node in results:
-            return results
-
-        parents = self._xmlroot.findall("./boards/board/examples")
-        for parent in parents:
-            try:
-                node.attrib["_index_"] = str(list(parent).index(node))
+    def _get_linked_projects(self, example_id):
+        """Follow the linked chain from example_id, the last linked one is the first."""
+        results = list()
+        visited = set()
+        while example_id and example_id not in visited:
+            node = self._example_index["id"].get(example_id)
+            if node is None:
                 break
-            except ValueError:
-                pass
-        results.insert(0, node)
-        linked_id = node.attrib.get("linked_projects")
-
-        if not linked_id:
-            return results
+            visited.add(example_id)
+            results.append(node)
+            example_id = self._linked.get(example_id)
 
-        return self._get_linked_projects(linked_id, results)
+        results.reverse()
+        return results
 
     def find_linked_projects(self, example_id):
         """Return a list of example info. It is ordered by the linked
@@ -234,7 +491,7 @@ class SDKManifest(object):
             List: List of dict
         """
         nodes = self._get_linked_projects(example_id)
-        nodes = sorted(nodes, key=lambda x: int(x.attrib["_index_"]))
+        nodes = sorted(nodes, key=lambda x: x.ordinal)
 
         # check and re-sort the order by slave core name
         if self.slave_core:
@@ -256,18 +513,276 @@ class SDKManifest(object):
         """
         Return a list of examples.
         """
-        xpath = './boards/board/examples/example'
         examples = list()
-        for example_node in self._xmlroot.findall(xpath):
+        for example in self._examples:
             examples.append({
-                'toolchain': example_node.attrib['toolchain'].split(" "),
-                'path': example_node.attrib['path'],
-                'name': example_node.attrib['name'],
-                'category': example_node.attrib['category']
+                'toolchain': example.attrib['toolchain'].split(" "),
+                'path': example.attrib['path'],
+                'name': example.attrib['name'],
+                'category': example.attrib['category']
             })
         return examples
 
 
+XSI_NAMESPACE = "http://www.w3.org/2001/XMLSchema-instance"
+KSDK_NAMESPACE = "http://nxp.com/ksdk/2.0/ksdk_manifest_v3.0.xsd"
+
+
+class _MergedSection(object):
+    """Serialized items of a top level section in merged manifest."""
+
+    __slots__ = ("tag", "attrib", "text", "items", "keys")
+
+    def __init__(self, tag, attrib):
+        self.tag = tag
+        self.attrib = dict(attrib)
+        self.text = None
+        self.items = list()
+        # {(tag, id): index of item}
+        self.keys = dict()
+
+
+def _element_key(elem):
+    return (elem.tag, elem.get("id")) if elem.get("id") else None
+
+
+def _serialize(elem):
+    """Serialize element without its tail."""
+    tail, elem.tail = elem.tail, None
+    try:
+        return ET.tostring(elem, encoding="unicode").strip()
+    finally:
+        elem.tail = tail
+
+
+def _merge_element(target, source, path):
+    """Merge source element into target element with the same tag and id.
+
+    Missing attributes and children are added to target, children with the
+    same tag and id, or containers with the same tag and no id, are merged
+    recursively, identical children are merged only once. A conflicting
+    attribute is reported and the first value wins.
+    """
+    for name, value in source.attrib.items():
+        if name not in target.attrib:
+            target.set(name, value)
+        elif target.get(name) != value:
+            logging.warning("manifest conflict: %s@%s, '%s' is kept, '%s' is dropped",
+                            path, name, target.get(name), value)
+
+    if not (target.text and target.text.strip()) and source.text and source.text.strip():
+        target.text = source.text
+
+    keyed = dict()
+    containers = dict()
+    serialized = set()
+    for child in target:
+        key = _element_key(child)
+        if key:
+            keyed[key] = child
+        else:
+            containers.setdefault((child.tag, tuple(sorted(child.attrib.items()))), child)
+            serialized.add(_serialize(child))
+
+    for child in list(source):
+        key = _element_key(child)
+        if key in keyed:
+            _merge_element(keyed[key], child, f"{path}/{child.tag}[{key[1]}]")
+            continue
+
+        if key is None:
+            if _serialize(child) in serialized:
+                continue
+            # container without id, like <examples>, merge the children
+            container = containers.get((child.tag, tuple(sorted(child.attrib.items()))))
+            if container is not None and len(child) and len(container):
+                _merge_element(container, child, f"{path}/{child.tag}")
+                continue
+
+        child.tail = None
+        target.append(child)
+        if key:
+            keyed[key] = child
+
+
+def _resolve_include(path, manifest_dir, sdk_root):
+    """Sub-manifest path is relative to repository root or the including manifest."""
+    for base in (sdk_root, manifest_dir):
+        filepath = os.path.normpath(os.path.join(base, path))
+        if os.path.isfile(filepath):
+            return filepath
+    raise IOError(f"Unable to find sub-manifest: {path}")
+
+
+def find_sub_manifests(manifest, sdk_root):
+    """Return the manifest and all sub-manifests it references, recursively.
+
+    Only `<include>` elements are looked for, other elements are released
+    as soon as they are parsed. Missing sub-manifests are skipped.
+
+    Returns:
+        {list} absolute paths of manifest files.
+    """
+    found = list()
+    pending = [os.path.abspath(manifest)]
+    while pending:
+        filepath = pending.pop(0)
+        if filepath in found:
+            continue
+        found.append(filepath)
+
+        manifest_dir = os.path.dirname(filepath)
+        for _, elem in ET.iterparse(filepath, events=("end",)):
+            if elem.tag == "include" and elem.get("path"):
+                try:
+                    pending.append(os.path.abspath(_resolve_include(elem.get("path"), manifest_dir, sdk_root)))
+                except IOError as err:
+                    logging.debug(err)
+            elem.clear()
+    return found
+
+
+def _merge_manifest_part(filepath, sdk_root, sections, state, visited):
+    """Stream one manifest file into sections, and follow its sub-manifest references.
+
+    Items of sections are serialized and released as soon as they are parsed.
+    Sub-manifests are merged after all items of this manifest, in the order
+    they are referenced.
+    """
+    filepath = os.path.abspath(filepath)
+    if filepath in visited:
+        logging.debug("sub-manifest is already merged: %s", filepath)
+        return
+    visited.add(filepath)
+
+    manifest_dir = os.path.dirname(filepath)
+    stack = list()
+    includes = list()
+    for event, elem in ET.iterparse(filepath, events=("start", "start-ns", "end")):
+        if event == "start-ns":
+            if state["root"] is None:
+                state["nsmap"].append(elem)
+            continue
+
+        if event == "start":
+            stack.append(elem)
+            depth = len(stack)
+            if depth == 1:
+                if state["root"] is None:
+                    state["root"] = (elem.tag, dict(elem.attrib))
+            elif depth == 2 and elem.tag not in sections and elem.tag != "include":
+                sections[elem.tag] = _MergedSection(elem.tag, elem.attrib)
+            continue
+
+        depth = len(stack)
+        stack.pop()
+        if elem.tag == "include" and depth in (2, 3):
+            includes.append(elem.get("path"))
+            continue
+
+        if depth == 2:
+            section = sections[elem.tag]
+            if section.text is None and elem.text and elem.text.strip():
+                section.text = elem.text
+
+        elif depth == 3:
+            section = sections[stack[-1].tag]
+            key = _element_key(elem)
+            elem.tail = None
+            if key in section.keys:
+                # same item in multiple manifests, merge the children into the first one
+                index = section.keys[key]
+                merged = ET.fromstring(section.items[index])
+                _merge_element(merged, elem, f"{section.tag}/{elem.tag}[{key[1]}]")
+                section.items[index] = ET.tostring(merged, encoding="unicode")
+            else:
+                if key:
+                    section.keys[key] = len(section.items)
+                section.items.append(ET.tostring(elem, encoding="unicode"))
+            stack[-1].remove(elem)
+
+    for path in includes:
+        if path:
+            _merge_manifest_part(_resolve_include(path, manifest_dir, sdk_root),
+                                 sdk_root, sections, state, visited)
+
+
+def merge_split_manifest(manifest, sdk_root, output=None) -> str:
+    """Merge split manifest and its sub-manifests into one manifest file.
+
+    Github SDK use splitted manifest in multiple repositories. The top manifest
+    references sub-manifests by `<include path="..."/>` elements, placed under
+    the root or a top level section, path is relative to the repository root
+    or the including manifest.
+
+    Merging rules:
+        - root attributes and namespaces are taken from the top manifest,
+        - children of the same top level section are concatenated, the items of
+          a manifest come first, then the items of its sub-manifests in the
+          order they are referenced,
+        - items with the same tag and id are merged into the first one: missing
+          attributes and children are added, children with the same tag and id
+          are merged recursively, a conflicting attribute is reported with a
+          warning and the first value is kept,
+        - `<include>` elements are not written to the merged manifest.
+
+    Args:
+        manifest: {str} the top manifest to merge
+        sdk_root: {str} the sdk root directory
+        output: {str} merged manifest path, default: <sdk_root>/Merged_<manifest name>
+
+    Returns:
+        {str} Path of merged manifest file.
+    """
+    manifest_path = Path(manifest)
+    sdk_root_path = Path(sdk_root)
+    output = Path(output) if output else sdk_root_path / f"Merged_{manifest_path.name}"
+
+    ET.register_namespace("xsi", XSI_NAMESPACE)
+    ET.register_namespace("ksdk", KSDK_NAMESPACE)
+
+    sections = dict()
+    state = {"root": None, "nsmap": list()}
+    _merge_manifest_part(str(manifest_path), str(sdk_root_path), sections, state, set())
+
+    tag, attrib = state["root"]
+    prefixes = {uri: prefix for prefix, uri in state["nsmap"]}
+
+    def qname(name):
+        if name.startswith("{"):
+            uri, local = name[1:].split("}", 1)
+            return f"{prefixes[uri]}:{local}" if prefixes.get(uri) else local
+        return name
+
+    def start_tag(name, attrs, extra=""):
+        text = "".join(f" {qname(key)}={quoteattr(value)}" for key, value in attrs.items())
+        return f"<{qname(name)}{extra}{text}"
+
+    nsdecl = "".join(f" xmlns:{prefix}={quoteattr(uri)}" if prefix else f" xmlns={quoteattr(uri)}"
+                     for prefix, uri in state["nsmap"])
+
+    with open(output, "w", encoding="utf-8") as fobj:
+        fobj.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        fobj.write(start_tag(tag, attrib, nsdecl) + ">\n")
+        for section in sections.values():
+            if not section.items:
+                if section.text:
+                    fobj.write("  " + start_tag(section.tag, section.attrib) + ">")
+                    fobj.write(escape(section.text) + f"</{qname(section.tag)}>\n")
+                else:
+                    fobj.write("  " + start_tag(section.tag, section.attrib) + "/>\n")
+                continue
+
+            fobj.write("  " + start_tag(section.tag, section.attrib) + ">\n")
+            for item in section.items:
+                fobj.write("    " + item + "\n")
+            fobj.write(f"  </{qname(section.tag)}>\n")
+        fobj.write(f"</{qname(tag)}>\n")
+
+    logging.info(f"merged-> {output}")
+    return output.as_posix()
+
+
 def merge_manifests(ide_exe, manifest, sdk_root) -> str:
     """Use MCUXpressoIDE merge manifest to sdk_root.
 
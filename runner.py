@@ -3,6 +3,7 @@ import traceback
 import logging
 import importlib
 from cfg_parer import CfgParser
+from mcutool.inventory import INVENTORY
 
 
 class Runner(object):
@@ -13,6 +14,8 @@ class Runner(object):
         self.board = None
         self.case = None
         self.appname = None
+        # refresh host inventory by hotplug events, ttl is the fallback
+        INVENTORY.start_monitor()
 
     def download(self, filepath):    
         return self.board.programming(filepath, target=self.target)
@@ -29,14 +32,16 @@ class Runner(object):
             logging.info('{:#^48}'.format(f" Run Start "))
             logging.info('{:-^10}'.format(f" Run Board: {self.board.name}, App: {self.appname}, Target: {self.target}"))
             print(self.board.__dict__)
-            self.case.pre_init()
-            ret, output = self.download(filepath)
-            logging.info(output)
-            if ret == 0:
-                self.case.interact()
-                result = "PASS"
-            else:
-                result = "Download Fail"
+            # wait if the board is used by other job on this host
+            with self.board.lease():
+                self.case.pre_init()
+                ret, output = self.download(filepath)
+                logging.info(output)
+                if ret == 0:
+                    self.case.interact()
+                    result = "PASS"
+                else:
+                    result = "Download Fail"
         except Exception as e:
             traceback.print_exc()
             result = "FAIL"
@@ -0,0 +1,89 @@
+import pytest
+
+
+SDK_MANIFEST = """<?xml version="1.0" encoding="UTF-8"?>
+<manifest format_version="3.10" id="SDK_2.x_EVK" name="EVK" version="2.13.0">
+  <ksdk id="MCUXpresso213" name="MCUXpresso213" version="2.13.0"/>
+  <boards>
+    <board id="evk" name="EVK">
+      <examples>
+        <example id="evk_hello_world" name="hello_world" category="demo_apps"
+                 path="boards/evk/demo_apps/hello_world" dependency="driver.lpuart">
+          <external path="boards/evk/demo_apps/hello_world" type="xml">
+            <files mask="hello_world.xml"/>
+          </external>
+        </example>
+        <example id="evk_led_blinky" name="led_blinky" category="demo_apps"
+                 path="boards/evk/demo_apps/led_blinky" dependency="driver.gpio">
+          <external path="boards/evk/demo_apps/led_blinky" type="xml">
+            <files mask="led_blinky.xml"/>
+          </external>
+        </example>
+      </examples>
+    </board>
+  </boards>
+  <components>
+    <component id="driver.lpuart" name="lpuart" package_base_path="devices/MIMXRT1062/drivers"
+               dependency="driver.common">
+      <source relative_path="./" type="src">
+        <files mask="fsl_lpuart.c"/>
+      </source>
+      <source relative_path="./" type="c_include">
+        <files mask="fsl_lpuart.h"/>
+      </source>
+    </component>
+    <component id="driver.common" name="common" package_base_path="devices/MIMXRT1062">
+      <source relative_path="drivers" type="c_include">
+        <files mask="fsl_common*.h"/>
+      </source>
+    </component>
+    <component id="driver.gpio" name="gpio" package_base_path="devices/MIMXRT1062/drivers">
+      <source relative_path="./" type="src">
+        <files mask="fsl_gpio.c"/>
+      </source>
+    </component>
+  </components>
+</manifest>
+"""
+
+EXAMPLE_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<ksdk:examples xmlns:ksdk="http://nxp.com/ksdk/2.0/ksdk_manifest_v3.0.xsd">
+  <example id="{id}" name="{name}">
+    <source path="boards/evk/demo_apps/{name}" target_path="source" type="src">
+      <files mask="{name}.c"/>
+    </source>
+  </example>
+</ksdk:examples>
+"""
+
+SDK_FILES = {
+    "EVK_manifest_v3_10.xml": SDK_MANIFEST,
+    "boards/evk/demo_apps/hello_world/hello_world.xml":
+        EXAMPLE_XML.format(id="evk_hello_world", name="hello_world"),
+    "boards/evk/demo_apps/hello_world/hello_world.c": "int main(void) { return 0; }\n",
+    "boards/evk/demo_apps/hello_world/armgcc/CMakeLists.txt": "project(hello_world)\n",
+    "boards/evk/demo_apps/led_blinky/led_blinky.xml":
+        EXAMPLE_XML.format(id="evk_led_blinky", name="led_blinky"),
+    "boards/evk/demo_apps/led_blinky/led_blinky.c": "int main(void) { return 1; }\n",
+    "devices/MIMXRT1062/drivers/fsl_lpuart.c": "/* lpuart */\n",
+    "devices/MIMXRT1062/drivers/fsl_lpuart.h": "/* lpuart */\n",
+    "devices/MIMXRT1062/drivers/fsl_common.h": "/* common */\n",
+    "devices/MIMXRT1062/drivers/fsl_common_arm.h": "/* common */\n",
+    "devices/MIMXRT1062/drivers/fsl_gpio.c": "/* gpio */\n",
+}
+
+
+@pytest.fixture
+def sdk_files():
+    """Files of a small SDK package, {path: content}."""
+    return dict(SDK_FILES)
+
+
+@pytest.fixture
+def sdk_root(tmp_path, sdk_files):
+    root = tmp_path / "sdk"
+    for name, content in sdk_files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    return root
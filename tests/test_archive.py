@@ -0,0 +1,41 @@
+import zipfile
+
+from mcutool.archive import extract_sdk
+
+
+def _make_zip(path, files):
+    with zipfile.ZipFile(path, "w") as zfile:
+        for name, content in files.items():
+            zfile.writestr(name, content)
+    return str(path)
+
+
+def test_extract_one_example(tmp_path, sdk_files):
+    zip_path = _make_zip(tmp_path / "SDK_2.13.0_EVK.zip", sdk_files)
+    dest = tmp_path / "out"
+
+    extract_sdk(zip_path, str(dest), names=["hello_world"])
+
+    extracted = sorted(str(path.relative_to(dest)).replace("\\", "/")
+                       for path in dest.rglob("*") if path.is_file())
+    assert extracted == [
+        "EVK_manifest_v3_10.xml",
+        "boards/evk/demo_apps/hello_world/armgcc/CMakeLists.txt",
+        "boards/evk/demo_apps/hello_world/hello_world.c",
+        "boards/evk/demo_apps/hello_world/hello_world.xml",
+        "devices/MIMXRT1062/drivers/fsl_common.h",
+        "devices/MIMXRT1062/drivers/fsl_common_arm.h",
+        "devices/MIMXRT1062/drivers/fsl_lpuart.c",
+        "devices/MIMXRT1062/drivers/fsl_lpuart.h",
+    ]
+
+
+def test_extract_skips_up_to_date_files(tmp_path, sdk_files):
+    zip_path = _make_zip(tmp_path / "SDK_2.13.0_EVK.zip", sdk_files)
+    dest = tmp_path / "out"
+
+    extracted, skipped = extract_sdk(zip_path, str(dest), boards=["evk"])
+    assert (extracted, skipped) == (len(sdk_files), 0)
+
+    extracted, skipped = extract_sdk(zip_path, str(dest), boards=["evk"])
+    assert (extracted, skipped) == (0, len(sdk_files))
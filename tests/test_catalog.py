@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from mcutool import catalog
+from mcutool.catalog import ProjectCatalog
+
+
+MANIFEST = """<?xml version="1.0" encoding="UTF-8"?>
+<manifest format_version="3.10" id="SDK_2.x_EVK" name="EVK" version="2.13.0">
+  <include path="devices/sub_manifest.xml"/>
+</manifest>
+"""
+
+SUB_MANIFEST = """<?xml version="1.0" encoding="UTF-8"?>
+<manifest format_version="3.10">
+  <examples/>
+</manifest>
+"""
+
+
+def _touch(path, delta=10):
+    mtime = os.path.getmtime(path) + delta
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def sdk(tmp_path, monkeypatch):
+    (tmp_path / "devices").mkdir()
+    (tmp_path / "EVK_manifest_v3_10.xml").write_text(MANIFEST)
+    (tmp_path / "devices" / "sub_manifest.xml").write_text(SUB_MANIFEST)
+    monkeypatch.setattr(catalog, "find_projects", lambda root, jobs=None: ({}, 0))
+    return tmp_path
+
+
+def test_is_outdated_tracks_sub_manifests(sdk):
+    with ProjectCatalog(":memory:") as cat:
+        assert cat.is_outdated(str(sdk))
+        cat.import_sdk(str(sdk))
+        assert not cat.is_outdated(str(sdk))
+
+        _touch(sdk / "devices" / "sub_manifest.xml")
+        assert cat.is_outdated(str(sdk))
+
+
+def test_is_outdated_on_new_manifest(sdk):
+    with ProjectCatalog(":memory:") as cat:
+        cat.import_sdk(str(sdk))
+        (sdk / "manifests").mkdir()
+        (sdk / "manifests" / "EVK_manifest_v3_8.xml").write_text(SUB_MANIFEST)
+        assert cat.is_outdated(str(sdk))
@@ -0,0 +1,116 @@
+import zipfile
+
+import pytest
+
+from mcutool.cmsis_pack import CMSISPack, validate_packs
+
+
+PDSC = """<?xml version="1.0" encoding="UTF-8"?>
+<package>
+  <vendor>NXP</vendor>
+  <name>{name}</name>
+  <releases><release version="1.0.0"/></releases>
+  <devices>
+    <family Dfamily="MIMXRT1160">
+      <device Dname="MIMXRT1166xxxxx">
+        <memory name="SRAM" access="rw" start="0x20000000" size="0x40000" default="1"/>
+        <algorithm name="arm/MIMXRT1166_QSPI.FLM" start="0x30000000" size="0x1000000"/>
+        <variant Dvariant="MIMXRT1166DVM6A"/>
+      </device>
+      <device Dname="MIMXRT1166xxxxx_cm7">
+        <memory name="SRAM" access="rw" start="0x20000000" size="0x40000" default="1"/>
+        <algorithm name="arm/MIMXRT1166_QSPI.FLM" start="0x30000000" size="0x1000000"/>
+      </device>
+    </family>
+  </devices>
+  <components>
+    <component Cclass="Device" Cgroup="Startup">
+      <files><file category="linkerScript" name="gcc/MIMXRT1166_flexspi_nor.ld"/></files>
+    </component>
+  </components>
+</package>
+"""
+
+
+def make_pack(path, name="MIMXRT1166_DFP", members=("arm/MIMXRT1166_QSPI.FLM", "gcc/MIMXRT1166_flexspi_nor.ld")):
+    with zipfile.ZipFile(str(path), "w") as zfile:
+        zfile.writestr("NXP.%s.pdsc" % name, PDSC.format(name=name))
+        for member in members:
+            zfile.writestr(member, "data")
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    CMSISPack._INDEX.clear()
+    CMSISPack._HASHES.clear()
+    yield
+    CMSISPack._INDEX.clear()
+    CMSISPack._HASHES.clear()
+
+
+def test_cache_round_trip(tmp_path, monkeypatch):
+    packfile = make_pack(tmp_path / "NXP.MIMXRT1166_DFP.1.0.0.pack")
+    cache_dir = str(tmp_path / "cache")
+    pack = CMSISPack(packfile, cache_dir=cache_dir)
+    assert (tmp_path / "cache" / (pack.sha1 + ".json")).exists()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("pack is parsed again")
+
+    monkeypatch.setattr(CMSISPack, "parse_pdsc", fail)
+
+    # from the process-wide index
+    again = CMSISPack(packfile, cache_dir=cache_dir)
+    assert again.name == "MIMXRT1166_DFP"
+    assert sorted(again.devicelist) == sorted(pack.devicelist)
+
+    # from the json file
+    CMSISPack._INDEX.clear()
+    CMSISPack._HASHES.clear()
+    loaded = CMSISPack(packfile, cache_dir=cache_dir)
+    assert loaded.version == "1.0.0"
+    assert loaded.members == pack.members
+    assert loaded.partnumbers == ["MIMXRT1166DVM6A"]
+
+
+def test_cached_data_is_not_shared(tmp_path):
+    packfile = make_pack(tmp_path / "NXP.MIMXRT1166_DFP.1.0.0.pack")
+    first = CMSISPack(packfile, cache_dir=None)
+    first.get_device_info_by_name("MIMXRT1166xxxxx")["algorithm"].clear()
+    first._requirements.append({"name": "CMSIS"})
+
+    second = CMSISPack(packfile, cache_dir=None)
+    assert second.get_device_info_by_name("MIMXRT1166xxxxx")["algorithm"]
+    assert second.requirements == []
+
+
+def test_file_hash_is_memorized(tmp_path):
+    packfile = make_pack(tmp_path / "NXP.MIMXRT1166_DFP.1.0.0.pack")
+    digest = CMSISPack.file_hash(packfile)
+    assert len(CMSISPack._HASHES) == 1
+    assert CMSISPack.file_hash(packfile) == digest
+
+
+def test_get_device_info_by_name(tmp_path):
+    pack = CMSISPack(make_pack(tmp_path / "NXP.MIMXRT1166_DFP.1.0.0.pack"), cache_dir=None)
+    assert pack.get_device_info_by_name("MIMXRT1166DVM6A")["name"] == "MIMXRT1166xxxxx"
+    assert pack.get_device_info_by_name("MIMXRT1166xxxxx")["name"] == "MIMXRT1166xxxxx"
+    # the first device contained in the name wins
+    assert pack.get_device_info_by_name("MIMXRT1166xxxxx_cm4")["name"] == "MIMXRT1166xxxxx"
+    assert pack.get_device_info_by_name("LPC55S69") is None
+    assert pack.has_partnumbers("MIMXRT1166DVM6A")
+    assert not pack.has_partnumbers("MIMXRT1166xxxxx")
+
+
+def test_validate_packs(tmp_path):
+    good = make_pack(tmp_path / "good.pack")
+    bad = make_pack(tmp_path / "bad.pack", members=("gcc/MIMXRT1166_flexspi_nor.ld",))
+    broken = str(tmp_path / "broken.pack")
+    with open(broken, "w") as fobj:
+        fobj.write("not a zip")
+
+    results = validate_packs([good, bad, broken], jobs=1, cache_dir=None)
+    assert results[good] is None
+    assert "Missing flash algorithm" in results[bad]
+    assert results[broken]
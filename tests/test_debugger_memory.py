@@ -0,0 +1,97 @@
+import re
+
+import pytest
+
+from mcutool.debugger.general import DebuggerBase
+from mcutool.debugger.jlink import JLINK
+
+
+class WordDebugger(DebuggerBase):
+
+    def __init__(self):
+        super().__init__("words", ".")
+        self.memory = dict()
+
+    def read32(self, addr):
+        return self.memory.get(addr, 0)
+
+    def write32(self, addr, value):
+        self.memory[addr] = value
+
+
+def test_default_words_access_uses_read32_write32():
+    debugger = WordDebugger()
+    debugger.write_words({0x100: 1, 0x104: 2})
+    debugger.write_words([(0x108, 3)])
+    assert debugger.read_words([0x108, 0x100, 0x104]) == [3, 1, 2]
+
+
+def test_default_block_access_is_not_supported():
+    with pytest.raises(NotImplementedError):
+        WordDebugger().read_memory(0, 4)
+    with pytest.raises(NotImplementedError):
+        WordDebugger().read_registers()
+
+
+class FakeJLink(JLINK):
+    """Answer JLink commands from memory instead of JLinkExe."""
+
+    def __init__(self):
+        super().__init__("/opt/SEGGER/JLink", version="7.90")
+        self.memory = dict()
+        self.batches = list()
+
+    def run_commands(self, commands, auto_connect=True, timeout=60, **kwargs):
+        self.batches.append(list(commands))
+        output = list()
+        for command in commands:
+            words = re.split(r"[\s,]+", command.strip())
+            if words[0] == "mem32":
+                addr = int(words[1], 16)
+                if addr in self.memory:
+                    output.append("J-Link>%08X = %08X" % (addr, self.memory[addr]))
+            elif words[0] == "w4":
+                self.memory[int(words[1], 16)] = int(words[2], 16)
+            elif words[0] == "savebin":
+                addr, size = int(words[2], 16), int(words[3], 16)
+                with open(words[1], "wb") as fobj:
+                    fobj.write(bytes((addr + index) & 0xFF for index in range(size)))
+            elif words[0] == "regs":
+                output.append("PC = 00001234, CycleCnt = 00000000")
+                output.append("R0 = 00000001, R1 = 00000002")
+                output.append("SP(R13)= 20001000, MSP= 20001000, PSP= 00000000, R14(LR) = FFFFFFFF")
+        return 0, "\n".join(output)
+
+
+def test_jlink_words_in_one_batch():
+    jlink = FakeJLink()
+    jlink.write_words({0x20000000: 0x12345678, 0x20000004: 0xCAFE})
+    assert jlink.read_words([0x20000004, 0x20000000]) == [0xCAFE, 0x12345678]
+    assert len(jlink.batches) == 2
+    assert jlink.batches[1] == ["mem32 20000004, 1", "mem32 20000000, 1", "qc"]
+
+
+def test_jlink_read_words_reports_missing_address():
+    jlink = FakeJLink()
+    jlink.memory[0x100] = 1
+    with pytest.raises(Exception, match="Cannot read words: 200$"):
+        jlink.read_words([0x100, 0x200])
+
+
+def test_jlink_read_ranges_in_one_batch():
+    jlink = FakeJLink()
+    blocks = jlink.read_ranges([(0x10, 4), (0x20, 2)])
+    assert blocks == [b"\x10\x11\x12\x13", b"\x20\x21"]
+    assert len(jlink.batches) == 1
+    assert jlink.batches[0][0] == "h"
+    assert jlink.read_memory(0x30, 1) == b"\x30"
+
+
+def test_jlink_read_registers_normalizes_aliases():
+    jlink = FakeJLink()
+    registers = jlink.read_registers()
+    assert registers["pc"] == 0x1234
+    assert registers["r0"] == 1
+    assert registers["sp"] == 0x20001000
+    assert registers["lr"] == 0xFFFFFFFF
+    assert jlink.read_registers(["PC", "r1"]) == {"PC": 0x1234, "r1": 2}
@@ -0,0 +1,121 @@
+import os
+import sys
+import json
+import stat
+import tempfile
+
+import pytest
+
+from mcutool.debugger.general import DebuggerBase
+
+
+FAKE_GDB = """#!{python}
+import os, sys, json
+here = os.path.dirname(os.path.abspath(__file__))
+script = sys.argv[sys.argv.index("-x") + 1]
+with open(os.path.join(here, "argv.json"), "w") as fobj:
+    json.dump(sys.argv[1:], fobj)
+print(open(script).read())
+output = os.path.join(here, "output.txt")
+if os.path.exists(output):
+    print(open(output).read())
+"""
+
+
+class FakeBoard(object):
+
+    def __init__(self):
+        self.name = "evkmimxrt1060"
+        self.gdbport = 3333
+        self.gdb_commands = None
+        self.sp = None
+        self.pc = None
+
+
+class FakeServer(object):
+    """gdbserver exits after gdb disconnects."""
+
+    def __init__(self):
+        self.console = ["Listening on port 3333\n"]
+        self.returncode = None
+        self.terminated = False
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        self.returncode = 0
+        return 0
+
+    def terminate(self):
+        self.terminated = True
+        self.returncode = 1
+
+
+@pytest.fixture
+def gdb_dir(tmp_path, monkeypatch):
+    path = tmp_path / "gdb"
+    path.mkdir()
+    exe = path / "arm-none-eabi-gdb"
+    exe.write_text(FAKE_GDB.format(python=sys.executable))
+    exe.chmod(exe.stat().st_mode | stat.S_IEXEC)
+
+    # gdb script is created in a directory with spaces
+    scripts = tmp_path / "temp dir"
+    scripts.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(scripts))
+    return path
+
+
+@pytest.fixture
+def debugger(gdb_dir):
+    debugger = DebuggerBase("fake", ".", gdbpath=str(gdb_dir / "arm-none-eabi-gdb"))
+    debugger.set_board(FakeBoard())
+    debugger.server = FakeServer()
+    debugger._prepare_gdbserver = lambda *args, **kwargs: (debugger.server, 0)
+    return debugger
+
+
+def test_batch_runs_rendered_script(debugger, gdb_dir, tmp_path):
+    ret, output = debugger.gdb_program("app.elf", gdb_commands="target remote :{gdbport}\nload\nq\n")
+    assert ret == 0
+    assert output.startswith("Listening on port 3333\n")
+    assert "target remote :3333\nload\nq\n" in output
+
+    argv = json.loads((gdb_dir / "argv.json").read_text())
+    assert argv[:2] == ["app.elf", "--silent"]
+    assert argv[2:4] == ["-batch", "-x"]
+    assert os.path.dirname(argv[4]) == str(tmp_path / "temp dir")
+    # script is removed after gdb exits
+    assert not os.path.exists(argv[4])
+
+
+@pytest.mark.parametrize("message", DebuggerBase.GDB_ERROR_MESSAGES)
+def test_batch_fails_on_gdb_error_message(debugger, gdb_dir, message):
+    (gdb_dir / "output.txt").write_text(message)
+    ret, output = debugger.gdb_program("app.elf")
+    assert ret == 1
+    assert message in output
+    assert debugger.server.terminated
+
+
+def test_before_load_callback_falls_back_to_interactive(debugger, monkeypatch):
+    sessions = list()
+
+    def start_debug_session(*args, **kwargs):
+        sessions.append(args)
+        return None, None, "interactive session"
+
+    def batch(*args, **kwargs):
+        raise AssertionError("batch mode is used")
+
+    monkeypatch.setattr(debugger, "_start_debug_session", start_debug_session)
+    monkeypatch.setattr(debugger, "gdb_batch_program", batch)
+    debugger.register_callback("before_load", lambda: None)
+
+    assert debugger.gdb_program("app.elf") == (1, "interactive session")
+    assert len(sessions) == 1
+
+    debugger.remove_callback("before_load")
+    with pytest.raises(AssertionError):
+        debugger.gdb_program("app.elf")
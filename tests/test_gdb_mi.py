@@ -0,0 +1,103 @@
+import sys
+import time
+
+import pytest
+
+from mcutool import gdb_mi
+from mcutool.gdb_mi import GDBMISession, _parse_cstring, _parse_value, parse_record, to_mi_command
+
+
+FAKE_GDB = r"""
+import re, sys
+for line in sys.stdin:
+    if "-gdb-exit" in line:
+        break
+    token = re.match(r"\d+", line).group(0)
+    print("^done,foo")
+    print("*stopped,reason")
+    print('~"ok\\n"')
+    print(token + "^done", flush=True)
+"""
+
+
+def test_parse_cstring_escapes():
+    assert _parse_cstring(r'"a\tb\n\"c\"\\"tail', 0) == ('a\tb\n"c"\\', 15)
+
+
+def test_parse_cstring_decodes_octal_escapes_as_utf8():
+    assert _parse_cstring(r'"25\302\260C"', 0)[0] == "25°C"
+    assert _parse_cstring(r'"\344\270\255"', 0)[0] == "中"
+    assert _parse_cstring(r'"\033[0m"', 0)[0] == "\x1b[0m"
+
+
+def test_parse_cstring_keeps_invalid_bytes():
+    assert _parse_cstring(r'"\377x"', 0)[0] == "�x"
+
+
+def test_parse_value_tuple_and_lists():
+    text = '{addr="0x1000",args=[],frame={func="main",line="12"}},next'
+    value, pos = _parse_value(text, 0)
+    assert value == {"addr": "0x1000", "args": [], "frame": {"func": "main", "line": "12"}}
+    assert text[pos:] == ",next"
+
+    assert _parse_value('["a","b"]', 0)[0] == ["a", "b"]
+    assert _parse_value('[frame={level="0"},frame={level="1"}]', 0)[0] == [
+        {"frame": {"level": "0"}}, {"frame": {"level": "1"}}]
+
+
+def test_parse_result_record():
+    record = parse_record('12^done,value="1"\n')
+    assert record == {"token": 12, "type": "result", "class": "done",
+                      "results": {"value": "1"}, "payload": None}
+
+    record = parse_record('3^error,msg="No symbol \\"foo\\" in current context."')
+    assert record["class"] == "error"
+    assert record["results"]["msg"] == 'No symbol "foo" in current context.'
+
+
+def test_parse_download_status_with_bare_tuple():
+    record = parse_record('+download,{section=".text",section-size="9880",total-size="19760"}')
+    assert record["type"] == "status" and record["class"] == "download"
+    assert record["results"] == {"section": ".text", "section-size": "9880", "total-size": "19760"}
+
+
+def test_parse_stream_records():
+    assert parse_record('~"Temperature: 25\\302\\260C\\n"')["payload"] == "Temperature: 25°C\n"
+    assert parse_record("(gdb)") is None
+
+
+def test_to_mi_command():
+    assert to_mi_command("load") == "-target-download"
+    assert to_mi_command("target remote :3333") == "-target-select remote :3333"
+    assert to_mi_command("q") == "-gdb-exit"
+    assert to_mi_command("-break-list") == "-break-list"
+    assert to_mi_command('monitor reset "halt"') == '-interpreter-exec console "monitor reset \\"halt\\""'
+
+
+@pytest.fixture
+def gdb_session():
+    session = GDBMISession.start([sys.executable, "-c", FAKE_GDB])
+    session.timeout = 10
+    yield session
+    session.close()
+
+
+def test_reader_skips_malformed_records(gdb_session):
+    with pytest.raises(ValueError):
+        parse_record("^done,foo")
+
+    assert gdb_session.run_cmd("-break-list") == "ok\n"
+    assert gdb_session.wait(gdb_session.send("-break-list"))["class"] == "done"
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_wait_gives_up_when_reader_exits(gdb_session, monkeypatch):
+    def broken(line):
+        raise RuntimeError("reader is broken")
+
+    monkeypatch.setattr(gdb_mi, "parse_record", broken)
+    start = time.time()
+    record = gdb_session.wait(gdb_session.send("-break-list"))
+    assert record["class"] == "exit"
+    assert gdb_session.is_alive
+    assert time.time() - start < 5
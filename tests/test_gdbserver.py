@@ -0,0 +1,134 @@
+import sys
+import time
+import socket
+import threading
+import subprocess
+
+import pytest
+
+from mcutool.debugger.gdbserver import GDBServerSupervisor, can_connect
+from mcutool.debugger.general import wait_for_gdbserver
+from mcutool.exceptions import GDBServerStartupError
+
+
+SERVER = """
+import sys, socket, time
+sock = socket.socket()
+sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+sock.bind(("127.0.0.1", int(sys.argv[1])))
+sock.listen(5)
+while True:
+    conn, _ = sock.accept()
+    conn.close()
+"""
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeDebugger(object):
+    """Start a TCP server as gdbserver, or a process exits at once if broken."""
+
+    def __init__(self, broken=False):
+        self._board = None
+        self.broken = broken
+        self.gdbserver_port = None
+        self.calls = list()
+
+    def start_gdbserver(self, **kwargs):
+        self.calls.append(kwargs)
+        self.gdbserver_port = _free_port()
+        code = "raise SystemExit(1)" if self.broken else SERVER
+        proc = subprocess.Popen([sys.executable, "-c", code, str(self.gdbserver_port)])
+        proc.get_output = lambda: "fake gdbserver"
+        return proc
+
+    def wait_gdbserver_ready(self, proc, port, timeout=5):
+        return wait_for_gdbserver(proc, port, timeout)
+
+
+@pytest.fixture
+def supervisor():
+    supervisor = GDBServerSupervisor(FakeDebugger(), speed=4000)
+    yield supervisor
+    supervisor.stop()
+
+
+def test_ensure_reuses_healthy_server(supervisor):
+    proc = supervisor.ensure()
+    assert supervisor.is_healthy()
+    assert can_connect(supervisor.port)
+    assert supervisor.ensure() is proc
+    assert supervisor.debugger.calls == [{"speed": 4000, "persist": True}]
+
+
+def test_ensure_restarts_dead_server(supervisor):
+    proc = supervisor.ensure()
+    proc.kill()
+    proc.wait()
+
+    assert not supervisor.is_healthy()
+    new_proc = supervisor.ensure()
+    assert new_proc is not proc
+    assert supervisor.is_healthy()
+    assert supervisor.restarts == 1
+
+
+def test_stop_terminates_server(supervisor):
+    proc = supervisor.ensure()
+    supervisor.stop()
+    assert proc.poll() is not None
+    assert supervisor.proc is None
+    assert not supervisor.is_alive
+
+
+def test_ensure_gives_up_after_max_restarts():
+    supervisor = GDBServerSupervisor(FakeDebugger(broken=True), max_restarts=2)
+    with pytest.raises(GDBServerStartupError):
+        supervisor.ensure()
+    assert len(supervisor.debugger.calls) == 3
+    assert supervisor.proc is None
+
+
+class FakeProcess(object):
+    """Popen-like server with the events set by the stdout reader."""
+
+    def __init__(self, returncode=None):
+        self.returncode = returncode
+        self.ready_event = threading.Event()
+        self.exit_event = threading.Event()
+
+    def poll(self):
+        return self.returncode
+
+
+def test_wait_for_gdbserver_waits_for_ready_line_then_connects():
+    port = _free_port()
+    server = subprocess.Popen([sys.executable, "-c", SERVER, str(port)])
+    try:
+        proc = FakeProcess()
+        # no ready line yet, the port is not connected
+        assert not wait_for_gdbserver(proc, port, timeout=0.2)
+
+        threading.Timer(0.1, proc.ready_event.set).start()
+        assert wait_for_gdbserver(proc, port, timeout=5)
+    finally:
+        server.kill()
+        server.wait()
+
+
+def test_wait_for_gdbserver_requires_connection_after_ready_line():
+    proc = FakeProcess()
+    proc.ready_event.set()
+    assert not wait_for_gdbserver(proc, _free_port(), timeout=0.3)
+
+
+def test_wait_for_gdbserver_returns_when_server_exits():
+    proc = FakeProcess()
+    threading.Timer(0.1, lambda: (proc.exit_event.set(), proc.ready_event.set())).start()
+    start = time.time()
+    assert not wait_for_gdbserver(proc, _free_port(), timeout=10)
+    assert time.time() - start < 5
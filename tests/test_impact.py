@@ -0,0 +1,33 @@
+from mcutool.impact import ImpactAnalyzer
+from mcutool.sdk_manifest import SDKManifest
+
+
+def _analyzer(sdk_root):
+    return ImpactAnalyzer(str(sdk_root), SDKManifest(str(sdk_root / "EVK_manifest_v3_10.xml")))
+
+
+def test_component_sources_use_package_base_path(sdk_root):
+    analyzer = _analyzer(sdk_root)
+    assert analyzer.affected_examples(["devices/MIMXRT1062/drivers/fsl_lpuart.c"]) == {"evk_hello_world"}
+    assert analyzer.affected_examples(["devices/MIMXRT1062/drivers/fsl_gpio.c"]) == {"evk_led_blinky"}
+    assert analyzer.affected_examples(["fsl_lpuart.c"]) == set()
+
+
+def test_component_masks_and_dependencies(sdk_root):
+    analyzer = _analyzer(sdk_root)
+    # driver.common is a dependency of driver.lpuart
+    assert analyzer.affected_examples(["devices/MIMXRT1062/drivers/fsl_common_arm.h"]) == {"evk_hello_world"}
+
+
+def test_example_sources_and_directory(sdk_root):
+    analyzer = _analyzer(sdk_root)
+    assert analyzer.affected_examples(["boards/evk/demo_apps/led_blinky/led_blinky.c"]) == {"evk_led_blinky"}
+    assert analyzer.affected_examples(["EVK_manifest_v3_10.xml"]) == {"evk_hello_world", "evk_led_blinky"}
+
+
+def test_required_files(sdk_root):
+    files, masks, dirs = _analyzer(sdk_root).required_files(["evk_hello_world"])
+    assert "devices/MIMXRT1062/drivers/fsl_lpuart.c" in files
+    assert "devices/MIMXRT1062/drivers/fsl_gpio.c" not in files
+    assert ("devices/MIMXRT1062/drivers", "fsl_common*.h") in masks
+    assert dirs == {"boards/evk/demo_apps/hello_world"}
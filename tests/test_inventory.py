@@ -0,0 +1,182 @@
+import sys
+import types
+
+import pytest
+
+from mcutool import inventory
+from mcutool.inventory import Inventory
+
+
+class Loader(object):
+
+    def __init__(self, data):
+        self.data = data
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.data
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(inventory, "time", clock)
+    return clock
+
+
+def test_cached_until_ttl(clock):
+    inv = Inventory(ttl=10)
+    loader = Loader([{"device": "/dev/ttyACM0"}])
+    assert inv.get("serial", loader) == loader.data
+    clock.now += 5
+    inv.get("serial", loader)
+    assert loader.calls == 1
+
+    clock.now += 6
+    inv.get("serial", loader)
+    assert loader.calls == 2
+
+
+def test_get_does_not_start_monitor(monkeypatch):
+    started = list()
+    monkeypatch.setattr(Inventory, "start_monitor", lambda self: started.append(self))
+    Inventory().get("serial", Loader([]))
+    assert not started
+
+
+class FakeObserver(object):
+
+    def __init__(self, monitor, callback=None, name=None):
+        self.callback = callback
+        self.stopped = False
+
+    def start(self):
+        pass
+
+    def send_stop(self):
+        self.stopped = True
+
+
+@pytest.fixture
+def pyudev(monkeypatch):
+    module = types.ModuleType("pyudev")
+    module.Context = lambda: None
+
+    class Monitor(object):
+        @staticmethod
+        def from_netlink(context):
+            return Monitor()
+
+        def filter_by(self, subsystem):
+            pass
+
+    module.Monitor = Monitor
+    module.MonitorObserver = FakeObserver
+    monkeypatch.setitem(sys.modules, "pyudev", module)
+    return module
+
+
+def _event(subsystem):
+    return types.SimpleNamespace(subsystem=subsystem, action="add", sys_name="1-1")
+
+
+def test_hotplug_invalidates_and_ttl_is_kept(pyudev, clock):
+    inv = Inventory(ttl=10)
+    assert inv.start_monitor()
+    assert inv.is_monitoring
+
+    serial = Loader([])
+    probes = Loader([{"usbid": "600112233", "type": "jlink"}])
+    inv.get("serial", serial)
+    inv.get("probes.jlink:/opt/SEGGER/JLink/JLinkExe", probes)
+
+    inv._on_device_event(_event("usb"))
+    inv.get("serial", serial)
+    inv.get("probes.jlink:/opt/SEGGER/JLink/JLinkExe", probes)
+    assert (serial.calls, probes.calls) == (2, 2)
+
+    # ttl is a backstop for missed events
+    clock.now += 11
+    inv.get("serial", serial)
+    assert serial.calls == 3
+
+    observer = inv._observer
+    inv.stop_monitor()
+    assert observer.stopped and not inv.is_monitoring
+
+
+def test_tty_event_keeps_probes(pyudev):
+    inv = Inventory()
+    inv.start_monitor()
+    probes = Loader([])
+    inv.get("probes.pyocd", probes)
+    inv._on_device_event(_event("tty"))
+    inv.get("probes.pyocd", probes)
+    assert probes.calls == 1
+
+
+def test_invalidate_probe_kind_with_tool():
+    inv = Inventory()
+    first, second = Loader([]), Loader([])
+    inv.get("probes.jlink:/a/JLinkExe", first)
+    inv.get("probes.jlink:/b/JLinkExe", second)
+    inv.invalidate("probes.jlink")
+    inv.get("probes.jlink:/a/JLinkExe", first)
+    assert first.calls == 2
+
+
+def test_lookup_board_resources(monkeypatch):
+    inv = Inventory()
+    probe = {"usbid": "600112233", "name": "J-Link", "type": "jlink"}
+    inv.get("probes.jlink:/a/JLinkExe", Loader([probe]))
+    inv.get("probes.jlink:/b/JLinkExe", Loader([probe]))
+    monkeypatch.setattr(inventory, "_scan_serial_ports", Loader([
+        {"device": "/dev/ttyACM0", "serial_number": "000600112233", "vid": 0x1366, "pid": 0x1015,
+         "description": "J-Link"},
+        {"device": "/dev/ttyUSB0", "serial_number": None, "vid": None, "pid": None, "description": ""},
+    ]))
+    monkeypatch.setattr(inventory, "_scan_mount_points", Loader({"600112233": "/media/JLINK"}))
+
+    assert inv.lookup("600112233") == {
+        "usbid": "600112233",
+        "probes": [probe],
+        "serial_ports": ["/dev/ttyACM0"],
+        "mount_point": "/media/JLINK",
+    }
+    assert inv.has_serial("/dev/ttyUSB0")
+
+
+def test_serial_is_installed_rescans_without_monitor(monkeypatch, pyudev):
+    from mcutool import pserial
+
+    inv = Inventory(ttl=10)
+    monkeypatch.setattr(pserial, "INVENTORY", inv)
+    ports = [{"device": "/dev/ttyACM0"}]
+    scan = Loader(ports)
+    monkeypatch.setattr(inventory, "_scan_serial_ports", scan)
+
+    ser = pserial.Serial()
+    ser.port = "/dev/ttyACM0"
+    assert ser.is_installed
+    ports.clear()
+    assert not ser.is_installed
+    assert scan.calls == 2
+
+    # the cache is invalidated by hotplug events when the monitor is running
+    inv.start_monitor()
+    assert not ser.is_installed
+    assert scan.calls == 2
+    ports.append({"device": "/dev/ttyACM0"})
+    inv._on_device_event(_event("tty"))
+    assert ser.is_installed
+    assert scan.calls == 3
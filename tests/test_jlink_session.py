@@ -0,0 +1,161 @@
+import os
+import sys
+import stat
+
+import pytest
+
+from mcutool.debugger.jlink import JLINK
+
+
+FAKE_JLINK = """#!{python}
+import os, sys
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "starts.log"), "a") as log:
+    log.write(" ".join(sys.argv[1:]) + "\\n")
+if {broken}:
+    sys.exit(1)
+if "-CommandFile" in sys.argv:
+    print("command file mode")
+    print(open(sys.argv[sys.argv.index("-CommandFile") + 1]).read())
+    sys.exit(0)
+print("SEGGER J-Link Commander\\nFound SW-DP with ID 0x6BA02477")
+sys.stdout.write("J-Link>")
+sys.stdout.flush()
+for line in sys.stdin:
+    command = line.strip()
+    if command in ("q", "qc"):
+        break
+    if command.startswith("mem32"):
+        addr = int(command.split()[1].rstrip(","), 16)
+        print("%08X = %08X " % (addr, addr + 1))
+    elif command == "regs":
+        print("PC = 00001234, CycleCnt = 00000000")
+        print("R0 = 00000001, R1 = 00000002")
+        print("SP(R13)= 20001000, MSP= 20001000, PSP= 00000000, R14(LR) = FFFFFFFF")
+    else:
+        print("ok " + command)
+    sys.stdout.write("J-Link>")
+    sys.stdout.flush()
+"""
+
+
+class FakeBoard(object):
+
+    def __init__(self, usbid="600112233", devicename="MIMXRT1062xxx6A"):
+        self.usbid = usbid
+        self.devicename = devicename
+        self.interface = "SWD"
+
+
+def _install(path, broken=False):
+    path.mkdir(exist_ok=True)
+    exe = path / "JLinkExe"
+    exe.write_text(FAKE_JLINK.format(python=sys.executable, broken=broken))
+    exe.chmod(exe.stat().st_mode | stat.S_IEXEC)
+    return path
+
+
+def _starts(path):
+    log = path / "starts.log"
+    return log.read_text().splitlines() if log.exists() else []
+
+
+@pytest.fixture(autouse=True)
+def sessions(monkeypatch):
+    monkeypatch.setattr(JLINK, "_SESSIONS", dict())
+    yield
+    JLINK.close_all_sessions()
+
+
+@pytest.fixture
+def jlink_dir(tmp_path):
+    return _install(tmp_path / "jlink")
+
+
+def _jlink(path, board=None):
+    jlink = JLINK(str(path), version="7.90")
+    jlink.set_board(board or FakeBoard())
+    return jlink
+
+
+def test_session_is_reused(jlink_dir):
+    jlink = _jlink(jlink_dir)
+    assert jlink.read_words([0x1000, 0x2000]) == [0x1001, 0x2001]
+    assert jlink.read_registers(["pc", "sp", "lr"]) == {"pc": 0x1234, "sp": 0x20001000, "lr": 0xFFFFFFFF}
+    starts = _starts(jlink_dir)
+    assert len(starts) == 1
+    assert "-CommandFile" not in starts[0]
+
+
+def test_session_key_identifies_exe_and_target(jlink_dir, tmp_path):
+    other_dir = _install(tmp_path / "other")
+    jlink = _jlink(jlink_dir, FakeBoard(usbid=None))
+    assert jlink._session_key() == (str(jlink_dir / "JLinkExe"), (), "MIMXRT1062xxx6A", "SWD")
+
+    # no connection options, but different devices or JLinkExe
+    mcx = _jlink(jlink_dir, FakeBoard(usbid=None, devicename="MCXN947_M33_0"))
+    other = _jlink(other_dir, FakeBoard(usbid=None))
+    assert len({jlink._session_key(), mcx._session_key(), other._session_key()}) == 3
+
+    jlink.read_words([0x1000])
+    other.read_words([0x1000])
+    assert len(_starts(jlink_dir)) == 1
+    assert len(_starts(other_dir)) == 1
+
+
+def test_session_failure_falls_back_for_one_call(tmp_path):
+    jlink_dir = _install(tmp_path / "jlink", broken=True)
+    jlink = _jlink(jlink_dir)
+    jlink.run_commands(["regs", "qc"])
+    assert jlink.persistent_session
+
+    # session is tried again on next call
+    jlink.run_commands(["regs", "qc"])
+    starts = _starts(jlink_dir)
+    assert len(starts) == 4
+    assert ["-CommandFile" in line for line in starts] == [False, True, False, True]
+
+
+def test_no_auto_connect_does_not_start_session(jlink_dir):
+    jlink = _jlink(jlink_dir)
+    ret, output = jlink.reset()
+    assert ret == 0 and "command file mode" in output
+    starts = _starts(jlink_dir)
+    assert len(starts) == 1
+    assert "-autoconnect 0" in starts[0] and "-CommandFile" in starts[0]
+    assert not JLINK._SESSIONS
+
+
+def test_no_auto_connect_reuses_alive_session(jlink_dir):
+    jlink = _jlink(jlink_dir)
+    jlink.read_words([0x1000])
+    ret, output = jlink.reset()
+    assert ret == 0 and "ok r1" in output
+    assert len(_starts(jlink_dir)) == 1
+
+
+def test_close_session_closes_sessions_of_emulator(jlink_dir):
+    jlink = _jlink(jlink_dir)
+    jlink.read_words([0x1000])
+    jlink.run_commands(["regs", "qc"], device="MIMXRT1062xxx6B")
+    assert len(JLINK._SESSIONS) == 1
+    jlink.close_session()
+    assert not JLINK._SESSIONS
+
+
+def test_delta_flash_does_not_run_in_pooled_session(jlink_dir, tmp_path):
+    image = tmp_path / "app.bin"
+    image.write_bytes(b"\0" * 16)
+    jlink = _jlink(jlink_dir)
+    jlink.read_words([0x1000])
+    assert JLINK._SESSIONS
+
+    ret, output = jlink.flash(str(image), addr=0x30000000, delta=True)
+    assert ret == 0
+    assert "command file mode" in output and "exec SetCompareMode = 1" in output
+    # the session holding the emulator is closed, compare mode is not left in it
+    assert not JLINK._SESSIONS
+
+    ret, output = jlink.flash(str(image), addr=0x30000000)
+    assert ret == 0 and "SetCompareMode" not in output
+    starts = _starts(jlink_dir)
+    assert ["-CommandFile" in line for line in starts] == [False, True, False]
@@ -0,0 +1,101 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+from mcutool.lease import FileLock, LeaseManager, LeaseTimeout
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HOLDER = """
+import sys
+from mcutool.lease import LeaseManager
+manager = LeaseManager(sys.argv[1])
+manager.acquire(sys.argv[2:])
+print("locked", flush=True)
+sys.stdin.read()
+"""
+
+
+@pytest.fixture
+def holder(tmp_path):
+    """Start a process holding leases until its stdin is closed."""
+    procs = list()
+
+    def start(*names):
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join([ROOT, env.get("PYTHONPATH", "")])
+        proc = subprocess.Popen([sys.executable, "-c", HOLDER, str(tmp_path / "leases")] + list(names),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, universal_newlines=True, env=env)
+        assert proc.stdout.readline().strip() == "locked"
+        procs.append(proc)
+        return proc
+
+    yield start
+    for proc in procs:
+        proc.stdin.close()
+        proc.wait(10)
+
+
+def test_file_lock_is_exclusive_across_processes(tmp_path, holder):
+    proc = holder("probe:62100000")
+    lock = LeaseManager(str(tmp_path / "leases"))._lock("probe:62100000")
+    assert not lock.acquire(blocking=False)
+    assert not lock.acquire(timeout=0.2)
+    assert not lock.locked
+
+    proc.stdin.close()
+    proc.wait(10)
+    assert lock.acquire(timeout=5)
+    assert lock.locked
+    lock.release()
+    assert not lock.locked
+
+
+def test_file_lock_context(tmp_path):
+    path = str(tmp_path / "leases" / "a.lock")
+    with FileLock(path) as lock:
+        assert lock.locked
+        assert not FileLock(path).acquire(blocking=False)
+    assert FileLock(path).acquire(blocking=False)
+
+
+def test_acquire_times_out_on_busy_resource(tmp_path, holder):
+    holder("serial:_dev_ttyACM0")
+    manager = LeaseManager(str(tmp_path / "leases"))
+    with pytest.raises(LeaseTimeout):
+        manager.acquire(["probe:1", "serial:_dev_ttyACM0"], timeout=0.2)
+    # leases acquired before the busy one are released
+    assert not manager._locks
+
+
+def test_lease_port_allocates_and_releases(tmp_path):
+    manager = LeaseManager(str(tmp_path / "leases"))
+    start, end = LeaseManager.PORT_RANGE
+    first = manager.lease_port()
+    second = manager.lease_port()
+    assert start <= first < end and start <= second < end
+    assert first != second
+
+    # the port leased by another manager is skipped
+    other = LeaseManager(str(tmp_path / "leases"))
+    third = other.lease_port(preferred=first)
+    assert third not in (first, second)
+
+    manager.release_port(first)
+    assert other.lease_port(preferred=first) == first
+    other.release()
+    manager.release()
+    assert not manager._locks and not other._locks
+
+
+def test_lease_is_released_on_exception(tmp_path):
+    manager = LeaseManager(str(tmp_path / "leases"))
+    with pytest.raises(RuntimeError):
+        with manager.lease(["probe:62100000"]):
+            assert "probe:62100000" in manager._locks
+            raise RuntimeError("test failed")
+    assert not manager._locks
+    assert manager._lock("probe:62100000").acquire(blocking=False)
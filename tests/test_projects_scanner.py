@@ -0,0 +1,50 @@
+from collections import defaultdict
+
+from mcutool.projects_scanner import _parse_candidates
+
+
+class FakeProject(object):
+
+    def __init__(self, idename, filepath):
+        self.idename = idename
+        self.filepath = filepath
+
+
+def _project_class(idename, parsed):
+    class Project(object):
+        @classmethod
+        def _get_instance(cls, filepath):
+            parsed.append((idename, str(filepath)))
+            if str(filepath).endswith(".bad"):
+                return None
+            return FakeProject(idename, str(filepath))
+    return Project
+
+
+def test_first_toolchain_with_projects_wins_per_directory():
+    parsed = list()
+    iar, mdk, armgcc = (_project_class(name, parsed) for name in ("iar", "mdk", "armgcc"))
+    scan_candidates = [
+        # iar projects found, mdk and armgcc are not parsed
+        [(iar, ["a/iar/a.ewp"]), (mdk, ["a/mdk/a.uvprojx"]), (armgcc, ["a/armgcc/CMakeLists.txt"])],
+        # no iar project, the mdk project is taken
+        [(iar, []), (mdk, ["b/mdk/b.uvprojx"]), (armgcc, ["b/armgcc/CMakeLists.txt"])],
+        # invalid iar project, fall back to armgcc
+        [(iar, ["c/iar/c.bad"]), (mdk, []), (armgcc, ["c/armgcc/CMakeLists.txt"])],
+        [(iar, []), (mdk, []), (armgcc, [])],
+    ]
+
+    projects = defaultdict(list)
+    _parse_candidates(projects, scan_candidates)
+
+    assert {name: [prj.filepath for prj in prjs] for name, prjs in projects.items()} == {
+        "iar": ["a/iar/a.ewp"],
+        "mdk": ["b/mdk/b.uvprojx"],
+        "armgcc": ["c/armgcc/CMakeLists.txt"],
+    }
+    assert sorted(parsed) == sorted([
+        ("iar", "a/iar/a.ewp"),
+        ("iar", "c/iar/c.bad"),
+        ("mdk", "b/mdk/b.uvprojx"),
+        ("armgcc", "c/armgcc/CMakeLists.txt"),
+    ])
@@ -0,0 +1,141 @@
+import sys
+import types
+
+import pytest
+
+from mcutool.debugger.pyocd import PYOCD
+
+
+class FakeSession(object):
+
+    def __init__(self, options):
+        self.options = options
+        self.is_open = False
+        self.opened = 0
+
+    def open(self):
+        self.is_open = True
+        self.opened += 1
+
+    def close(self):
+        self.is_open = False
+
+
+class FakeConnectHelper(object):
+    sessions = list()
+
+    @classmethod
+    def session_with_chosen_probe(cls, options=None, **kwargs):
+        session = FakeSession(options)
+        cls.sessions.append(session)
+        return session
+
+
+class FakeBoard(object):
+    name = "evkmimxrt1060"
+    usbid = "0229000005"
+    devicename = "MIMXRT1062xxxxA"
+
+
+class ProbeError(Exception):
+    pass
+
+
+class Error(Exception):
+    pass
+
+
+class FakeEraser(object):
+    failure = None
+    erased = list()
+
+    class Mode(object):
+        CHIP = "chip"
+
+    def __init__(self, session, mode):
+        self.session = session
+
+    def erase(self):
+        if self.failure:
+            raise self.failure
+        self.erased.append(self.session)
+
+
+@pytest.fixture
+def pyocd(monkeypatch):
+    monkeypatch.setattr(PYOCD, "_PYOCD_VER", "0.35.0")
+    monkeypatch.setattr(PYOCD, "_PYOCD_BUILTIN_TARGETS", dict())
+    monkeypatch.setattr(PYOCD, "_PYOCD_CONNECT_HELPER", FakeConnectHelper)
+    monkeypatch.setattr(PYOCD, "_SESSIONS", dict())
+    FakeConnectHelper.sessions = list()
+    FakeEraser.failure = None
+    FakeEraser.erased = list()
+
+    modules = {
+        "pyocd": types.ModuleType("pyocd"),
+        "pyocd.core": types.ModuleType("pyocd.core"),
+        "pyocd.core.exceptions": types.ModuleType("pyocd.core.exceptions"),
+        "pyocd.flash": types.ModuleType("pyocd.flash"),
+        "pyocd.flash.eraser": types.ModuleType("pyocd.flash.eraser"),
+    }
+    modules["pyocd.core.exceptions"].Error = Error
+    modules["pyocd.core.exceptions"].ProbeError = ProbeError
+    modules["pyocd.flash.eraser"].FlashEraser = FakeEraser
+    for name, module in modules.items():
+        monkeypatch.setitem(sys.modules, name, module)
+
+    debugger = PYOCD()
+    debugger.set_board(FakeBoard())
+    yield debugger
+    PYOCD.close_all_sessions()
+
+
+def test_open_session_is_pooled(pyocd):
+    session = pyocd.open_session()
+    assert session.is_open
+    assert pyocd.open_session() is session
+    # shared by other debugger instances of the same probe
+    other = PYOCD()
+    other.set_board(FakeBoard())
+    assert other.open_session() is session
+
+
+def test_open_session_reopens_on_option_change(pyocd):
+    session = pyocd.open_session()
+    attached = pyocd.open_session({"connect_mode": "attach"})
+    assert attached is not session
+    assert not session.is_open
+    assert attached.options == {"connect_mode": "attach"}
+
+
+def test_open_session_reopens_closed_session(pyocd):
+    session = pyocd.open_session()
+    session.close()
+    assert pyocd.open_session() is not session
+
+
+def test_erase_uses_erase_options(pyocd):
+    assert pyocd.erase() == (0, '')
+    session = FakeEraser.erased[0]
+    assert session.options["resume_on_disconnect"] is False
+    assert session.options["allow_no_cores"] is True
+
+
+def test_erase_failure_keeps_pooled_session(pyocd):
+    FakeEraser.failure = Error("flash algo failure")
+    ret, msg = pyocd.erase()
+    assert ret == 1 and "flash algo failure" in msg
+    assert PYOCD._SESSIONS[FakeBoard.usbid][0].is_open
+
+
+def test_erase_probe_error_closes_session(pyocd):
+    FakeEraser.failure = ProbeError("probe disconnected")
+    assert pyocd.erase()[0] == 1
+    assert FakeBoard.usbid not in PYOCD._SESSIONS
+    assert not FakeConnectHelper.sessions[-1].is_open
+
+
+def test_erase_does_not_catch_programming_errors(pyocd):
+    FakeEraser.failure = TypeError("bug")
+    with pytest.raises(TypeError):
+        pyocd.erase()
@@ -0,0 +1,68 @@
+import logging
+from xml.etree import ElementTree as ET
+
+from mcutool.sdk_manifest import merge_split_manifest
+
+
+TOP = """<?xml version="1.0" encoding="UTF-8"?>
+<manifest format_version="3.10" id="SDK_2.x_EVK" version="2.13.0">
+  <boards>
+    <board id="evk" name="EVK">
+      <examples>
+        <example id="evk_a" name="a" path="boards/evk/a"/>
+      </examples>
+    </board>
+  </boards>
+  <include path="sub_manifest.xml"/>
+  <components>
+    <component id="utility" name="utility"/>
+  </components>
+</manifest>
+"""
+
+SUB = """<?xml version="1.0" encoding="UTF-8"?>
+<manifest format_version="3.10">
+  <boards>
+    <board id="evk" name="EVK" package="MIMXRT1062">
+      <examples>
+        <example id="evk_a" name="a" path="boards/evk/a"/>
+        <example id="evk_b" name="b" path="boards/evk/b"/>
+      </examples>
+    </board>
+  </boards>
+  <components>
+    <component id="utility" name="utility_v2"/>
+    <component id="driver" name="driver"/>
+  </components>
+</manifest>
+"""
+
+
+def _merge(tmp_path):
+    (tmp_path / "top_manifest.xml").write_text(TOP)
+    (tmp_path / "sub_manifest.xml").write_text(SUB)
+    output = merge_split_manifest(str(tmp_path / "top_manifest.xml"), str(tmp_path))
+    return ET.parse(output).getroot()
+
+
+def test_same_id_items_merge_children(tmp_path):
+    root = _merge(tmp_path)
+    boards = root.findall("boards/board")
+    assert len(boards) == 1
+    assert boards[0].get("package") == "MIMXRT1062"
+    examples = [example.get("id") for example in boards[0].iter("example")]
+    assert examples == ["evk_a", "evk_b"]
+
+
+def test_sub_manifest_items_follow_parent_items(tmp_path):
+    root = _merge(tmp_path)
+    components = [comp.get("id") for comp in root.findall("components/component")]
+    assert components == ["utility", "driver"]
+    assert root.find("include") is None
+
+
+def test_conflicting_attribute_keeps_first_and_warns(tmp_path, caplog):
+    with caplog.at_level(logging.WARNING):
+        root = _merge(tmp_path)
+    assert root.find("components/component[@id='utility']").get("name") == "utility"
+    assert "components/component[utility]@name" in caplog.text
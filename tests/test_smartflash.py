@@ -0,0 +1,158 @@
+import struct
+import zlib
+from functools import partial
+
+import pytest
+
+from mcutool import board as board_module
+from mcutool.board import Board
+from mcutool.debugger.general import DebuggerBase
+from mcutool.debugger.smartflash import (FlashRecord, image_hash, load_image_segments,
+                                         segment_crcs)
+
+
+def _hex_record(rtype, offset, data):
+    record = bytes([len(data), offset >> 8, offset & 0xFF, rtype]) + data
+    checksum = (-sum(record)) & 0xFF
+    return ":" + (record + bytes([checksum])).hex().upper()
+
+
+def _make_elf(segments):
+    """Build a 32-bit little endian ELF with PT_LOAD segments of (vaddr, paddr, data)."""
+    ehsize, phentsize = 52, 32
+    phoff = ehsize
+    offset = phoff + phentsize * len(segments)
+    headers, payload = b"", b""
+    for vaddr, paddr, data in segments:
+        headers += struct.pack("<IIIIIIII", 1, offset + len(payload), vaddr, paddr,
+                               len(data), len(data), 5, 4)
+        payload += data
+    ident = b"\x7fELF" + bytes([1, 1, 1]) + bytes(9)
+    header = ident + struct.pack("<HHIIIIIHHHHHH", 2, 40, 1, 0, phoff, 0, 0,
+                                 ehsize, phentsize, len(segments), 0, 0, 0)
+    return header + headers + payload
+
+
+def test_load_bin_segments(tmp_path):
+    image = tmp_path / "app.bin"
+    image.write_bytes(b"\x01\x02\x03\x04")
+    assert load_image_segments(str(image), "0x60002000") == [(0x60002000, b"\x01\x02\x03\x04")]
+    assert load_image_segments(str(image)) == [(0, b"\x01\x02\x03\x04")]
+
+
+def test_load_hex_segments(tmp_path):
+    image = tmp_path / "app.hex"
+    image.write_text("\n".join([
+        _hex_record(4, 0, b"\x60\x00"),
+        _hex_record(0, 0x2000, b"\x01\x02"),
+        _hex_record(0, 0x2002, b"\x03\x04"),
+        _hex_record(0, 0x3000, b"\x05"),
+        _hex_record(1, 0, b""),
+    ]))
+    assert load_image_segments(str(image)) == [
+        (0x60002000, b"\x01\x02\x03\x04"),
+        (0x60003000, b"\x05"),
+    ]
+
+
+def test_load_elf_segments_at_physical_address(tmp_path):
+    image = tmp_path / "app.elf"
+    image.write_bytes(_make_elf([
+        (0x00000000, 0x60002000, b"\xAA" * 8),
+        # initialized data is loaded at LMA in flash, right after text
+        (0x20000000, 0x60002008, b"\xBB" * 4),
+    ]))
+    assert load_image_segments(str(image)) == [(0x60002000, b"\xAA" * 8 + b"\xBB" * 4)]
+
+
+def test_segment_crcs():
+    assert segment_crcs([(0x100, b"abc")]) == [(0x100, 3, zlib.crc32(b"abc"))]
+
+
+def test_image_hash_depends_on_address(tmp_path):
+    image = tmp_path / "app.bin"
+    image.write_bytes(b"\x00" * 16)
+    assert image_hash(str(image), "0x0") != image_hash(str(image), "0x1000")
+    assert image_hash(str(image), "0x0") == image_hash(str(image), "0x0")
+
+
+class FakeBoard(object):
+    name = "evk"
+    usbid = "JLink:600112233"
+
+
+def test_flash_record(tmp_path):
+    record = FlashRecord(FakeBoard(), str(tmp_path))
+    assert record.path.endswith("JLink_600112233.json")
+    assert not record.matches("abc")
+
+    record.save("abc", "app.bin", [(0, 4, 123)])
+    assert record.matches("abc")
+    assert not record.matches("def")
+    assert record.load()["segments"] == [[0, 4, 123]]
+
+    record.clear()
+    assert not record.matches("abc")
+
+
+class FakeDebugger(DebuggerBase):
+    """Keep flash content in memory."""
+
+    def __init__(self):
+        super().__init__("fake", ".")
+        self.memory = dict()
+        self.calls = list()
+
+    def flash(self, filepath, addr=None, delta=None, **kwargs):
+        self.calls.append(("flash", delta))
+        for start, data in load_image_segments(filepath, addr):
+            self.memory[start] = data
+        return 0, ""
+
+    def flash_crc(self, ranges):
+        return [zlib.crc32(self.memory.get(addr, b"")[:size]) for addr, size in ranges]
+
+    def reset(self):
+        self.calls.append(("reset", None))
+        return True
+
+
+@pytest.fixture
+def board(tmp_path, monkeypatch):
+    monkeypatch.setattr(board_module, "FlashRecord", partial(FlashRecord, record_dir=str(tmp_path / "records")))
+    board = Board("evk", debugger_type="jlink", usbid="600112233", start_address="0x60002000",
+                  smart_flash=True)
+    board.debugger = FakeDebugger()
+    return board
+
+
+def test_programming_skips_matched_image_and_resets(board, tmp_path):
+    image = tmp_path / "app.bin"
+    image.write_bytes(b"\x11" * 32)
+
+    assert board.programming(str(image)) == (0, "")
+    assert board.debugger.calls == [("flash", True)]
+
+    board.debugger.calls.clear()
+    ret, msg = board.programming(str(image))
+    assert ret == 0 and "skipped" in msg
+    assert board.debugger.calls == [("reset", None)]
+
+
+def test_programming_when_flash_content_changed(board, tmp_path):
+    image = tmp_path / "app.bin"
+    image.write_bytes(b"\x11" * 32)
+    board.programming(str(image))
+
+    board.debugger.memory[0x60002000] = b"\x00" * 32
+    board.debugger.calls.clear()
+    assert board.programming(str(image)) == (0, "")
+    assert board.debugger.calls == [("flash", True)]
+
+
+def test_programming_without_smart_mode(board, tmp_path):
+    image = tmp_path / "app.bin"
+    image.write_bytes(b"\x11" * 32)
+    board.programming(str(image), smart=False)
+    board.programming(str(image), smart=False)
+    assert board.debugger.calls == [("flash", None), ("flash", None)]
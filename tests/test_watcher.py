@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+import types
+
+from mcutool.sdk_manifest import SDKManifest
+from watcher import Watcher
+
+
+class FakeProject(object):
+
+    def __init__(self, prjdir):
+        self.prjdir = str(prjdir)
+        self.cleared = 0
+
+    def clear_cache(self):
+        self.cleared += 1
+
+
+class FakeAnalyzer(object):
+
+    def __init__(self, selected):
+        self.selected = selected
+        self.sdk_root = "."
+
+    def select(self, projects, paths, targets):
+        return [(idename, prj, target) for idename, prj in self.selected for target in targets]
+
+
+def _event(event_type, src_path, dest_path=None, is_directory=False):
+    return types.SimpleNamespace(event_type=event_type, src_path=src_path, dest_path=dest_path,
+                                 is_directory=is_directory)
+
+
+def _watcher(tmp_path, projects=None, **kwargs):
+    return Watcher(projects or dict(), lambda affected: None, **kwargs)
+
+
+def test_ignore_rules(tmp_path):
+    watcher = _watcher(tmp_path, ignore_dirs=[str(tmp_path / "workspace")])
+    assert watcher.is_ignored(str(tmp_path / "workspace" / "out.elf"))
+    assert watcher.is_ignored(str(tmp_path / "app" / "iar" / "debug" / "app.o"))
+    assert watcher.is_ignored(str(tmp_path / "sdk" / ".git" / "index"))
+    assert not watcher.is_ignored(str(tmp_path / "workspace2" / "main.c"))
+    assert not watcher.is_ignored(str(tmp_path / "app" / "main.c"))
+
+
+def test_event_filter(tmp_path):
+    watcher = _watcher(tmp_path, ignore_dirs=[str(tmp_path / "workspace")])
+    watcher._on_event(_event("opened", str(tmp_path / "a.c")))
+    watcher._on_event(_event("modified", str(tmp_path / "src"), is_directory=True))
+    watcher._on_event(_event("modified", str(tmp_path / "workspace" / "a.o")))
+    watcher._on_event(_event("moved", str(tmp_path / "a.c~"), str(tmp_path / "a.c")))
+    watcher._on_event(_event("closed", str(tmp_path / "b.c")))
+
+    queued = list()
+    while not watcher._events.empty():
+        queued.append(watcher._events.get())
+    assert queued == [str(tmp_path / "a.c~"), str(tmp_path / "a.c"), str(tmp_path / "b.c")]
+
+
+def test_debounce_merges_burst(tmp_path):
+    watcher = _watcher(tmp_path, debounce=0.2)
+
+    def burst():
+        for name in ("a.c", "b.c", "a.c"):
+            watcher._events.put(name)
+            time.sleep(0.05)
+        # after the quiet period, it belongs to the next batch
+        time.sleep(0.5)
+        watcher._events.put("c.c")
+
+    thread = threading.Thread(target=burst)
+    thread.start()
+    assert watcher._collect() == {"a.c", "b.c"}
+    assert watcher._collect() == {"c.c"}
+    thread.join()
+
+
+def test_affected_projects_by_directory_and_analyzer(tmp_path):
+    app = FakeProject(tmp_path / "boards" / "evk" / "hello_world" / "iar")
+    other = FakeProject(tmp_path / "boards" / "evk" / "led_blinky" / "iar")
+    driver_user = FakeProject(tmp_path / "boards" / "evk" / "lpuart" / "iar")
+    projects = {"iar": [app, other, driver_user]}
+    watcher = _watcher(tmp_path, projects, analyzer=FakeAnalyzer([("iar", driver_user)]))
+
+    changed = [os.path.join(app.prjdir, "hello_world.ewp"), os.path.join(app.prjdir, "main.c")]
+    assert watcher.affected_projects(changed) == {"iar": [driver_user, app]}
+
+    watcher.analyzer = None
+    assert watcher.affected_projects([str(tmp_path / "devices" / "fsl_gpio.c")]) == {}
+
+
+def test_refresh_drops_cached_data(tmp_path, monkeypatch):
+    cleared = list()
+    monkeypatch.setattr(SDKManifest, "clear_cache", classmethod(lambda cls, instances=False: cleared.append(instances)))
+    app = FakeProject(tmp_path / "app")
+    watcher = _watcher(tmp_path, {"mcux": [app]})
+
+    watcher.refresh([str(tmp_path / "app" / "app.xml")], {"mcux": [app]})
+    assert app.cleared == 1 and cleared == []
+
+    watcher.refresh([str(tmp_path / "EVK_manifest_v3_10.xml")], {})
+    assert cleared == [True]
@@ -0,0 +1,139 @@
+import os
+import time
+import queue
+import logging
+from mcutool.projects_scanner import Exclude_Matcher
+from mcutool.sdk_manifest import SDKManifest
+from mcutool.impact import ImpactAnalyzer
+from mcutool.archive import MANIFEST_PATTERN
+
+
+class Watcher(object):
+    """Watch SDK directories and report the projects affected by file changes.
+
+    The file system events are collected by watchdog (inotify on Linux), changes
+    in a short period are merged into one batch, then callback is called with
+    the affected projects: {idename: [Project]}.
+    """
+
+    def __init__(self, projects, callback, ignore_dirs=None, debounce=0.5, analyzer=None):
+        self.projects = projects
+        self.callback = callback
+        self.analyzer = analyzer
+        self.debounce = debounce
+        self.ignore_dirs = [os.path.abspath(path) for path in (ignore_dirs or [])]
+        self._events = queue.Queue()
+        # project directory -> [(idename, project)]
+        self._prjdirs = dict()
+        for idename, prjs in projects.items():
+            for prj in prjs:
+                prjdir = os.path.abspath(prj.prjdir)
+                self._prjdirs.setdefault(prjdir, list()).append((idename, prj))
+
+    def is_ignored(self, path):
+        path = os.path.abspath(path)
+        for ignore_dir in self.ignore_dirs:
+            if path == ignore_dir or path.startswith(ignore_dir + os.sep):
+                return True
+
+        parts = path.replace("\\", "/").split("/")[:-1]
+        return any(Exclude_Matcher.match(part) for part in parts if part)
+
+    def affected_projects(self, paths):
+        """Return projects which directory contains the changed files, and the
+        projects selected by the impact analyzer if it is given.
+
+        Returns:
+            {dict} -- key: idename, value: a list of Project objects.
+        """
+        affected = dict()
+        seen = set()
+        if self.analyzer:
+            for idename, prj, _ in self.analyzer.select(self.projects, paths, [None]):
+                if id(prj) not in seen:
+                    seen.add(id(prj))
+                    affected.setdefault(idename, list()).append(prj)
+
+        for path in paths:
+            directory = os.path.dirname(os.path.abspath(path))
+            while True:
+                for idename, prj in self._prjdirs.get(directory, []):
+                    if id(prj) not in seen:
+                        seen.add(id(prj))
+                        affected.setdefault(idename, list()).append(prj)
+
+                parent = os.path.dirname(directory)
+                if parent == directory:
+                    break
+                directory = parent
+
+        return affected
+
+    def refresh(self, paths, affected):
+        """Drop the parsed data cached for changed files, so the affected
+        projects are built with the current manifest and example xml.
+        """
+        if any(MANIFEST_PATTERN.match(os.path.basename(path)) for path in paths):
+            logging.info("manifest is changed, reload it")
+            SDKManifest.clear_cache(instances=True)
+            if self.analyzer:
+                self.analyzer = ImpactAnalyzer(self.analyzer.sdk_root)
+
+        for prjs in affected.values():
+            for prj in prjs:
+                prj.clear_cache()
+
+    def _on_event(self, event):
+        # file access events (opened, closed_no_write) do not change sources
+        if event.is_directory or event.event_type not in ("created", "modified", "moved", "deleted", "closed"):
+            return
+        for path in (event.src_path, getattr(event, "dest_path", None)):
+            if path and not self.is_ignored(path):
+                self._events.put(path)
+
+    def _collect(self):
+        """Wait for a batch of changed files."""
+        changed = {self._events.get()}
+        deadline = time.time() + self.debounce
+        while True:
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                break
+            try:
+                changed.add(self._events.get(timeout=timeout))
+                deadline = time.time() + self.debounce
+            except queue.Empty:
+                break
+        return changed
+
+    def watch(self, dirs):
+        """Watch directories recursively and handle changes until Ctrl+C."""
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            raise ImportError("watch mode requires watchdog, please install: pip install watchdog")
+
+        handler = FileSystemEventHandler()
+        handler.on_any_event = self._on_event
+        observer = Observer()
+        for path in dirs:
+            observer.schedule(handler, path, recursive=True)
+
+        observer.start()
+        logging.info("watching for changes: %s", ", ".join(dirs))
+        try:
+            while True:
+                changed = self._collect()
+                logging.info("changed files: %s", ", ".join(sorted(changed)))
+                affected = self.affected_projects(changed)
+                self.refresh(changed, affected)
+                if not affected:
+                    logging.info("no project is affected")
+                    continue
+                self.callback(affected)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            observer.stop()
+            observer.join()
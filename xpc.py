@@ -4,14 +4,17 @@ import re
 import logging
 import argparse
 import pathlib
-from zipfile import ZipFile
 from cfg_parer import CfgParser
 from executer import Executer
 from runner import Runner
 from builder import Builder
+from watcher import Watcher
 from mcutool.compilers.result import Result
-from mcutool.projects_scanner import find_projects
-from settings import APP_TEST_PATH, LOCAL_SCRIPT
+from mcutool.catalog import ProjectCatalog
+from mcutool.impact import ImpactAnalyzer, git_changed_files
+from mcutool.archive import extract_sdk
+from mcutool.inventory import INVENTORY
+from settings import APP_TEST_PATH, LOCAL_SCRIPT, CATALOG_PATH
 
 
 
@@ -28,17 +31,17 @@ def get_arguments():
     parser.add_argument('--task_type', default="1", help='specific task type(0: build only,1: build and run,2: run only)')
     parser.add_argument('--flash', action='store_true', help='fetch binary from server then flash it to board')
     parser.add_argument('--filepath', help='specify the elf file path for run only test.')
+    parser.add_argument('--watch', action='store_true', help='watch sdk changes, rebuild and retest affected projects.')
+    parser.add_argument('--changed-files', help='only build/run projects affected by these files, comma separated or @listfile')
+    parser.add_argument('--diff', help='only build/run projects affected by a git diff range of sdk, like HEAD~1..HEAD')
 
     return parser.parse_args()
 
 def get_projects(sdk_root_path, applist):
-    projects, count = find_projects(sdk_root_path)
-    expect_prjs = {}
-
-    for idename, project_list in projects.items():
-        expect_prjs[idename] = [p for p in project_list if p.name in applist]
-
-    return expect_prjs
+    with ProjectCatalog(CATALOG_PATH) as catalog:
+        # scan is skipped when the catalog is up to date with SDK manifest
+        catalog.import_sdk(sdk_root_path)
+        return catalog.get_projects(sdk_root=sdk_root_path, app=applist)
 
 def get_boardname(sdk_path, project_path):
     boardname = re.findall(f"{sdk_path}/boards/(\w+)", project_path.replace("\\", "/"))[0]
@@ -57,30 +60,57 @@ def run_test(filepath, boardname, appname, target):
 
     return ret_value
 
-def build_test(projects, targets, workspace):
-    results = []
-    output_files = []
+def iter_build_pairs(projects, targets):
     for idename, project in projects.items():
         for prj in project:
             for target in targets:
-                builder = Builder()
-                output_store_path = f"{APP_TEST_PATH}/{prj.boardname}/"
-                if not os.path.exists(output_store_path):
-                    os.makedirs(output_store_path)
+                yield idename, prj, target
+
+def get_changed_files(sdk_path, changed_files=None, diff=None):
+    files = []
+    if changed_files:
+        if changed_files.startswith("@"):
+            with open(changed_files[1:]) as fobj:
+                files.extend(line.strip() for line in fobj if line.strip())
+        else:
+            files.extend(f.strip() for f in changed_files.split(",") if f.strip())
+    if diff:
+        files.extend(git_changed_files(sdk_path, diff))
+    return files
 
-                builder.init(idename, target, output_store_path, workspace, prj.name)
-                builder.compiler.Project = prj
+def select_build_pairs(sdk_path, projects, targets, changed_files):
+    analyzer = ImpactAnalyzer(sdk_path)
+    pairs = analyzer.select(projects, changed_files, targets)
+    logging.info(f"{len(pairs)} build(s) are affected by {len(changed_files)} changed file(s)")
+    return pairs
 
-                result = builder.build()
-                ret_value = result.result.value
+def build_test(projects, targets, workspace, compilers=None, pairs=None):
+    results = []
+    output_files = []
+    if pairs is None:
+        pairs = iter_build_pairs(projects, targets)
+    for idename, prj, target in pairs:
+        builder = Builder()
+        output_store_path = f"{APP_TEST_PATH}/{prj.boardname}/"
+        if not os.path.exists(output_store_path):
+            os.makedirs(output_store_path)
 
-                results.append(ret_value)
-                if ret_value == 0:
-                    build_output_file = builder.post_build(result)
-                    output_files.append((build_output_file, prj.boardname, prj.name, target))
-                    logging.info('{:-^48}'.format(f" Test result =  {result.result.name} "))
-                else:
-                    logging.error('{:-^48}'.format(f" Test result =  {result.result.name} "))
+        compiler = compilers.get(idename) if compilers is not None else None
+        builder.init(idename, target, output_store_path, workspace, prj.name, compiler=compiler)
+        if compilers is not None:
+            compilers[idename] = builder.compiler
+        builder.compiler.Project = prj
+
+        result = builder.build()
+        ret_value = result.result.value
+
+        results.append(ret_value)
+        if ret_value == 0:
+            build_output_file = builder.post_build(result)
+            output_files.append((build_output_file, prj.boardname, prj.name, target))
+            logging.info('{:-^48}'.format(f" Test result =  {result.result.name} "))
+        else:
+            logging.error('{:-^48}'.format(f" Test result =  {result.result.name} "))
 
     total = len(results)
     counter_fail = 0
@@ -105,12 +135,15 @@ def build_test(projects, targets, workspace):
 
     return ret, output_files
 
-def build_run_test(sdk_path, apps, targets, workspace):
+def build_run_test(sdk_path, apps, targets, workspace, changed_files=None):
     sdk_path = sdk_path.replace("\\", "/")
     projects = get_projects(sdk_path, apps)
     run_results = []
 
-    ret, output_files = build_test(projects, targets, workspace)
+    pairs = None
+    if changed_files is not None:
+        pairs = select_build_pairs(sdk_path, projects, targets, changed_files)
+    ret, output_files = build_test(projects, targets, workspace, pairs=pairs)
     for outputfile in  output_files:
         run_result = run_test(*outputfile)
         run_results.append(run_result)
@@ -134,15 +167,37 @@ def build_run_test(sdk_path, apps, targets, workspace):
 
     return ret
 
+def watch_test(sdk_path, apps, targets, workspace, run=True):
+    """Keep projects and toolchains in memory, rebuild and retest the
+    projects affected by the changes in sdk.
+    """
+    sdk_path = sdk_path.replace("\\", "/")
+    projects = get_projects(sdk_path, apps)
+    compilers = {}
+
+    def on_change(affected):
+        ret, output_files = build_test(affected, targets, workspace, compilers=compilers)
+        if run:
+            for outputfile in output_files:
+                run_test(*outputfile)
+
+    try:
+        analyzer = ImpactAnalyzer(sdk_path)
+    except ValueError:
+        analyzer = None
+    # boards are plugged in and out during watching, refresh host inventory by hotplug events
+    INVENTORY.start_monitor()
+    watcher = Watcher(projects, on_change, ignore_dirs=[workspace, APP_TEST_PATH], analyzer=analyzer)
+    watcher.watch([sdk_path])
+    return 0
+
 def download_package(rpath, lpath):
     pass
 
-def extract(filepath, dest_path):
+def extract(filepath, dest_path, apps=None):
     if filepath.endswith(".zip"):
-        zipFile = ZipFile(filepath, "r")
-        for file in zipFile.namelist():
-            zipFile.extract(file, dest_path)
-        zipFile.close()
+        # only the files required by the apps, up-to-date files are skipped
+        extract_sdk(filepath, dest_path, names=apps)
 
 def main():
     if sys.version_info[0] < 3:
@@ -168,15 +223,26 @@ def main():
         sdk_local_path = f"{LOCAL_SCRIPT}/downloads/{fname}"
         download_package(args_input.sdk, sdk_local_path)
     
-    #extract(sdk_local_path, sdk_store_path)
+    #extract(sdk_local_path, sdk_store_path, apps)
     targets = args_input.target.split(",")
     target = targets[0]
     apps = args_input.apps.split(",")
 
     task_type = int(args_input.task_type)
+    if args_input.watch:
+        ret = watch_test(sdk_store_path, apps, targets, workspace, run=(task_type != 0))
+        os._exit(ret)
+
+    changed_files = None
+    if args_input.changed_files or args_input.diff:
+        changed_files = get_changed_files(sdk_store_path, args_input.changed_files, args_input.diff)
+
     if 0 == task_type:
         projects = get_projects(sdk_store_path, apps)
-        ret, outputs = build_test(projects, targets, workspace)
+        pairs = None
+        if changed_files is not None:
+            pairs = select_build_pairs(sdk_store_path, projects, targets, changed_files)
+        ret, outputs = build_test(projects, targets, workspace, pairs=pairs)
         os._exit(ret)
     
     elif 2 == task_type:
@@ -184,7 +250,7 @@ def main():
         ret = run_test(args_input.filepath, "lpcxpresso55s28", "hello_world", "debug")
         os._exit(ret)
     else:
-        build_run_test(sdk_store_path, apps, targets, workspace)
+        build_run_test(sdk_store_path, apps, targets, workspace, changed_files=changed_files)
 
 
 if __name__ == "__main__":